@@ -7,7 +7,10 @@ for the Prompt Brickz prompt engineering system.
 
 import os
 import asyncio
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import hmac
+import threading
+import time
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -15,16 +18,89 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import Brickz modules
-from brickz.wizard import BrickzWizard
-from brickz.bricks import BrickLibrary, BrickCategory
-from brickz.optimizer import optimize_content, get_optimization_info
+from brickz.wizard import DEFAULT_SUGGESTIONS, BrickzWizard
+from brickz.bricks import BrickLibrary, BrickCategory, DuplicateBrickError
+from brickz.optimizer import optimize_content, get_optimization_info, OptimizationTier, optimizer
+from brickz.jobs import DEFAULT_DB_PATH, JobManager, JobStore, QueueFullError
+from brickz import admission
+from brickz.metrics import CONTENT_TYPE, cache_hit_rates, instrument_app, metrics
+from brickz.offload import offload_pool
+from brickz.profiling import DEFAULT_INTERVAL, profiler
+from brickz.recommender import BrickRecommender
+from brickz.sessions import SessionConflictError, SessionNotFoundError, SessionStore, valid_session_id
+from brickz.user_collections import CollectionFullError, valid_user_id
+from brickz import tracing
+from brickz.tracing import span
 
 app = Flask(__name__, static_folder='frontend', template_folder='frontend')
 CORS(app)
+instrument_app(app)
+tracing.instrument_app(app)
 
-# Initialize Brickz components
-wizard = BrickzWizard()
-brick_library = BrickLibrary()
+# Admission lane of each view; views not listed (metrics, stats, admin, job
+# polling) are always served, so the app stays observable under overload.
+# Views that search the similarity or duplicate index are CPU-bound and
+# go through the analysis lane, never holding the cheap catalog slots.
+ADMISSION_LANES = {
+    'wizard_greet': 'catalog',
+    'get_brick_categories': 'catalog',
+    'submit_optimize_job': 'catalog',
+    'get_user_collection': 'catalog',
+    'save_to_user_collection': 'catalog',
+    'remove_from_user_collection': 'catalog',
+    'get_mad_libs_prompts': 'catalog',
+    'search_bricks': 'catalog',
+    'get_recommended_bricks': 'catalog',
+    'wizard_analyze': 'analysis',
+    'wizard_analyze_batch': 'analysis',
+    'wizard_analyze_session': 'analysis',
+    'similar_bricks': 'analysis',
+    'create_custom_brick': 'analysis',
+    'find_duplicate_bricks': 'analysis',
+    'optimize_prompt': 'optimize',
+    'run_pipeline': 'optimize',
+}
+admission.instrument_app(app, ADMISSION_LANES)
+
+# Brickz components are built on first use, not at import, so importing
+# the app (tests, worker forks, CLI tools) stays cheap
+_components = {}
+_components_lock = threading.Lock()
+
+def _component(name, factory):
+    """Get a shared component, constructing it once on first use"""
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                component = _components[name] = factory()
+    return component
+
+def get_wizard() -> BrickzWizard:
+    """The shared wizard"""
+    return _component('wizard', BrickzWizard)
+
+def _build_brick_library() -> BrickLibrary:
+    library = BrickLibrary()
+    # Related-brick suggestions stay empty, and similarity and duplicate
+    # checks answer 503, until these finish, rather than the first request
+    # paying for the build
+    library.build_semantic_index(background=True)
+    library.build_duplicate_index(background=True)
+    return library
+
+def get_brick_library() -> BrickLibrary:
+    """The shared brick library"""
+    return _component('brick_library', _build_brick_library)
+
+def get_recommender() -> BrickRecommender:
+    """The shared brick recommender, learning from /api/optimize selections"""
+    return _component('recommender', BrickRecommender)
+
+def get_sessions() -> SessionStore:
+    """Live editing sessions for incremental analysis"""
+    return _component('sessions', SessionStore)
 
 @app.route('/')
 def index():
@@ -35,10 +111,63 @@ def index():
 def wizard_greet():
     """Get wizard greeting"""
     return jsonify({
-        'message': wizard.greet_user(),
+        'message': get_wizard().greet_user(),
         'status': 'ready'
     })
 
+# Most items a single batch analysis request may carry
+MAX_ANALYZE_BATCH = 500
+
+# Characters of an optimize request used to detect its content type for the recommender
+RECOMMENDER_SAMPLE_CHARS = 16 * 1024
+
+# Characters of analyzed content used to find semantically related bricks
+RELATED_SAMPLE_CHARS = 4 * 1024
+RELATED_BRICKS = 5
+
+# Seconds a client is asked to wait while a brick index is still being built
+INDEX_RETRY_AFTER = 5
+
+# Bricks per category in one /api/bricks/categories page (default, most), and
+# most results of one /api/bricks/search; a large catalog is paged, not dumped
+CATEGORY_PAGE_SIZE = 100
+MAX_CATEGORY_PAGE_SIZE = 1000
+SEARCH_LIMIT = 100
+MAX_SEARCH_LIMIT = 1000
+
+def _index_building(name):
+    """503 asking the client to retry once the named index has been built"""
+    response = jsonify({
+        'error': f'The {name} index is still being built',
+        'status': 'building'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(INDEX_RETRY_AFTER)
+    return response
+
+def _brick_match(brick, score) -> dict:
+    """JSON form of a (Brick, similarity) search hit"""
+    return {
+        'id': brick.id,
+        'name': brick.name,
+        'description': brick.description,
+        'category': brick.category.key,
+        'color': brick.category.color,
+        'is_custom': brick.is_custom,
+        'score': score
+    }
+
+def _analysis_to_dict(analysis, related=()) -> dict:
+    """JSON form of a WizardAnalysis, with bricks related to the analyzed content"""
+    return {
+        'content_type': analysis.content_type,
+        'suggested_template': analysis.suggested_template,
+        'confidence': analysis.confidence,
+        'suggested_bricks': get_recommender().rerank(analysis.content_type, analysis.suggested_bricks),
+        'related_bricks': [_brick_match(brick, score) for brick, score in related],
+        'reasoning': analysis.reasoning
+    }
+
 @app.route('/api/wizard/analyze', methods=['POST'])
 def wizard_analyze():
     """Analyze content and get wizard suggestions"""
@@ -50,20 +179,16 @@ def wizard_analyze():
         if not content.strip():
             return jsonify({
                 'error': 'No content provided',
-                'message': wizard.create_wizard_response('help_needed')
+                'message': get_wizard().create_wizard_response('help_needed')
             }), 400
         
-        # Analyze content
-        analysis = wizard.analyze_content(content, content_type)
+        # Analyze content (in the offload pool when it is large)
+        analysis = offload_pool.analyze(get_wizard(), content, content_type)
+        related = get_brick_library().similar_bricks(content[:RELATED_SAMPLE_CHARS], RELATED_BRICKS,
+                                                     wait=False)
         
         return jsonify({
-            'analysis': {
-                'content_type': analysis.content_type,
-                'suggested_template': analysis.suggested_template,
-                'confidence': analysis.confidence,
-                'suggested_bricks': analysis.suggested_bricks,
-                'reasoning': analysis.reasoning
-            },
+            'analysis': _analysis_to_dict(analysis, related),
             'wizard_comment': analysis.wizard_comment,
             'status': 'analyzed'
         })
@@ -71,19 +196,165 @@ def wizard_analyze():
     except Exception as e:
         return jsonify({
             'error': str(e),
-            'message': wizard.create_wizard_response('error_occurred')
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+@app.route('/api/wizard/analyze/batch', methods=['POST'])
+def wizard_analyze_batch():
+    """Analyze many pieces of content in one request"""
+    try:
+        data = request.get_json() or {}
+        items = data.get('items', [])
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'error': 'No items provided',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        if len(items) > MAX_ANALYZE_BATCH:
+            return jsonify({
+                'error': f'Too many items (max {MAX_ANALYZE_BATCH})',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        
+        pairs = []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'content': item}
+            content = item.get('content', '') if isinstance(item, dict) else ''
+            if not isinstance(content, str) or not content.strip():
+                return jsonify({
+                    'error': f'Item {index} has no content',
+                    'message': get_wizard().create_wizard_response('help_needed')
+                }), 400
+            pairs.append((content, item.get('content_type', 'auto')))
+        
+        analyses = offload_pool.analyze_many(get_wizard(), pairs)
+        related = get_brick_library().similar_bricks_many(
+            [content[:RELATED_SAMPLE_CHARS] for content, _ in pairs], RELATED_BRICKS, wait=False)
+        
+        return jsonify({
+            'results': [
+                {'analysis': _analysis_to_dict(analysis, matches), 'wizard_comment': analysis.wizard_comment}
+                for analysis, matches in zip(analyses, related)
+            ],
+            'status': 'analyzed'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'message': get_wizard().create_wizard_response('error_occurred')
         }), 500
 
+@app.route('/api/wizard/analyze/session', methods=['POST'])
+def wizard_analyze_session():
+    """Analyze a live editing session: full content to open it, then only edits"""
+    try:
+        data = request.get_json() or {}
+        session_id = data.get('session_id') or None
+        content = data.get('content')
+        edits = data.get('edits')
+        if edits is None and 'start' in data:
+            edits = [{key: data[key] for key in ('start', 'end', 'text') if key in data}]
+        edits = edits or []
+        base = data.get('base')
+        
+        if session_id is not None and not valid_session_id(session_id):
+            return jsonify({
+                'error': 'Invalid session ID',
+                'message': get_wizard().create_wizard_response('error_occurred')
+            }), 400
+        if content is None and (session_id is None or not edits):
+            return jsonify({
+                'error': 'Send content to open a session, or a session_id with edits',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        if ((content is not None and not isinstance(content, str)) or not isinstance(edits, list)
+                or not all(isinstance(edit, dict) for edit in edits)):
+            return jsonify({
+                'error': 'content must be a string and edits a list of {start, end, text}',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        
+        try:
+            session = get_sessions().update(session_id, content, edits, int(base) if base is not None else None)
+        except SessionNotFoundError:
+            return jsonify({
+                'error': f'Unknown or expired session: {session_id}; send the full content',
+                'status': 'resync'
+            }), 404
+        except SessionConflictError as e:
+            return jsonify({
+                'error': str(e),
+                'version': e.version,
+                'status': 'resync'
+            }), 409
+        except ValueError as e:
+            return jsonify({
+                'error': str(e),
+                'message': get_wizard().create_wizard_response('error_occurred')
+            }), 400
+        
+        # Keystrokes can be sent without asking for an analysis each time
+        if data.get('analyze') is False:
+            return jsonify({
+                'session_id': session.id,
+                'version': session.version,
+                'length': len(session),
+                'status': 'updated'
+            })
+        
+        version, analysis = session.analyze(get_wizard(), data.get('content_type', 'auto'))
+        related = get_brick_library().similar_bricks(session.head(RELATED_SAMPLE_CHARS), RELATED_BRICKS,
+                                                     wait=False)
+        return jsonify({
+            'session_id': session.id,
+            'version': version,
+            'length': len(session),
+            'analysis': _analysis_to_dict(analysis, related),
+            'wizard_comment': analysis.wizard_comment,
+            'status': 'analyzed'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+@app.route('/api/wizard/analyze/session/<session_id>', methods=['DELETE'])
+def close_analysis_session(session_id):
+    """End a live editing session"""
+    if not get_sessions().close(session_id):
+        return jsonify({'error': f'Unknown session: {session_id}', 'status': 'error'}), 404
+    return jsonify({'session_id': session_id, 'status': 'closed'})
+
 @app.route('/api/bricks/categories')
 def get_brick_categories():
-    """Get all brick categories and their bricks"""
+    """Get all brick categories and a page of their bricks (?limit=&offset= per category)"""
     try:
         workpath = request.args.get('workpath', 'coding')
-        categories = brick_library.get_bricks_for_workpath(workpath)
+        user_id = request.args.get('user') or None
+        limit = max(1, min(int(request.args.get('limit', CATEGORY_PAGE_SIZE)), MAX_CATEGORY_PAGE_SIZE))
+        offset = max(0, int(request.args.get('offset', 0)))
+        if user_id is not None and not valid_user_id(user_id):
+            return jsonify({
+                'error': 'Invalid user ID',
+                'status': 'error'
+            }), 400
+        
+        # With a user: the shared bricks plus their own, flagged if in their collection
+        if user_id is not None:
+            categories, saved = get_brick_library().get_user_bricks(user_id, workpath)
+        else:
+            categories, saved = get_brick_library().get_bricks_for_workpath(workpath), None
         
         # Convert to frontend format
         result = {}
+        totals = {}
         for category_key, bricks in categories.items():
+            totals[category_key] = len(bricks)
             result[category_key] = [
                 {
                     'id': brick.id,
@@ -92,14 +363,25 @@ def get_brick_categories():
                     'color': brick.category.color,
                     'is_custom': brick.is_custom
                 }
-                for brick in bricks
+                for brick in bricks[offset:offset + limit]
             ]
+            if saved is not None:
+                for brick_dict in result[category_key]:
+                    brick_dict['in_collection'] = brick_dict['id'] in saved
         
         return jsonify({
             'categories': result,
+            'totals': totals,
+            'limit': limit,
+            'offset': offset,
             'status': 'success'
         })
         
+    except ValueError:
+        return jsonify({
+            'error': 'limit and offset must be integers',
+            'status': 'error'
+        }), 400
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -117,12 +399,20 @@ def create_custom_brick():
         description = data.get('description', '').strip()
         modifier_text = data.get('modifier_text', '').strip()
         workpaths = data.get('workpaths', ['coding'])
+        force = bool(data.get('force', False))
+        user_id = data.get('user') or None
         
         # Validate input
         if not all([name, category_key, description, modifier_text]):
             return jsonify({
                 'error': 'All fields are required',
-                'message': wizard.create_wizard_response('help_needed')
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        
+        if user_id is not None and not valid_user_id(user_id):
+            return jsonify({
+                'error': 'Invalid user ID',
+                'message': get_wizard().create_wizard_response('error_occurred')
             }), 400
         
         # Get category enum
@@ -131,26 +421,44 @@ def create_custom_brick():
         except StopIteration:
             return jsonify({
                 'error': f'Invalid category: {category_key}',
-                'message': wizard.create_wizard_response('error_occurred')
+                'message': get_wizard().create_wizard_response('error_occurred')
             }), 400
         
         # Validate brick
-        is_valid, validation_message = brick_library.validate_custom_brick(name, category, modifier_text)
+        is_valid, validation_message = get_brick_library().validate_custom_brick(name, category, modifier_text)
         if not is_valid:
             return jsonify({
                 'error': validation_message,
-                'message': wizard.create_wizard_response('error_occurred')
+                'message': get_wizard().create_wizard_response('error_occurred')
             }), 400
         
-        # Create the brick
-        brick = brick_library.create_custom_brick(
-            name=name,
-            category=category,
-            description=description,
-            modifier_text=modifier_text,
-            workpaths=workpaths,
-            creator='user'
-        )
+        # Create the brick, unless near-duplicates exist and the client didn't insist
+        if not force and not get_brick_library().duplicates_ready:
+            get_brick_library().build_duplicate_index(background=True)
+            return _index_building('duplicate')
+        try:
+            brick = get_brick_library().create_custom_brick(
+                name=name,
+                category=category,
+                description=description,
+                modifier_text=modifier_text,
+                workpaths=workpaths,
+                creator=user_id or 'user',
+                allow_duplicates=force,
+                owner=user_id
+            )
+        except DuplicateBrickError as e:
+            return jsonify({
+                'error': str(e),
+                'duplicates': [_brick_match(match, score) for match, score in e.matches],
+                'message': get_wizard().create_wizard_response('error_occurred'),
+                'status': 'duplicate'
+            }), 409
+        except CollectionFullError as e:
+            return jsonify({
+                'error': str(e),
+                'message': get_wizard().create_wizard_response('error_occurred')
+            }), 400
         
         return jsonify({
             'brick': {
@@ -160,16 +468,114 @@ def create_custom_brick():
                 'color': brick.category.color,
                 'is_custom': brick.is_custom
             },
-            'message': wizard.create_wizard_response('brick_created', brick_name=name),
+            'message': get_wizard().create_wizard_response('brick_created', brick_name=name),
             'status': 'created'
         })
         
     except Exception as e:
         return jsonify({
             'error': str(e),
-            'message': wizard.create_wizard_response('error_occurred')
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+def _resolve_bricks(selected_brick_ids, count_usage=False, user_id=None):
+    """Convert {category: brick_id} into {category: Brick}, skipping unknown IDs and other users' private bricks"""
+    selected_bricks = {}
+    brick_library = get_brick_library()
+    with span("resolve_bricks", requested=len(selected_brick_ids)):
+        for category, brick_id in selected_brick_ids.items():
+            brick = brick_library.get_brick(brick_id, user_id)
+            if brick:
+                selected_bricks[category] = brick
+                if count_usage:
+                    brick_library.increment_usage(brick.id, user_id)
+    return selected_bricks
+
+def _is_brick_selection(value, allow_drop=False):
+    """Whether value maps category names to brick IDs (or to null when allow_drop)"""
+    return isinstance(value, dict) and all(
+        isinstance(brick_id, str) or (allow_drop and brick_id is None)
+        for brick_id in value.values()
+    )
+
+def _shared_selection(selected_bricks):
+    """The selected bricks the recommender may learn from (no private bricks)"""
+    brick_library = get_brick_library()
+    return [brick for brick in selected_bricks.values() if not brick_library.is_private(brick.id)]
+
+def get_job_manager() -> JobManager:
+    """The shared background job runner, started on first use"""
+    return _component('jobs', lambda: JobManager(
+        JobStore(os.getenv('BRICKZ_JOB_DB', DEFAULT_DB_PATH)),
+        lambda selected_brick_ids, user_id: _resolve_bricks(selected_brick_ids, count_usage=True,
+                                                            user_id=user_id)
+    ).start())
+
+@app.route('/api/bricks/duplicates', methods=['POST'])
+def find_duplicate_bricks():
+    """Existing bricks that a proposed brick would nearly duplicate"""
+    try:
+        data = request.get_json() or {}
+        description = data.get('description', '').strip()
+        modifier_text = data.get('modifier_text', '').strip()
+        
+        if not (description or modifier_text):
+            return jsonify({
+                'error': 'Description or modifier text required',
+                'status': 'error'
+            }), 400
+        
+        brick_library = get_brick_library()
+        if not brick_library.duplicates_ready:
+            brick_library.build_duplicate_index(background=True)
+            return _index_building('duplicate')
+        
+        matches = brick_library.find_duplicates(description, modifier_text)
+        
+        return jsonify({
+            'duplicates': [_brick_match(brick, score) for brick, score in matches],
+            'status': 'success'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
         }), 500
 
+def _parse_token_budget(value):
+    """A request's token_budget as a positive int, or None when unset; ValueError otherwise"""
+    if value is None or value == '' or value == 0:
+        return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    try:
+        budget = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(value)
+    if budget < 0:
+        raise ValueError(value)
+    return budget or None
+
+def _invalid_token_budget(value):
+    return jsonify({
+        'error': f'Invalid token_budget: {value!r} (expected a positive integer)',
+        'message': get_wizard().create_wizard_response('error_occurred')
+    }), 400
+
+def _run_optimization(content, workpath, selected_bricks, user_context, token_budget, tier) -> str:
+    """Run two-pass optimization on a fresh event loop"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    try:
+        return loop.run_until_complete(
+            optimize_content(content, workpath, selected_bricks, user_context,
+                             token_budget=token_budget, tier=tier)
+        )
+    finally:
+        loop.close()
+
 @app.route('/api/optimize', methods=['POST'])
 def optimize_prompt():
     """Optimize a prompt using selected bricks (two-pass optimization)"""
@@ -180,36 +586,157 @@ def optimize_prompt():
         workpath = data.get('workpath', 'coding')
         selected_brick_ids = data.get('selected_bricks', {})
         user_context = data.get('user_context', '')
+        token_budget = data.get('token_budget')
+        tier_name = data.get('tier')
+        user_id = data.get('user') or None
         
         if not content:
             return jsonify({
                 'error': 'No content provided',
-                'message': wizard.create_wizard_response('help_needed')
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        
+        try:
+            tier = OptimizationTier(tier_name) if tier_name else None
+        except ValueError:
+            return jsonify({
+                'error': f'Invalid tier: {tier_name}',
+                'message': get_wizard().create_wizard_response('error_occurred')
             }), 400
+        if not _is_brick_selection(selected_brick_ids):
+            return jsonify({
+                'error': 'selected_bricks must map categories to brick IDs',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        try:
+            token_budget = _parse_token_budget(token_budget)
+        except ValueError:
+            return _invalid_token_budget(token_budget)
         
         # Convert brick IDs to brick objects
-        selected_bricks = {}
-        for category, brick_id in selected_brick_ids.items():
-            brick = brick_library.get_brick(brick_id)
-            if brick:
-                selected_bricks[category] = brick
-                # Increment usage count
-                brick_library.increment_usage(brick_id)
+        selected_bricks = _resolve_bricks(selected_brick_ids, count_usage=True, user_id=user_id)
+        
+        # Learn from the selection (content type from the wizard's analysis when the client sends it)
+        content_type = data.get('content_type')
+        if content_type not in DEFAULT_SUGGESTIONS:
+            content_type = get_wizard().detect_content_type(content[:RECOMMENDER_SAMPLE_CHARS])
+        get_recommender().record(content_type, _shared_selection(selected_bricks))
         
         # Run two-pass optimization
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        optimized_result = _run_optimization(content, workpath, selected_bricks, user_context,
+                                             token_budget, tier)
+        
+        with span("serialize"):
+            return jsonify({
+                'optimized_prompt': optimized_result,
+                'message': get_wizard().create_wizard_response('optimization_complete'),
+                'optimization_info': get_optimization_info(),
+                'status': 'optimized'
+            })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+@app.route('/api/pipeline', methods=['POST'])
+def run_pipeline():
+    """Analyze, pick the suggested bricks and optimize in one request"""
+    try:
+        data = request.get_json() or {}
+        
+        content = data.get('content', '').strip()
+        content_type = data.get('content_type', 'auto')
+        workpath = data.get('workpath', 'coding')
+        overrides = data.get('overrides') or {}
+        user_context = data.get('user_context', '')
+        token_budget = data.get('token_budget')
+        tier_name = data.get('tier')
+        user_id = data.get('user') or None
+        
+        if not content:
+            return jsonify({
+                'error': 'No content provided',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        if not _is_brick_selection(overrides, allow_drop=True):
+            return jsonify({
+                'error': 'overrides must map categories to brick IDs (or null to drop one)',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
         
         try:
-            optimized_result = loop.run_until_complete(
-                optimize_content(content, workpath, selected_bricks, user_context)
-            )
-        finally:
-            loop.close()
+            tier = OptimizationTier(tier_name) if tier_name else None
+        except ValueError:
+            return jsonify({
+                'error': f'Invalid tier: {tier_name}',
+                'message': get_wizard().create_wizard_response('error_occurred')
+            }), 400
+        try:
+            token_budget = _parse_token_budget(token_budget)
+        except ValueError:
+            return _invalid_token_budget(token_budget)
+        
+        timings = {}
+        started = stage_start = time.perf_counter()
+        
+        def finish_stage(name):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[name] = round((now - stage_start) * 1000, 2)
+            stage_start = now
+        
+        # 1. Analyze (in the offload pool when the content is large)
+        with span("pipeline.analyze"):
+            analysis = offload_pool.analyze(get_wizard(), content, content_type)
+            suggestions = get_recommender().rerank(analysis.content_type, analysis.suggested_bricks)
+        finish_stage('analyze')
+        
+        # 2. Resolve the suggestions to library bricks; overrides replace or drop a category
+        with span("pipeline.resolve"):
+            selected_brick_ids = {s['category']: s.get('id') or s['brick'] for s in suggestions}
+            for category, brick_id in overrides.items():
+                if brick_id:
+                    selected_brick_ids[category] = brick_id
+                else:
+                    selected_brick_ids.pop(category, None)
+            selected_bricks = _resolve_bricks(selected_brick_ids, count_usage=True, user_id=user_id)
+            unresolved = sorted(set(selected_brick_ids) - set(selected_bricks))
+            # Only a client's own picks teach the recommender, not the wizard's defaults
+            picked = {category: selected_bricks[category] for category, brick_id in overrides.items()
+                      if brick_id and category in selected_bricks}
+            if picked:
+                get_recommender().record(analysis.content_type, _shared_selection(picked))
+        finish_stage('resolve')
+        
+        # 3. Two-pass optimization
+        optimized_result = _run_optimization(content, workpath, selected_bricks, user_context,
+                                             token_budget, tier)
+        finish_stage('optimize')
+        timings['total'] = round((stage_start - started) * 1000, 2)
         
         return jsonify({
             'optimized_prompt': optimized_result,
-            'message': wizard.create_wizard_response('optimization_complete'),
+            'analysis': {
+                'content_type': analysis.content_type,
+                'suggested_template': analysis.suggested_template,
+                'confidence': analysis.confidence,
+                'suggested_bricks': suggestions,
+                'reasoning': analysis.reasoning
+            },
+            'selected_bricks': {
+                category: {
+                    'id': brick.id,
+                    'name': brick.name,
+                    'color': brick.category.color,
+                    'is_custom': brick.is_custom
+                }
+                for category, brick in selected_bricks.items()
+            },
+            'unresolved': unresolved,
+            'timings_ms': timings,
+            'message': get_wizard().create_wizard_response('optimization_complete'),
             'optimization_info': get_optimization_info(),
             'status': 'optimized'
         })
@@ -217,7 +744,176 @@ def optimize_prompt():
     except Exception as e:
         return jsonify({
             'error': str(e),
-            'message': wizard.create_wizard_response('error_occurred')
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+@app.route('/api/optimize/jobs', methods=['POST'])
+def submit_optimize_job():
+    """Queue a two-pass optimization and return its job ID at once"""
+    try:
+        data = request.get_json()
+        
+        content = data.get('content', '').strip()
+        selected_brick_ids = data.get('selected_bricks', {})
+        tier_name = data.get('tier')
+        token_budget = data.get('token_budget')
+        user_id = data.get('user') or None
+        
+        if not content:
+            return jsonify({
+                'error': 'No content provided',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        if not _is_brick_selection(selected_brick_ids):
+            return jsonify({
+                'error': 'selected_bricks must map categories to brick IDs',
+                'message': get_wizard().create_wizard_response('help_needed')
+            }), 400
+        
+        try:
+            if tier_name:
+                OptimizationTier(tier_name)
+        except ValueError:
+            return jsonify({
+                'error': f'Invalid tier: {tier_name}',
+                'message': get_wizard().create_wizard_response('error_occurred')
+            }), 400
+        try:
+            token_budget = _parse_token_budget(token_budget)
+        except ValueError:
+            return _invalid_token_budget(token_budget)
+        
+        try:
+            job = get_job_manager().submit({
+                'content': content,
+                'workpath': data.get('workpath', 'coding'),
+                'selected_bricks': selected_brick_ids,
+                'user_context': data.get('user_context', ''),
+                'user': user_id,
+                'token_budget': token_budget,
+                'tier': tier_name
+            })
+        except QueueFullError as e:
+            response = jsonify({
+                'error': str(e),
+                'message': get_wizard().create_wizard_response('error_occurred'),
+                'status': 'busy'
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
+        response = jsonify({
+            'job': job.to_dict(),
+            'status': 'queued'
+        })
+        response.headers['Location'] = f'/api/optimize/jobs/{job.id}'
+        return response, 202
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'message': get_wizard().create_wizard_response('error_occurred')
+        }), 500
+
+@app.route('/api/optimize/jobs/<job_id>')
+def get_optimize_job(job_id):
+    """Fetch a job; ?wait=N long-polls up to N seconds for it to finish"""
+    try:
+        wait = float(request.args.get('wait', 0) or 0)
+        job = get_job_manager().wait(job_id, wait) if wait > 0 else get_job_manager().get(job_id)
+        
+        if job is None:
+            return jsonify({
+                'error': 'Job not found or expired',
+                'status': 'error'
+            }), 404
+        
+        return jsonify({
+            'job': job.to_dict(),
+            'status': job.status
+        })
+        
+    except ValueError:
+        return jsonify({
+            'error': 'wait must be a number of seconds',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+def _collection_response(user_id, workpath=None, **extra):
+    categories = get_brick_library().get_collection(user_id, workpath)
+    return jsonify(dict({
+        'user': user_id,
+        'collection': {
+            category_key: [
+                {
+                    'id': brick.id,
+                    'name': brick.name,
+                    'description': brick.description,
+                    'color': brick.category.color,
+                    'is_custom': brick.is_custom
+                }
+                for brick in bricks
+            ]
+            for category_key, bricks in categories.items()
+        },
+        'count': sum(len(bricks) for bricks in categories.values()),
+        'status': 'success'
+    }, **extra))
+
+@app.route('/api/users/<user_id>/collection')
+def get_user_collection(user_id):
+    """A user's personal collection: bricks they saved or created, by category"""
+    if not valid_user_id(user_id):
+        return jsonify({'error': 'Invalid user ID', 'status': 'error'}), 400
+    try:
+        return _collection_response(user_id, request.args.get('workpath') or None)
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+@app.route('/api/users/<user_id>/collection', methods=['POST'])
+def save_to_user_collection(user_id):
+    """Save a brick to a user's collection ({"brick_id": ...})"""
+    if not valid_user_id(user_id):
+        return jsonify({'error': 'Invalid user ID', 'status': 'error'}), 400
+    try:
+        data = request.get_json(silent=True) or {}
+        brick_id = str(data.get('brick_id', '')).strip()
+        if not brick_id:
+            return jsonify({'error': 'brick_id is required', 'status': 'error'}), 400
+        try:
+            brick = get_brick_library().save_to_collection(user_id, brick_id)
+        except CollectionFullError as e:
+            return jsonify({'error': str(e), 'status': 'error'}), 400
+        if brick is None:
+            return jsonify({'error': f'Unknown brick: {brick_id}', 'status': 'error'}), 404
+        return _collection_response(user_id, saved=brick.id)
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+@app.route('/api/users/<user_id>/collection/<brick_id>', methods=['DELETE'])
+def remove_from_user_collection(user_id, brick_id):
+    """Drop a brick from a user's collection"""
+    if not valid_user_id(user_id):
+        return jsonify({'error': 'Invalid user ID', 'status': 'error'}), 400
+    try:
+        if not get_brick_library().remove_from_collection(user_id, brick_id):
+            return jsonify({'error': f'{brick_id} is not in the collection', 'status': 'error'}), 404
+        return _collection_response(user_id, removed=brick_id)
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
         }), 500
 
 @app.route('/api/mad-libs/<category>')
@@ -225,7 +921,7 @@ def get_mad_libs_prompts(category):
     """Get Mad Libs style prompts for custom brick creation"""
     try:
         category_enum = next(cat for cat in BrickCategory if cat.key == category)
-        prompts = brick_library.get_mad_libs_prompts(category_enum)
+        prompts = get_brick_library().get_mad_libs_prompts(category_enum)
         
         return jsonify({
             'prompts': prompts,
@@ -250,6 +946,7 @@ def search_bricks():
     try:
         query = request.args.get('q', '')
         workpath = request.args.get('workpath', None)
+        limit = max(1, min(int(request.args.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT))
         
         if not query:
             return jsonify({
@@ -257,7 +954,7 @@ def search_bricks():
                 'status': 'success'
             })
         
-        results = brick_library.search_bricks(query, workpath)
+        results = get_brick_library().search_bricks(query, workpath, request.args.get('user') or None, limit)
         
         brick_results = [
             {
@@ -277,6 +974,97 @@ def search_bricks():
             'status': 'success'
         })
         
+    except ValueError:
+        return jsonify({
+            'error': 'limit must be an integer',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+@app.route('/api/bricks/similar')
+def similar_bricks():
+    """Bricks closest in meaning to a free-text query ("harden my API")"""
+    try:
+        query = request.args.get('q', '')
+        workpath = request.args.get('workpath', None)
+        k = max(1, min(int(request.args.get('k', 10)), 100))
+        
+        if not query.strip():
+            return jsonify({
+                'results': [],
+                'status': 'success'
+            })
+        
+        brick_library = get_brick_library()
+        if not brick_library.semantic_ready:
+            brick_library.build_semantic_index(background=True)
+            return _index_building('similarity')
+        
+        matches = brick_library.similar_bricks(query, k, workpath)
+        
+        return jsonify({
+            'results': [_brick_match(brick, score) for brick, score in matches],
+            'query': query,
+            'status': 'success'
+        })
+        
+    except ValueError:
+        return jsonify({
+            'error': 'k must be an integer',
+            'status': 'error'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 500
+
+@app.route('/api/bricks/recommended')
+def get_recommended_bricks():
+    """Top bricks for a content type, learned from what users pick together"""
+    try:
+        content_type = request.args.get('content_type', 'request')
+        selected = [brick_id for brick_id in request.args.get('selected', '').split(',') if brick_id]
+        k = max(1, min(int(request.args.get('k', 6)), 50))
+        
+        if content_type not in DEFAULT_SUGGESTIONS:
+            return jsonify({
+                'error': f'Unknown content type: {content_type}',
+                'status': 'error'
+            }), 400
+        
+        brick_library = get_brick_library()
+        results = []
+        for item in get_recommender().suggest(content_type, selected, k):
+            if brick_library.get_brick(item.id) is not None:  # skip deleted custom bricks
+                results.append({'id': item.id, 'name': item.name, 'category': item.category,
+                                'score': round(item.score, 4)})
+        
+        # Until enough has been learned, fill up with the wizard's defaults
+        chosen = {result['id'] for result in results}.union(selected)
+        for brick_id, _ in DEFAULT_SUGGESTIONS[content_type]:
+            if len(results) >= k:
+                break
+            brick = brick_library.get_brick(brick_id)
+            if brick is not None and brick_id not in chosen:
+                results.append({'id': brick.id, 'name': brick.name, 'category': brick.category.key,
+                                'score': 0.0})
+        
+        return jsonify({
+            'recommendations': results,
+            'content_type': content_type,
+            'status': 'success'
+        })
+        
+    except ValueError:
+        return jsonify({
+            'error': 'k must be an integer',
+            'status': 'error'
+        }), 400
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -287,12 +1075,13 @@ def search_bricks():
 def get_stats():
     """Get application statistics"""
     try:
+        brick_library = get_brick_library()
         popular_bricks = brick_library.get_popular_bricks(5)
         
         return jsonify({
             'stats': {
                 'total_bricks': len(brick_library.bricks),
-                'custom_bricks': len([b for b in brick_library.bricks.values() if b.is_custom]),
+                'custom_bricks': len(brick_library.get_custom_bricks()),
                 'popular_bricks': [
                     {
                         'name': brick.name,
@@ -303,6 +1092,20 @@ def get_stats():
                 ]
             },
             'optimization_info': get_optimization_info(),
+            'optimization_stats': optimizer.get_optimization_stats(),
+            'recommender': get_recommender().status(),
+            'admission': admission.controller.status(),
+            'collections': brick_library.user_collections.status(),
+            'sessions': get_sessions().status(),
+            'requests': {
+                'endpoints': metrics.summary('brickz_http_request_duration_seconds', 'endpoint'),
+                'in_flight': metrics.value('brickz_http_requests_in_flight'),
+                'provider_in_flight': metrics.totals('brickz_provider_calls_in_flight', 'provider'),
+                'queue_depth': metrics.totals('brickz_queue_depth', 'queue'),
+                'cache_hit_rates': cache_hit_rates(),
+                'offload': dict(offload_pool.status(),
+                                tasks=metrics.totals('brickz_offload_tasks_total', 'mode'))
+            },
             'status': 'success'
         })
         
@@ -312,12 +1115,81 @@ def get_stats():
             'status': 'error'
         }), 500
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text-format metrics"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+def _admin_denied():
+    """Error response unless the request carries the admin token (None when allowed)"""
+    expected = os.getenv('BRICKZ_ADMIN_TOKEN', '')
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not expected:
+        return jsonify({'error': 'Admin endpoints are disabled', 'status': 'error'}), 403
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        return jsonify({'error': 'Invalid admin token', 'status': 'error'}), 403
+    return None
+
+@app.route('/api/admin/profile', methods=['POST'])
+def start_profile():
+    """Start a sampling-profiler capture (admin only)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        data = request.get_json(silent=True) or {}
+        seconds = float(data.get('seconds', 10))
+        interval = float(data.get('interval', DEFAULT_INTERVAL))
+        
+        if not profiler.start(seconds, interval):
+            return jsonify({
+                'error': 'A profile capture is already running',
+                'profile': profiler.status(),
+                'status': 'error'
+            }), 409
+        
+        return jsonify({
+            'profile': profiler.status(),
+            'status': 'started'
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'error'
+        }), 400
+
+@app.route('/api/admin/profile', methods=['GET'])
+def get_profile():
+    """Collapsed stacks of the current or last capture (admin only)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'profile': profiler.status(),
+            'status': 'running' if profiler.running else 'success'
+        })
+    return Response(profiler.collapsed(), content_type='text/plain; charset=utf-8')
+
+@app.route('/api/admin/profile', methods=['DELETE'])
+def stop_profile():
+    """Stop the running capture early (admin only)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    profiler.stop()
+    return jsonify({
+        'profile': profiler.status(),
+        'status': 'stopped'
+    })
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
     return jsonify({
         'error': 'Endpoint not found',
-        'message': wizard.create_wizard_response('help_needed')
+        'message': get_wizard().create_wizard_response('help_needed')
     }), 404
 
 @app.errorhandler(500)
@@ -325,13 +1197,16 @@ def internal_error(error):
     """Handle 500 errors"""
     return jsonify({
         'error': 'Internal server error',
-        'message': wizard.create_wizard_response('error_occurred')
+        'message': get_wizard().create_wizard_response('error_occurred')
     }), 500
 
 if __name__ == '__main__':
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
+    # Load the brick library now so its search index builds before the first request
+    get_brick_library()
+    
     # Run the app
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     port = int(os.getenv('PORT', 5001))  # Changed to 5001 to avoid conflicts
@@ -0,0 +1,6 @@
+"""
+Prompt Brickz microbenchmarks
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json --output after.json
+"""
@@ -0,0 +1,45 @@
+"""
+Command-line runner
+
+    python -m benchmarks [--filter NAME] [--repeat N] [--min-time S]
+                         [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+from typing import List, Optional
+
+from . import bench_bricks, bench_builder, bench_catalog, bench_optimizer, bench_recommender, bench_wizard  # noqa: F401 (registers cases)
+from .harness import (DEFAULT_MIN_TIME, DEFAULT_REPEAT, compare, format_time, load_results,
+                      run_benchmarks, save_results)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the suite, print a table and optionally save/compare JSON results"""
+    parser = argparse.ArgumentParser(description="Run the Prompt Brickz microbenchmarks")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="Minimum seconds per timed repeat")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    def report(result):
+        print(f"{result.key:<70} median {format_time(result.median):>10}  "
+              f"min {format_time(result.min):>10}  ({result.loops} loops x {result.repeat})")
+
+    results = run_benchmarks(args.filter, args.repeat, args.min_time, report)
+    if args.output:
+        save_results(args.output, results)
+        print(f"\nSaved {len(results)} results to {args.output}")
+
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        for row in compare(load_results(args.compare), results):
+            print(f"{row['benchmark']:<70} {format_time(row['before']):>10} -> "
+                  f"{format_time(row['after']):>10}  x{row['ratio']:.2f} {row['verdict']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
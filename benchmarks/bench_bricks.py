@@ -0,0 +1,63 @@
+"""Brick catalog lookup benchmarks"""
+
+from .fixtures import CATALOG_SIZES, brick_library
+from .harness import benchmark
+
+
+@benchmark("bricks.get_bricks_for_workpath", catalog=CATALOG_SIZES)
+def get_bricks_for_workpath(catalog):
+    library = brick_library(catalog)
+    return lambda: library.get_bricks_for_workpath("coding")
+
+
+@benchmark("bricks.search_bricks", catalog=CATALOG_SIZES, query=["optim", "zzz-no-match"])
+def search_bricks(catalog, query):
+    library = brick_library(catalog)
+    return lambda: library.search_bricks(query, "coding")
+
+
+@benchmark("bricks.get_brick", catalog=CATALOG_SIZES)
+def get_brick(catalog):
+    library = brick_library(catalog)
+    return lambda: library.get_brick("gol_optimize")
+
+
+@benchmark("bricks.similar_bricks", catalog=CATALOG_SIZES, query=["harden my API", "explain it step by step"])
+def similar_bricks(catalog, query):
+    library = brick_library(catalog)
+    library.similar_bricks(query)  # builds the index outside the timing
+    return lambda: library.similar_bricks(query, 10, "coding")
+
+
+@benchmark("bricks.similar_bricks_many", catalog=[1000, 10000], queries=[16, 64])
+def similar_bricks_many(catalog, queries):
+    library = brick_library(catalog)
+    batch = [f"{word} api security step {index}" for index, word in
+             zip(range(queries), ["harden", "speed", "explain", "document"] * queries)]
+    library.similar_bricks_many(batch[:1])
+    return lambda: library.similar_bricks_many(batch, 10)
+
+
+@benchmark("bricks.find_duplicates", catalog=CATALOG_SIZES)
+def find_duplicates(catalog):
+    library = brick_library(catalog)
+    library.find_duplicates("warm up", "builds the index outside the timing")
+    return lambda: library.find_duplicates("Speed gains", "to optimise performance and improve speed")
+
+
+@benchmark("bricks.get_user_bricks", users=[1000, 100000])
+def get_user_bricks(users):
+    library = brick_library(CATALOG_SIZES[0])
+    ids = [entry.id for entry in library.catalog.entries[:64]]
+    for user in range(users):
+        for offset in range(8):
+            library.user_collections.add(f"user{user}", ids[(user + offset * 7) % len(ids)])
+    hot = [f"user{user}" for user in range(0, users, max(users // 256, 1))]
+    for user_id in hot:
+        library.get_user_bricks(user_id, "coding")
+    state = {"next": 0}
+
+    def run():
+        state["next"] = (state["next"] + 1) % len(hot)
+        return library.get_user_bricks(hot[state["next"]], "coding")
+    return run
@@ -0,0 +1,34 @@
+"""Mad-Libs builder benchmarks"""
+
+import contextlib
+import io
+
+from prompt_bricks.brickz_builder import BrickzBuilder, BuildSpec
+
+from .fixtures import content
+from .harness import benchmark
+
+
+@benchmark("builder.build_prompt", size=["small", "medium"], bricks=[0, 4])
+def build_prompt(size, bricks):
+    builder = BrickzBuilder()
+    with contextlib.redirect_stdout(io.StringIO()):
+        builder.select_workpath("coding")
+    if bricks:
+        builder.selected_bricks = {
+            "styles": builder.brick_library.get_brick("defensive"),
+            "goals": builder.brick_library.get_brick("optimize_performance"),
+            "scopes": builder.brick_library.get_brick("system"),
+            "reviews": builder.brick_library.get_brick("security_expert"),
+        }
+    builder.content = content("code", size)
+    return builder.build_prompt
+
+
+@benchmark("builder.build_spec", size=["small", "medium"], bricks=[0, 4])
+def build_spec(size, bricks):
+    builder = BrickzBuilder(history_size=0)
+    selection = {"styles": "defensive", "goals": "optimize_performance",
+                 "scopes": "system", "reviews": "security_expert"} if bricks else {}
+    spec = BuildSpec("coding", content("code", size), selection)
+    return lambda: builder.build(spec)
@@ -0,0 +1,39 @@
+"""Compiled (memory-mapped) catalog benchmarks"""
+
+import atexit
+import os
+import tempfile
+from functools import lru_cache
+
+from prompt_bricks.core.catalog import SYSTEM_BRICKS, CatalogEntry
+from prompt_bricks.core.compiled import MappedCatalog, compile_catalog
+
+from .harness import benchmark
+
+_WORKDIR = tempfile.TemporaryDirectory(prefix="brickz-bench-")
+atexit.register(_WORKDIR.cleanup)
+
+
+@lru_cache(maxsize=None)
+def compiled_catalog(total: int) -> str:
+    """Path of a compiled catalog: the system bricks padded to `total` entries"""
+    padding = (
+        CatalogEntry(f"cst_{index}", f"custom_{index}", "styles", f"Custom brick {index}", "#4ECDC4",
+                     f"with custom modifier number {index}", ("coding",))
+        for index in range(max(total - len(SYSTEM_BRICKS), 0))
+    )
+    path = os.path.join(_WORKDIR.name, f"catalog-{total}.bin")
+    compile_catalog(list(SYSTEM_BRICKS) + list(padding), path)
+    return path
+
+
+@benchmark("catalog.open_mapped", entries=[1000, 100000])
+def open_mapped(entries):
+    path = compiled_catalog(entries)
+    return lambda: MappedCatalog(path).close()
+
+
+@benchmark("catalog.get_mapped", entries=[1000, 100000], key=["gol_optimize", "custom_500"])
+def get_mapped(entries, key):
+    catalog = MappedCatalog(compiled_catalog(entries))
+    return lambda: catalog.get(key)
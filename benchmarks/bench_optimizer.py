@@ -0,0 +1,43 @@
+"""Optimizer prompt building and end-to-end benchmarks"""
+
+import asyncio
+
+from brickz.optimizer import AIProvider, OptimizationTier, TwoPassOptimizer
+from brickz.providers import StubProvider
+
+from .fixtures import brick_library, content, selected_bricks
+from .harness import benchmark
+
+
+def _stub_optimizer() -> TwoPassOptimizer:
+    """Optimizer whose provider answers instantly, so only local work is timed"""
+    return TwoPassOptimizer(provider=AIProvider.STUB, client=StubProvider(latency=0.0))
+
+
+@benchmark("optimizer.build_pass1_prompt", size=["small", "medium"])
+def build_pass1_prompt(size):
+    optimizer = _stub_optimizer()
+    bricks = selected_bricks(brick_library(11))
+    text = content("code", size)
+    return lambda: optimizer._build_pass1_prompt(text, "coding", bricks, "keep the public API")
+
+
+@benchmark("optimizer.build_pse_prompt", size=["small", "medium"])
+def build_pse_prompt(size):
+    optimizer = _stub_optimizer()
+    bricks = selected_bricks(brick_library(11))
+    text = content("code", size)
+    return lambda: optimizer._build_pse_prompt(text, "coding", bricks)
+
+
+@benchmark("optimizer.optimize_content", tier=[tier.value for tier in OptimizationTier], size=["small", "medium"])
+def optimize_content(tier, size):
+    optimizer = _stub_optimizer()
+    bricks = selected_bricks(brick_library(11))
+    text = content("code", size)
+    loop = asyncio.new_event_loop()
+    selected_tier = OptimizationTier(tier)
+
+    def run():
+        return loop.run_until_complete(optimizer.optimize_prompt(text, "coding", bricks, tier=selected_tier))
+    return run
@@ -0,0 +1,34 @@
+"""Brick recommender benchmarks"""
+
+import random
+
+from brickz.bricks import BrickLibrary
+from brickz.recommender import BrickRecommender
+
+from .harness import benchmark
+
+CONTENT_TYPES = ["code", "workflow", "data", "document", "conversational", "image", "request"]
+
+
+def trained_recommender(selections: int, seed: int = 7) -> BrickRecommender:
+    """A recommender that has learned from random four-brick selections"""
+    rng = random.Random(seed)
+    bricks = list(BrickLibrary().bricks.values())
+    recommender = BrickRecommender()
+    for _ in range(selections):
+        recommender.record(rng.choice(CONTENT_TYPES), rng.sample(bricks, 4))
+    return recommender
+
+
+@benchmark("recommender.suggest", selected=[0, 2])
+def suggest(selected):
+    recommender = trained_recommender(10000)
+    chosen = ["sty_defensive", "gol_optimize"][:selected]
+    return lambda: recommender.suggest("code", chosen, 6)
+
+
+@benchmark("recommender.record")
+def record():
+    recommender = trained_recommender(1000)
+    bricks = [BrickLibrary().get_brick(brick_id) for brick_id in ("sty_pythonic", "gol_fix_bugs", "sco_function")]
+    return lambda: recommender.record("code", bricks)
@@ -0,0 +1,40 @@
+"""Wizard content analysis benchmarks"""
+
+from brickz.sessions import MAX_DOCUMENT_CHARS, AnalysisSession
+from brickz.wizard import BrickzWizard
+
+from .fixtures import CONTENT_SIZES, content
+from .harness import benchmark
+
+
+@benchmark("wizard.detect_content_type", kind=["prose", "code"], size=list(CONTENT_SIZES))
+def detect_content_type(kind, size):
+    wizard = BrickzWizard()
+    text = content(kind, size)
+    return lambda: wizard._detect_content_type(text)
+
+
+@benchmark("wizard.analyze_content", kind=["prose", "code"], size=["small", "medium"])
+def analyze_content(kind, size):
+    wizard = BrickzWizard()
+    text = content(kind, size)
+    return lambda: wizard.analyze_content(text)
+
+
+@benchmark("wizard.session_keystroke", kind=["prose", "code"], size=["medium", "large"])
+def session_keystroke(kind, size):
+    wizard = BrickzWizard()
+    text = content(kind, size)[:MAX_DOCUMENT_CHARS // 2]
+    session = AnalysisSession("bench", text)
+    session.analyze(wizard)
+    middle = len(text) // 2
+    state = {"typed": False}
+
+    def keystroke():
+        # Type a character, then delete it again, re-analyzing after each
+        edit = ({"start": middle, "end": middle + 1, "text": ""} if state["typed"]
+                else {"start": middle, "end": middle, "text": "x"})
+        state["typed"] = not state["typed"]
+        session.apply([edit])
+        return session.analyze(wizard)
+    return keystroke
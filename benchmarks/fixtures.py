@@ -0,0 +1,81 @@
+"""
+Deterministic benchmark inputs
+
+Everything is generated from fixed seeds so two runs (on two commits)
+time exactly the same work.
+"""
+
+import random
+from typing import Dict
+
+from brickz.bricks import BrickCategory, BrickLibrary
+
+# Target sizes in bytes for content inputs
+CONTENT_SIZES = {"small": 200, "medium": 20 * 1024, "large": 4 * 1024 * 1024}
+
+# Total catalog sizes for brick library benchmarks (system bricks included)
+CATALOG_SIZES = [40, 100, 1000, 10000]
+
+_PROSE_WORDS = (
+    "the team wants a clearer summary of last quarter with better wording for customers "
+    "please make it friendlier and shorter while keeping every important point intact"
+).split()
+
+_CODE_LINES = [
+    "def process(items):",
+    "    results = []",
+    "    for item in items:",
+    "        if item.ready:",
+    "            results.append(item.value * 2)",
+    "    return results",
+    "",
+]
+
+
+def prose(size: str, seed: int = 1) -> str:
+    """Plain text with no code, workflow or data keywords (the slowest detection path)"""
+    rng = random.Random(seed)
+    target = CONTENT_SIZES[size]
+    words = []
+    length = 0
+    while length < target:
+        word = rng.choice(_PROSE_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:target]
+
+
+def code(size: str) -> str:
+    """Python source repeated to the target size"""
+    block = "\n".join(_CODE_LINES) + "\n"
+    return (block * (CONTENT_SIZES[size] // len(block) + 1))[:CONTENT_SIZES[size]]
+
+
+def content(kind: str, size: str) -> str:
+    return code(size) if kind == "code" else prose(size)
+
+
+def brick_library(total: int, seed: int = 7) -> BrickLibrary:
+    """A BrickLibrary padded with custom bricks up to `total` bricks"""
+    rng = random.Random(seed)
+    library = BrickLibrary()
+    categories = list(BrickCategory)
+    workpaths = ["coding", "conversational", "exploratory"]
+    for index in range(max(total - len(library.bricks), 0)):
+        library.create_custom_brick(
+            name=f"custom {index} {rng.choice(_PROSE_WORDS)}",
+            category=rng.choice(categories),
+            description=" ".join(rng.choices(_PROSE_WORDS, k=8)),
+            modifier_text=" ".join(rng.choices(_PROSE_WORDS, k=12)),
+            workpaths=rng.sample(workpaths, rng.randint(1, 3)),
+        )
+    return library
+
+
+def selected_bricks(library: BrickLibrary) -> Dict:
+    """A typical coding selection: one style, goal and persona"""
+    return {
+        "styles": library.get_brick("sty_pythonic"),
+        "goals": library.get_brick("gol_optimize"),
+        "personas": library.get_brick("per_senior"),
+    }
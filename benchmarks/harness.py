@@ -0,0 +1,185 @@
+"""
+Benchmark harness - asv-style registry, timing loop and JSON results
+
+A benchmark is a setup function that takes its parameters and returns
+the zero-argument callable to time, so fixtures (multi-MB inputs,
+large catalogs) are built once per parameter set and never timed:
+
+    @benchmark("wizard.detect_content_type", size=["small", "medium"])
+    def detect(size):
+        wizard, content = BrickzWizard(), INPUTS[size]
+        return lambda: wizard._detect_content_type(content)
+"""
+
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Each timed repeat runs enough loops to take at least this long
+DEFAULT_MIN_TIME = 0.05
+DEFAULT_REPEAT = 5
+
+
+@dataclass
+class BenchmarkCase:
+    """A registered benchmark and its parameter grid"""
+    name: str
+    setup: Callable[..., Callable[[], Any]]
+    params: Dict[str, List[Any]] = field(default_factory=dict)
+
+    def parameter_sets(self) -> List[Dict[str, Any]]:
+        """Every combination of parameter values"""
+        if not self.params:
+            return [{}]
+        keys = list(self.params)
+        return [dict(zip(keys, values)) for values in itertools.product(*(self.params[key] for key in keys))]
+
+
+@dataclass
+class BenchmarkResult:
+    """Per-call timings of one benchmark at one parameter set (seconds)"""
+    name: str
+    params: Dict[str, Any]
+    min: float
+    median: float
+    mean: float
+    stdev: float
+    loops: int
+    repeat: int
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to match results across runs"""
+        suffix = ",".join(f"{name}={value}" for name, value in sorted(self.params.items()))
+        return f"{self.name}[{suffix}]" if suffix else self.name
+
+
+# Registry filled by the bench_* modules at import time
+REGISTRY: List[BenchmarkCase] = []
+
+
+def benchmark(name: str, **params: List[Any]):
+    """Register a setup function as a benchmark, optionally parametrized"""
+    def decorator(setup: Callable[..., Callable[[], Any]]):
+        REGISTRY.append(BenchmarkCase(name, setup, params))
+        return setup
+    return decorator
+
+
+def _calibrate(func: Callable[[], Any], min_time: float) -> int:
+    """Smallest power-of-ten loop count whose run takes at least min_time"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time or loops >= 10 ** 7:
+            return loops
+        loops *= 10
+
+
+def time_case(case: BenchmarkCase, params: Dict[str, Any], repeat: int = DEFAULT_REPEAT,
+              min_time: float = DEFAULT_MIN_TIME) -> BenchmarkResult:
+    """Time one benchmark at one parameter set"""
+    func = case.setup(**params)
+    loops = _calibrate(func, min_time)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # keep collector pauses out of the per-call numbers
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return BenchmarkResult(
+        name=case.name,
+        params=params,
+        min=min(samples),
+        median=statistics.median(samples),
+        mean=statistics.fmean(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        loops=loops,
+        repeat=repeat
+    )
+
+
+def run_benchmarks(pattern: str = "", repeat: int = DEFAULT_REPEAT, min_time: float = DEFAULT_MIN_TIME,
+                   report: Optional[Callable[[BenchmarkResult], None]] = None) -> List[BenchmarkResult]:
+    """Run every registered benchmark whose name contains pattern"""
+    results = []
+    for case in REGISTRY:
+        if pattern and pattern not in case.name:
+            continue
+        for params in case.parameter_sets():
+            result = time_case(case, params, repeat, min_time)
+            results.append(result)
+            if report:
+                report(result)
+    return results
+
+
+def environment() -> Dict[str, str]:
+    """Machine and revision details stored alongside the numbers"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": str(os.cpu_count()),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def save_results(path: str, results: List[BenchmarkResult]):
+    """Write results (plus environment) as JSON"""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"environment": environment(), "results": [asdict(result) for result in results]},
+                  handle, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    """Read a results file written by save_results"""
+    with open(path, encoding="utf-8") as handle:
+        return [BenchmarkResult(**result) for result in json.load(handle)["results"]]
+
+
+def format_time(seconds: float) -> str:
+    """Human-readable duration"""
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def compare(baseline: List[BenchmarkResult], current: List[BenchmarkResult],
+            threshold: float = 1.1) -> List[Dict[str, Any]]:
+    """Median ratio (current / baseline) of every benchmark present in both runs"""
+    previous = {result.key: result for result in baseline}
+    rows = []
+    for result in current:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        ratio = result.median / before.median if before.median else float("inf")
+        verdict = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else "same"
+        rows.append({"benchmark": result.key, "before": before.median, "after": result.median,
+                     "ratio": ratio, "verdict": verdict})
+    return rows
@@ -0,0 +1,186 @@
+"""
+Admission Control - bounded lanes so slow work can't starve cheap work
+
+Every API request is admitted through one of three lanes, each with its
+own concurrency limit, bounded wait queue and queue-time SLO:
+
+    catalog    brick listings, search, collections   (cheap, many at once)
+    analysis   wizard analysis                       (CPU-bound)
+    optimize   two-pass optimization                 (waits on the provider)
+
+When the provider slows down only the optimize lane fills up; greetings
+and brick listings keep their own slots. A request is turned away at
+once with 503 and Retry-After when its lane's queue is full, or when the
+wait it can expect (queued requests x recent service time / slots)
+already exceeds the lane's SLO; a request that does queue gives up once
+it has waited that long. Lanes are sized with
+
+    BRICKZ_LANE_OPTIMIZE=16,32,5      # concurrency, queue length, max queue seconds
+    BRICKZ_ADMISSION=off              # admit everything (e.g. behind another limiter)
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .metrics import QUEUE_DEPTH, metrics
+
+# name -> (concurrency, queue length, max seconds in the queue)
+DEFAULT_LANES = {
+    "catalog": (32, 128, 0.25),
+    "analysis": (8, 32, 2.0),
+    "optimize": (16, 32, 5.0),
+}
+
+# Weight of the latest request in a lane's service time average
+SERVICE_ALPHA = 0.2
+
+ADMISSIONS = metrics.counter(
+    "brickz_admission_total", "Requests by lane and outcome (admitted/queue_full/slo)", ["lane", "outcome"])
+ADMISSION_WAIT = metrics.histogram(
+    "brickz_admission_wait_seconds", "Time admitted requests spent queued, by lane", ["lane"])
+LANE_IN_FLIGHT = metrics.gauge(
+    "brickz_lane_in_flight", "Requests holding a lane slot", ["lane"])
+
+
+class OverloadedError(RuntimeError):
+    """A lane can't take the request in time; the client should retry after retry_after seconds"""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+        detail = "queue is full" if reason == "queue_full" else "is backed up"
+        super().__init__(f"The server is busy ({lane} {detail})")
+
+
+class Lane:
+    """A counting semaphore with a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.service_time = 0.0  # moving average of seconds a slot is held
+        self._cond = threading.Condition()
+        self._depth = QUEUE_DEPTH.labels(queue=f"{name}_lane")
+        self._in_flight = LANE_IN_FLIGHT.labels(lane=name)
+        self._wait = ADMISSION_WAIT.labels(lane=name)
+
+    def expected_wait(self) -> float:
+        """Seconds a request arriving now can expect to queue"""
+        if self.in_flight < self.concurrency:
+            return 0.0
+        return (self.waiting + 1) * self.service_time / self.concurrency
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(max(self.expected_wait(), self.max_wait)))
+
+    def _reject(self, reason: str):
+        ADMISSIONS.labels(lane=self.name, outcome=reason).inc()
+        raise OverloadedError(self.name, reason, self._retry_after())
+
+    def acquire(self) -> float:
+        """Take a slot, queueing up to max_wait; returns the time it was taken (for release)"""
+        start = time.perf_counter()
+        with self._cond:
+            if self.in_flight >= self.concurrency:
+                if self.waiting >= self.max_queue:
+                    self._reject("queue_full")
+                if self.expected_wait() > self.max_wait:
+                    self._reject("slo")
+                deadline = start + self.max_wait
+                self.waiting += 1
+                self._depth.inc()
+                try:
+                    while self.in_flight >= self.concurrency:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self._reject("slo")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                    self._depth.dec()
+            self.in_flight += 1
+        self._in_flight.inc()
+        admitted = time.perf_counter()
+        self._wait.observe(admitted - start)
+        ADMISSIONS.labels(lane=self.name, outcome="admitted").inc()
+        return admitted
+
+    def release(self, admitted: float):
+        """Give back the slot taken at `admitted`"""
+        held = time.perf_counter() - admitted
+        with self._cond:
+            self.in_flight -= 1
+            self.service_time += SERVICE_ALPHA * (held - self.service_time)
+            self._cond.notify()
+        self._in_flight.dec()
+
+    def status(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.waiting,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "service_time": round(self.service_time, 4),
+        }
+
+
+class AdmissionController:
+    """The lanes requests are admitted through"""
+
+    def __init__(self, lanes: Optional[Dict[str, tuple]] = None, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv("BRICKZ_ADMISSION", "on").strip().lower() not in ("0", "off", "false", "no")
+        self.enabled = enabled
+        self.lanes: Dict[str, Lane] = {}
+        for name, default in (lanes or DEFAULT_LANES).items():
+            setting = os.getenv(f"BRICKZ_LANE_{name.upper()}")
+            concurrency, max_queue, max_wait = setting.split(",") if setting else default
+            self.lanes[name] = Lane(name, int(concurrency), int(max_queue), float(max_wait))
+
+    def status(self) -> Dict:
+        return {"enabled": self.enabled, "lanes": {name: lane.status() for name, lane in self.lanes.items()}}
+
+
+# Process-wide controller
+controller = AdmissionController()
+
+
+def instrument_app(app, routes: Dict[str, str], controller: AdmissionController = controller):
+    """Admit requests to the endpoints in routes (view name -> lane) through their lane"""
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def _admit_request():
+        lane = controller.lanes.get(routes.get(request.endpoint)) if controller.enabled else None
+        if lane is None:
+            return None
+        try:
+            g.admission = (lane, lane.acquire())
+        except OverloadedError as e:
+            response = jsonify({
+                'error': str(e),
+                'lane': e.lane,
+                'status': 'overloaded'
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        return None
+
+    @app.teardown_request
+    def _release_lane(exc):
+        admitted = g.pop("admission", None)
+        if admitted is not None:
+            lane, start = admitted
+            lane.release(start)
+
+    return app
@@ -2,12 +2,20 @@
 Enhanced Bricks System with Custom Creation and Categories
 """
 
+from collections import OrderedDict
+from collections.abc import MutableMapping, Sequence
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Any, Tuple
 import json
+import threading
 import uuid
 from enum import Enum
 
+from prompt_bricks.core.catalog import BrickCatalog, get_catalog
+
+from .tracing import span
+from .user_collections import CollectionStore
+
 class BrickCategory(Enum):
     """Six main brick categories with color coding"""
     STYLES = ("styles", "#4ECDC4", "How to approach the task")
@@ -36,97 +44,299 @@ class Brick:
     usage_count: int = 0
     rating: float = 0.0
 
+# Category key ("styles") -> BrickCategory
+CATEGORIES_BY_KEY = {category.key: category for category in BrickCategory}
+
+class DuplicateBrickError(ValueError):
+    """A new custom brick is a near-duplicate of bricks that already exist"""
+    
+    def __init__(self, matches: List[Tuple["Brick", float]]):
+        self.matches = matches
+        super().__init__("Similar bricks already exist: " + ", ".join(brick.name for brick, _ in matches))
+
+class UserBricks(NamedTuple):
+    """A user's merged view of a workpath: categories plus the IDs in their collection"""
+    categories: Dict[str, Sequence[Brick]]
+    saved: FrozenSet[str]
+
+# System bricks a library keeps decoded beyond the ones in use (LRU)
+BRICK_CACHE_SIZE = 4096
+
+class BrickTable(MutableMapping):
+    """
+    Brick ID -> Brick over the shared catalog plus this library's custom bricks
+
+    System bricks are decoded from the catalog when looked up and kept in a
+    bounded LRU, so a large (memory-mapped) catalog costs nothing until used.
+    Only custom bricks and bricks with usage stay resident.
+    """
+    
+    def __init__(self, catalog, cache_size: int = BRICK_CACHE_SIZE):
+        self._catalog = catalog
+        self._resident: Dict[str, Brick] = {}  # custom bricks and system bricks with usage
+        self._cache: "OrderedDict[str, Brick]" = OrderedDict()  # recently decoded system bricks
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._custom_ids: List[str] = []
+        self._removed = set()                 # system IDs deleted from this library
+    
+    def brick(self, entry) -> Brick:
+        """The Brick for a catalog entry, decoded on a cache miss"""
+        brick = self._resident.get(entry.id)
+        if brick is not None:
+            return brick
+        with self._lock:
+            brick = self._cache.get(entry.id)
+            if brick is not None:
+                self._cache.move_to_end(entry.id)
+                return brick
+            brick = self._resident.get(entry.id)  # pinned while we waited
+            if brick is None:
+                brick = self._cache[entry.id] = self._decode(entry)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return brick
+    
+    def count_use(self, brick_id: str):
+        """Add one use to a brick, which keeps it resident from then on"""
+        with self._lock:
+            brick = self._resident.get(brick_id) or self._cache.pop(brick_id, None)
+            if brick is None:
+                entry = self._catalog.by_id.get(brick_id) if brick_id not in self._removed else None
+                if entry is None:
+                    raise KeyError(brick_id)
+                brick = self._decode(entry)
+            brick.usage_count += 1
+            self._resident[brick_id] = brick
+    
+    @staticmethod
+    def _decode(entry) -> Brick:
+        return Brick(entry.id, entry.name, CATEGORIES_BY_KEY[entry.category],
+                     entry.description, entry.modifier_text, list(entry.workpaths))
+    
+    @property
+    def removed(self) -> FrozenSet[str]:
+        """System IDs deleted from this library"""
+        return frozenset(self._removed)
+    
+    def __getitem__(self, brick_id: str) -> Brick:
+        brick = self._resident.get(brick_id)
+        if brick is None:
+            entry = self._catalog.by_id.get(brick_id) if brick_id not in self._removed else None
+            if entry is None:
+                raise KeyError(brick_id)
+            brick = self.brick(entry)
+        return brick
+    
+    def __setitem__(self, brick_id: str, brick: Brick):
+        with self._lock:
+            if brick_id not in self._resident and brick_id not in self._catalog.by_id:
+                self._custom_ids.append(brick_id)
+            self._removed.discard(brick_id)
+            self._cache.pop(brick_id, None)
+            self._resident[brick_id] = brick
+    
+    def __delitem__(self, brick_id: str):
+        with self._lock:
+            if brick_id in self._catalog.by_id and brick_id not in self._removed:
+                self._removed.add(brick_id)
+                self._resident.pop(brick_id, None)
+                self._cache.pop(brick_id, None)
+            elif brick_id in self._resident:
+                del self._resident[brick_id]
+                self._custom_ids.remove(brick_id)
+            else:
+                raise KeyError(brick_id)
+    
+    def __contains__(self, brick_id) -> bool:
+        return brick_id in self._resident or (brick_id in self._catalog.by_id and brick_id not in self._removed)
+    
+    def __iter__(self):
+        for entry in self._catalog:
+            if entry.id not in self._removed:
+                yield entry.id
+        yield from list(self._custom_ids)
+    
+    def __len__(self) -> int:
+        return len(self._catalog) - len(self._removed) + len(self._custom_ids)
+    
+    def resident(self) -> List[Brick]:
+        """Custom bricks and bricks with usage (the only ones that can have usage)"""
+        return list(self._resident.values())
+    
+    def decoded(self) -> int:
+        """How many bricks are held decoded right now"""
+        return len(self._resident) + len(self._cache)
+    
+    def custom(self) -> List[Brick]:
+        return [self._resident[brick_id] for brick_id in self._custom_ids]
+
+class CategoryBricks(Sequence):
+    """
+    One category's bricks: catalog entries, decoded through the brick table
+    only when read, followed by lists of custom bricks held by reference
+    """
+    
+    __slots__ = ("_table", "_entries", "_extra")
+    
+    def __init__(self, table: BrickTable, entries: Sequence = (), *extra: Sequence[Brick]):
+        self._table = table
+        self._entries = entries
+        self._extra = extra
+    
+    def extended(self, *extra: Sequence[Brick]) -> "CategoryBricks":
+        """These bricks followed by more, without copying either"""
+        return CategoryBricks(self._table, self._entries, *self._extra, *extra)
+    
+    def __len__(self) -> int:
+        return len(self._entries) + sum(map(len, self._extra))
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < len(self._entries):
+            return self._table.brick(self._entries[index])
+        index -= len(self._entries)
+        for bricks in self._extra:
+            if 0 <= index < len(bricks):
+                return bricks[index]
+            index -= len(bricks)
+        raise IndexError("category index out of range")
+    
+    def __iter__(self):
+        brick = self._table.brick
+        for entry in self._entries:
+            yield brick(entry)
+        for bricks in self._extra:
+            yield from bricks
+    
+    def __repr__(self) -> str:
+        return f"CategoryBricks({len(self)} bricks)"
+
 class BrickLibrary:
     """Enhanced brick library with custom creation and personal collections"""
     
-    def __init__(self, data_file: str = "data/bricks.json"):
+    def __init__(self, data_file: str = "data/bricks.json", catalog: Optional[BrickCatalog] = None):
         self.data_file = data_file
-        self.bricks: Dict[str, Brick] = {}
-        self.user_collections: Dict[str, List[str]] = {}
-        self._load_system_bricks()
-    
-    def _load_system_bricks(self):
-        """Load the core system bricks"""
-        system_bricks = [
-            # STYLES
-            Brick("sty_pythonic", "pythonic", BrickCategory.STYLES, 
-                  "Clean, idiomatic Python code", 
-                  "following Pythonic best practices and conventions", 
-                  ["coding"]),
-            Brick("sty_defensive", "defensive", BrickCategory.STYLES,
-                  "Robust error handling and validation",
-                  "with defensive programming and comprehensive error handling",
-                  ["coding"]),
-            Brick("sty_elegant", "elegant", BrickCategory.STYLES,
-                  "Sophisticated and refined approach",
-                  "with elegant, sophisticated design and implementation",
-                  ["all"]),
-            
-            # GOALS
-            Brick("gol_optimize", "optimize", BrickCategory.GOALS,
-                  "Speed and efficiency gains",
-                  "to optimize performance, reduce complexity, and improve speed",
-                  ["coding"]),
-            Brick("gol_security", "secure", BrickCategory.GOALS,
-                  "Harden against vulnerabilities", 
-                  "to improve security and protect against vulnerabilities",
-                  ["coding"]),
-            
-            # SCOPES
-            Brick("sco_function", "function", BrickCategory.SCOPES,
-                  "Single function optimization",
-                  "focusing on individual function improvement",
-                  ["coding"]),
-            Brick("sco_system", "system", BrickCategory.SCOPES,
-                  "System-wide optimization",
-                  "focusing on system-wide performance and architecture",
-                  ["coding"]),
-            
-            # PERSONAS
-            Brick("per_senior", "senior_engineer", BrickCategory.PERSONAS,
-                  "Senior developer perspective",
-                  "from the perspective of a senior software engineer",
-                  ["coding"]),
-            Brick("per_security", "security_expert", BrickCategory.PERSONAS,
-                  "Security specialist analysis",
-                  "from the perspective of a security expert and penetration tester",
-                  ["coding"]),
-            
-            # FORMATS
-            Brick("fmt_structured", "structured", BrickCategory.FORMATS,
-                  "Well-organized output",
-                  "in a well-structured, organized format",
-                  ["all"]),
-            
-            # CONTEXTS
-            Brick("ctx_production", "production", BrickCategory.CONTEXTS,
-                  "Production environment",
-                  "considering production environment requirements",
-                  ["coding"])
-        ]
-        
-        for brick in system_bricks:
-            self.bricks[brick.id] = brick
-    
-    def get_bricks_for_workpath(self, workpath: str) -> Dict[str, List[Brick]]:
-        """Get all bricks organized by category for a specific workpath"""
+        self.catalog = catalog or get_catalog()
+        self.bricks: MutableMapping[str, Brick] = BrickTable(self.catalog)
+        self.user_collections = CollectionStore(self.catalog)
+        # workpath (or "all") -> category key -> shared custom bricks, in creation order
+        self._custom_index: Dict[str, Dict[str, List[Brick]]] = {}
+        self._private: Dict[str, str] = {}  # brick ID -> owner, for bricks only their creator sees
+        # workpath -> (shared version, categories); rebuilt when a shared brick is added
+        self._shared_views: Dict[str, Tuple[int, Dict[str, List[Brick]]]] = {}
+        self._shared_version = 0
+        self._semantic = None  # SemanticIndex, built in the background or on the first similarity search
+        self._semantic_lock = threading.Lock()
+        self._duplicates = None  # DuplicateIndex, built in the background or on the first duplicate check
+        self._duplicates_lock = threading.Lock()
+        self._builders: Dict[str, threading.Thread] = {}  # index name -> thread building it
+        self._builders_lock = threading.Lock()
+    
+    def get_bricks_for_workpath(self, workpath: str, user_id: Optional[str] = None) -> Dict[str, Sequence[Brick]]:
+        """
+        Get all bricks organized by category for a specific workpath (plus a user's own bricks)
+        
+        Categories are read straight off the catalog's precomputed groups and
+        decode bricks only as they are read, so page through large ones.
+        """
+        if user_id is not None:
+            return self.get_user_bricks(user_id, workpath).categories
+        version = self._shared_version
+        cached = self._shared_views.get(workpath)
+        if cached is not None and cached[0] == version:
+            return cached[1]
         result = {}
         
-        for category in BrickCategory:
-            category_bricks = []
-            for brick in self.bricks.values():
-                if workpath in brick.workpaths or "all" in brick.workpaths:
-                    if brick.category == category:
-                        category_bricks.append(brick)
-            
-            if category_bricks:
-                result[category.key] = category_bricks
+        with span("bricks.for_workpath", workpath=workpath):
+            system = self.catalog.groups(workpath, by="category")
+            custom = self._custom_index.get(workpath, {})
+            shared = self._custom_index.get("all", {}) if workpath != "all" else {}
+            removed = self.bricks.removed
+            for category in BrickCategory:
+                entries = system.get(category.key, ())
+                if removed:
+                    entries = [entry for entry in entries if entry.id not in removed]
+                category_bricks = CategoryBricks(self.bricks, entries, custom.get(category.key, []),
+                                                 shared.get(category.key, []))
+                
+                if category_bricks:
+                    result[category.key] = category_bricks
+        
+        self._shared_views[workpath] = (version, result)
+        return result
+    
+    def get_user_bricks(self, user_id: str, workpath: str) -> UserBricks:
+        """
+        The shared bricks of a workpath plus the user's private bricks
+        
+        What the user adds (their private bricks and saved IDs) is cached per
+        user (LRU) and rebuilt only when their collection changes; it is
+        merged with the shared categories by reference on every read, so
+        neither new shared bricks nor the catalog's size cost a rebuild.
+        """
+        def build(ids: List[str]) -> Tuple[Dict[str, List[Brick]], FrozenSet[str]]:
+            own: Dict[str, List[Brick]] = {}
+            for brick in map(self.bricks.get, ids):
+                if (brick is not None and brick.id in self._private
+                        and (workpath in brick.workpaths or "all" in brick.workpaths)):
+                    own.setdefault(brick.category.key, []).append(brick)
+            return own, frozenset(ids)
         
+        with span("bricks.for_user", workpath=workpath):
+            own, saved = self.user_collections.view(user_id, workpath, build)
+            categories = self.get_bricks_for_workpath(workpath)
+            if own:
+                categories = dict(categories)
+                for key, bricks in own.items():
+                    categories[key] = categories.get(key, CategoryBricks(self.bricks)).extended(bricks)
+            return UserBricks(categories, saved)
+    
+    def get_collection(self, user_id: str, workpath: Optional[str] = None) -> Dict[str, List[Brick]]:
+        """A user's saved and created bricks by category, optionally only those for a workpath"""
+        result: Dict[str, List[Brick]] = {}
+        for brick in map(self.bricks.get, self.user_collections.ids(user_id)):
+            if brick is None:
+                continue
+            if workpath and workpath not in brick.workpaths and "all" not in brick.workpaths:
+                continue
+            result.setdefault(brick.category.key, []).append(brick)
         return result
     
-    def get_brick(self, brick_id: str) -> Optional[Brick]:
-        """Get a specific brick by ID"""
-        return self.bricks.get(brick_id)
+    def save_to_collection(self, user_id: str, brick_id: str) -> Optional[Brick]:
+        """Add a brick (by ID, name or alias) to a user's collection; None if it doesn't exist"""
+        brick = self.get_brick(brick_id, user_id)
+        if brick is None:
+            return None
+        self.user_collections.add(user_id, brick.id)
+        return brick
+    
+    def remove_from_collection(self, user_id: str, brick_id: str) -> bool:
+        """Drop a brick from a user's collection; False if it wasn't in it"""
+        brick = self.get_brick(brick_id, user_id)
+        return self.user_collections.remove(user_id, brick.id if brick is not None else brick_id)
+    
+    def get_brick(self, brick_id: str, user_id: Optional[str] = None) -> Optional[Brick]:
+        """
+        Get a specific brick by ID (system bricks also by name or alias)
+        
+        Private bricks are only found for their owner's user_id.
+        """
+        brick = self.bricks.get(brick_id)
+        if brick is None:
+            entry = self.catalog.get(brick_id)
+            if entry is not None:
+                brick = self.bricks.get(entry.id)
+        if brick is not None and self._private.get(brick.id, user_id) != user_id:
+            return None
+        return brick
+    
+    def is_private(self, brick_id: str) -> bool:
+        """Whether a brick is only visible to the user who created it"""
+        return brick_id in self._private
     
     def validate_custom_brick(self, name: str, category: BrickCategory, 
                             modifier_text: str) -> Tuple[bool, str]:
@@ -138,8 +348,15 @@ class BrickLibrary:
         return True, "Valid"
     
     def create_custom_brick(self, name: str, category: BrickCategory, description: str, 
-                          modifier_text: str, workpaths: List[str], creator: str = "user") -> Brick:
-        """Create a new custom brick"""
+                          modifier_text: str, workpaths: List[str], creator: str = "user",
+                          allow_duplicates: bool = True, owner: Optional[str] = None) -> Brick:
+        """
+        Create a new custom brick
+        
+        With allow_duplicates=False, raises DuplicateBrickError instead when
+        near-duplicate bricks exist (checked and created atomically). With an
+        owner, the brick goes to that user's collection and only they see it.
+        """
         brick_id = f"cst_{category.key}_{str(uuid.uuid4())[:8]}"
         
         brick = Brick(
@@ -153,35 +370,183 @@ class BrickLibrary:
             creator=creator
         )
         
-        self.bricks[brick_id] = brick
+        duplicates = self._duplicate_index() if not allow_duplicates else None
+        with self._duplicates_lock:
+            if duplicates is not None:
+                matches = self.find_duplicates(description, modifier_text)
+                if matches:
+                    raise DuplicateBrickError(matches)
+            self.bricks[brick_id] = brick
+            if owner is not None:
+                self._private[brick_id] = owner
+                self.user_collections.add(owner, brick_id)
+                return brick
+            if self._duplicates is not None:
+                self._duplicates.add(brick)
+        for workpath in (["all"] if "all" in workpaths else dict.fromkeys(workpaths)):
+            self._custom_index.setdefault(workpath, {}).setdefault(category.key, []).append(brick)
+        self._shared_version += 1
+        with self._semantic_lock:
+            if self._semantic is not None:
+                self._semantic.add(brick)
         return brick
     
-    def increment_usage(self, brick_id: str):
+    def find_duplicates(self, description: str, modifier_text: str, limit: int = 5) -> List[Tuple[Brick, float]]:
+        """Existing bricks whose description and modifier text nearly match, most similar first"""
+        from .dedup import duplicate_text
+        with span("bricks.find_duplicates"):
+            found = self._duplicate_index().find(duplicate_text(description, modifier_text), limit)
+        return [(self.bricks[brick_id], score) for brick_id, score in found if brick_id in self.bricks]
+    
+    @property
+    def duplicates_ready(self) -> bool:
+        return self._duplicates is not None
+    
+    def build_duplicate_index(self, background: bool = False):
+        """Build the duplicate index now, or once in a daemon thread when background"""
+        if background:
+            if self._duplicates is None:
+                self._build_in_background("duplicates", self._duplicate_index)
+        else:
+            self._duplicate_index()
+    
+    def _duplicate_index(self):
+        if self._duplicates is None:
+            from .dedup import DuplicateIndex  # NumPy only once duplicate checks are used
+            with self._duplicates_lock:
+                if self._duplicates is None:
+                    duplicates = DuplicateIndex(self.catalog)
+                    duplicates.add_many(self._shared_custom())
+                    self._duplicates = duplicates
+        return self._duplicates
+    
+    def increment_usage(self, brick_id: str, user_id: Optional[str] = None):
         """Increment usage count for a brick"""
-        if brick_id in self.bricks:
-            self.bricks[brick_id].usage_count += 1
+        brick = self.get_brick(brick_id, user_id)
+        if brick is not None:
+            self.bricks.count_use(brick.id)
     
     def get_popular_bricks(self, limit: int = 10) -> List[Brick]:
-        """Get most popular bricks by usage count"""
-        sorted_bricks = sorted(self.bricks.values(), key=lambda b: b.usage_count, reverse=True)
-        return sorted_bricks[:limit]
+        """Get most popular bricks by usage count (private bricks never show up here)"""
+        # Only resident bricks can have been used; pad with unused ones in catalog order
+        private = self._private
+        popular = sorted((b for b in self.bricks.resident() if b.usage_count and b.id not in private),
+                         key=lambda b: b.usage_count, reverse=True)[:limit]
+        if len(popular) < limit:
+            chosen = {brick.id for brick in popular}
+            for brick in self.bricks.values():
+                if len(popular) >= limit:
+                    break
+                if brick.id not in chosen and brick.id not in private:
+                    popular.append(brick)
+        return popular
+    
+    def get_custom_bricks(self) -> List[Brick]:
+        """Bricks created in this library, oldest first"""
+        return self.bricks.custom()
+    
+    def _shared_custom(self) -> List[Brick]:
+        """Custom bricks everyone sees (not owned by one user), oldest first"""
+        return [brick for brick in self.bricks.custom() if brick.id not in self._private]
     
-    def search_bricks(self, query: str, workpath: str = None) -> List[Brick]:
-        """Search bricks by name, description, or modifier text"""
+    def search_bricks(self, query: str, workpath: str = None, user_id: str = None,
+                      limit: Optional[int] = None) -> List[Brick]:
+        """
+        Search bricks by name, description, or modifier text (private bricks only for their owner)
+        
+        Catalog bricks are matched by the catalog itself and only matches are
+        decoded; stops after ``limit`` results when given.
+        """
         query_lower = query.lower()
         results = []
+        private = self._private
+        removed = self.bricks.removed
         
-        for brick in self.bricks.values():
-            if workpath and workpath not in brick.workpaths and "all" not in brick.workpaths:
-                continue
-                
-            if (query_lower in brick.name.lower() or 
-                query_lower in brick.description.lower() or
-                query_lower in brick.modifier_text.lower()):
-                results.append(brick)
+        def wanted(brick_workpaths) -> bool:
+            return not workpath or workpath in brick_workpaths or "all" in brick_workpaths
+        
+        with span("bricks.search", query=query):
+            for entry in self.catalog.search(query):
+                if entry.id in removed or not wanted(entry.workpaths):
+                    continue
+                results.append(self.bricks.brick(entry))
+                if limit is not None and len(results) >= limit:
+                    return results
+            
+            for brick in self.bricks.custom():
+                if not wanted(brick.workpaths):
+                    continue
+                if brick.id in private and private[brick.id] != user_id:
+                    continue
+                    
+                if (query_lower in brick.name.lower() or 
+                    query_lower in brick.description.lower() or
+                    query_lower in brick.modifier_text.lower()):
+                    results.append(brick)
+                    if limit is not None and len(results) >= limit:
+                        break
         
         return results
     
+    def similar_bricks(self, query: str, limit: int = 10, workpath: str = None,
+                       wait: bool = True) -> List[Tuple[Brick, float]]:
+        """Bricks whose name and text are closest in meaning to the query, best first"""
+        return self.similar_bricks_many([query], limit, workpath, wait)[0]
+    
+    def similar_bricks_many(self, queries: List[str], limit: int = 10, workpath: str = None,
+                            wait: bool = True) -> List[List[Tuple[Brick, float]]]:
+        """
+        similar_bricks for many queries, scored as one batch
+        
+        With wait=False nothing is found (empty lists) until the index
+        has been built, and the build is started in the background.
+        """
+        if not wait and self._semantic is None:
+            self.build_semantic_index(background=True)
+            return [[] for _ in queries]
+        with span("bricks.similar", queries=len(queries)):
+            hits = self._semantic_index().search_many(queries, limit, workpath)
+        return [[(self.bricks[brick_id], score) for brick_id, score in found if brick_id in self.bricks]
+                for found in hits]
+    
+    @property
+    def semantic_ready(self) -> bool:
+        return self._semantic is not None
+    
+    def build_semantic_index(self, background: bool = False):
+        """Build the similarity index now, or once in a daemon thread when background"""
+        if background:
+            if self._semantic is None:
+                self._build_in_background("semantic", self._semantic_index)
+        else:
+            self._semantic_index()
+    
+    def _build_in_background(self, name: str, build):
+        """Run build() in a daemon thread unless one is already running for this index"""
+        def run():
+            try:
+                build()
+            finally:
+                with self._builders_lock:
+                    del self._builders[name]  # a failed build is retried by the next caller
+        
+        with self._builders_lock:
+            if name in self._builders:
+                return
+            builder = self._builders[name] = threading.Thread(
+                target=run, name=f"brickz-{name}-index", daemon=True)
+        builder.start()
+    
+    def _semantic_index(self):
+        if self._semantic is None:
+            from .semantic import SemanticIndex  # NumPy only once similarity search is used
+            with self._semantic_lock:
+                if self._semantic is None:
+                    # Catalog entries carry the same fields as Bricks, so nothing is decoded twice
+                    self._semantic = SemanticIndex(self.catalog)
+                    self._semantic.add_many(self._shared_custom())
+        return self._semantic
+    
     def get_mad_libs_prompts(self, category: BrickCategory) -> Dict[str, str]:
         """Get Mad Libs style prompts for creating custom bricks"""
         prompts = {
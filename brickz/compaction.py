@@ -0,0 +1,181 @@
+"""
+Prompt Compaction - trims redundant material before each provider call
+
+Three independent stages, each switchable through CompactionConfig:
+
+- dedupe_modifiers: drops brick modifier clauses already said by an
+  earlier brick (e.g. gol_optimize + sco_system both on performance)
+- normalize_whitespace: trailing spaces and runs of blank lines in the
+  template scaffold; slot values (the user's content and context, the
+  pass 1 output) are substituted verbatim afterwards
+- strip_echo: removes marker lines, and pass-1 template scaffolding that
+  the model echoed back at the top of its output, before the output is
+  wrapped for pass 2
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+# Words that carry no meaning when comparing modifier clauses
+MODIFIER_STOPWORDS = {
+    "a", "an", "and", "the", "to", "with", "on", "of", "for", "from", "in",
+    "into", "using", "through", "by", "focusing", "following", "considering",
+}
+
+# Marker lines that provider adapters and stubs wrap around their output
+SCAFFOLD_LINE_PATTERNS = [
+    r"\[PASS \d[^\]\n]*\]",
+    r"\[Enhanced with [^\]\n]*\]",
+    r"\[Further enhanced [^\]\n]*\]",
+]
+
+_CLAUSE_SPLIT = re.compile(r",\s*(?:and\s+)?|\s+and\s+")
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-]*")
+_TRAILING_SPACE = re.compile(r"[ \t]+(?=\n)")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+_SLOT_MARKER = re.compile(r"\x00(\w+)\x00")
+
+
+def text_bytes(text: str) -> int:
+    """UTF-8 size of a string without copying ASCII text"""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+@dataclass
+class CompactionConfig:
+    """Which compaction stages run before provider calls"""
+    dedupe_modifiers: bool = True
+    normalize_whitespace: bool = True
+    strip_echo: bool = True
+
+    @classmethod
+    def from_env(cls) -> "CompactionConfig":
+        """
+        Read BRICKZ_COMPACTION: 'off', 'all' (default), or a comma list
+        of stage names, e.g. 'dedupe_modifiers,strip_echo'
+        """
+        setting = os.getenv("BRICKZ_COMPACTION", "all").strip().lower()
+        if setting in ("all", ""):
+            return cls()
+        stages = {stage.strip() for stage in setting.split(",")}
+        return cls(
+            dedupe_modifiers="dedupe_modifiers" in stages,
+            normalize_whitespace="normalize_whitespace" in stages,
+            strip_echo="strip_echo" in stages,
+        )
+
+
+@dataclass
+class CompactionReport:
+    """Bytes removed by compaction for one request"""
+    bytes_before: int = 0
+    bytes_saved: int = 0
+    tokens_saved: int = 0
+
+    def add(self, before: str, after: str):
+        """Record one stage's input and output"""
+        size_before = text_bytes(before)
+        self.bytes_before += size_before
+        self.bytes_saved += size_before - text_bytes(after)
+
+
+class PromptCompactor:
+    """Applies the configured compaction stages to prompt pieces"""
+
+    def __init__(self, config: Optional[CompactionConfig] = None):
+        self.config = config or CompactionConfig.from_env()
+        self._scaffold_re = re.compile(
+            r"^(?:%s)[ \t]*$" % "|".join(SCAFFOLD_LINE_PATTERNS), re.MULTILINE
+        )
+
+    def dedupe_modifiers(self, modifiers: List[str]) -> List[str]:
+        """Drop modifier clauses whose meaning an earlier brick already covered"""
+        if not self.config.dedupe_modifiers or len(modifiers) < 2:
+            return modifiers
+
+        seen: Set[str] = set()
+        kept_modifiers = []
+        for modifier in modifiers:
+            clauses = [clause for clause in _CLAUSE_SPLIT.split(modifier) if clause.strip()]
+            kept = []
+            for clause in clauses:
+                words = self._clause_words(clause)
+                if words and words <= seen:
+                    continue
+                kept.append(clause.strip())
+                seen |= words
+            if len(kept) == len(clauses):
+                kept_modifiers.append(modifier)
+            elif kept:
+                kept_modifiers.append(self._join_clauses(kept))
+        return kept_modifiers
+
+    def normalize_whitespace(self, text: str) -> str:
+        """Strip trailing spaces and collapse runs of blank lines"""
+        if not self.config.normalize_whitespace:
+            return text
+        text = _TRAILING_SPACE.sub("", text)
+        return _BLANK_RUNS.sub("\n\n", text).strip()
+
+    def render(self, template, fixed: Dict[str, str], slots: Dict[str, str]) -> str:
+        """
+        Render a template with its scaffold whitespace normalized
+
+        The literal text and fixed values are normalized with the slots
+        held by placeholders; the slot values go in afterwards exactly as
+        given, so indentation and blank lines in user code survive.
+        """
+        if not self.config.normalize_whitespace:
+            return template.render(**fixed, **slots)
+        held = {name: f"\x00{name}\x00" if value else "" for name, value in slots.items()}
+        scaffold = self.normalize_whitespace(template.render(**fixed, **held))
+        return _SLOT_MARKER.sub(lambda m: slots[m.group(1)], scaffold)
+
+    def strip_echo(self, output: str, scaffold: str) -> str:
+        """
+        Remove echoed scaffolding from a model output
+
+        Known marker lines are dropped wherever they appear. Lines that
+        repeat one of the scaffold's instruction lines (scaffold is the
+        prompt template rendered without its user slots) are only dropped
+        from the preamble block at the top of the output; once a line
+        that isn't scaffold shows up the rest is kept, so content that
+        happens to quote an instruction line is left alone.
+        """
+        if not self.config.strip_echo:
+            return output
+        scaffold_lines = self._scaffold_lines(scaffold.splitlines())
+        output = self._scaffold_re.sub("", output)
+        if scaffold_lines:
+            lines = output.split("\n")
+            start = 0
+            while start < len(lines) and (not lines[start].strip()
+                                          or lines[start].strip() in scaffold_lines):
+                start += 1
+            if any(line.strip() for line in lines[:start]):
+                output = "\n".join(lines[start:])
+        return output
+
+    @staticmethod
+    def _scaffold_lines(lines: Iterable[str]) -> Set[str]:
+        """Instruction lines long enough to be recognisable when echoed"""
+        return {line.strip() for line in lines if len(line.strip()) >= 12}
+
+    @staticmethod
+    def _clause_words(clause: str) -> Set[str]:
+        """Normalised content words of a modifier clause"""
+        words = set()
+        for word in _WORD.findall(clause.lower()):
+            if word in MODIFIER_STOPWORDS:
+                continue
+            words.add(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+        return words
+
+    @staticmethod
+    def _join_clauses(clauses: List[str]) -> str:
+        """Rebuild a modifier from its surviving clauses"""
+        if len(clauses) == 1:
+            return clauses[0]
+        return f"{', '.join(clauses[:-1])}, and {clauses[-1]}"
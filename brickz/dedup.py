@@ -0,0 +1,315 @@
+"""
+Near-Duplicate Bricks - MinHash signatures with LSH banding
+
+A brick's description and modifier text are reduced to stemmed words
+(stop words dropped, so "optimise performance" and "to optimize the
+performance" read alike), each cut to its first six letters, and then
+to shingles: the byte 4-grams of those words plus each word's first
+four letters as a shingle of its own, so an abbreviation ("perf") still
+matches the full word. Each shingle set gets a 64-value MinHash
+signature, kept as uint16 so one band of four values packs exactly into
+a uint64 LSH key.
+
+    signatures  uint16[n, 64]   estimated Jaccard = share of equal values
+    band keys   16 sorted uint64 arrays (plus a small unsorted tail)
+
+Checking a new brick costs one signature, 16 binary searches and one
+vectorized comparison against the few candidates that share a band:
+well under a millisecond at a million bricks. Bricks with an estimated
+Jaccard of at least `threshold` are near-duplicates. find_all expands
+each LSH bucket into pairs; buckets too large for every pair are paired
+with their first brick instead, so a big cluster of copies is still
+found in full.
+
+    python -m brickz.dedup --extra bricks.jsonl --threshold 0.6 > duplicates.jsonl
+"""
+
+import argparse
+import json
+import sys
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .semantic import _WORD, STOP_WORDS, _gather, stem
+
+NUM_PERM = 64
+BAND_ROWS = 4
+BANDS = NUM_PERM // BAND_ROWS
+SHINGLE = 4
+STEM_PREFIX = 6   # letters of each stemmed word kept
+WORD_PREFIX = 4   # letters of each word used as a word shingle
+WORD_TAG = np.uint64(1 << 32)  # keeps word shingle hashes apart from 4-grams (which fit 32 bits)
+
+# Estimated Jaccard similarity at which two bricks count as duplicates
+DUPLICATE_THRESHOLD = 0.6
+
+# Tail bricks kept unsorted before they are merged into the band arrays (at least)
+TAIL_LIMIT = 4096
+
+# Shingles hashed per NumPy pass when signing many bricks (64 x this many uint64s)
+CHUNK_SHINGLES = 64 * 1024
+
+# Biggest LSH bucket expanded into all its pairs by find_all (larger ones pair with their first row)
+MAX_BUCKET = 256
+
+_rng = np.random.RandomState(0x6272)
+_A = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # odd
+_B = _rng.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Lowercase stemmed words (at most STEM_PREFIX letters) without stop words"""
+    return " ".join(stem(word)[:STEM_PREFIX] for word in _WORD.findall(text.lower()) if word not in STOP_WORDS)
+
+
+def signature(text: str) -> np.ndarray:
+    """uint16[NUM_PERM] MinHash signature of a text"""
+    return signatures([text])[0]
+
+
+def _min_hashes(shingles: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """uint64[NUM_PERM, n]: per text (counts[i] consecutive shingles each), the min of each permutation"""
+    # Multiply-shift hashing: the top 32 bits of a * shingle + b (mod 2**64) per permutation
+    permuted = (_A[:, None] * shingles[None, :] + _B[:, None]) >> np.uint64(32)
+    return np.minimum.reduceat(permuted, np.cumsum(counts) - counts, axis=1)
+
+
+def signatures(texts: Sequence[str]) -> np.ndarray:
+    """uint16[n, NUM_PERM] MinHash signatures of the 4-grams and word shingles of normalized texts"""
+    normalized = [normalize(text) for text in texts]
+    encoded = [text.encode("utf-8").ljust(SHINGLE) for text in normalized]
+    result = np.empty((len(encoded), NUM_PERM), dtype=np.uint16)
+    start = 0
+    while start < len(encoded):
+        # Texts whose shingles fit one CHUNK_SHINGLES pass (always at least one)
+        end, total = start, 0
+        while end < len(encoded) and (end == start or total + len(encoded[end]) <= CHUNK_SHINGLES):
+            total += len(encoded[end]) - SHINGLE + 1
+            end += 1
+        chunk = encoded[start:end]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        data = np.frombuffer(b"".join(chunk), dtype=np.uint8).astype(np.uint64)
+        grams = data[:-3] << np.uint64(24) | data[1:-2] << np.uint64(16) | data[2:-1] << np.uint64(8) | data[3:]
+        counts = lengths - SHINGLE + 1
+        grams = grams[_gather(np.cumsum(lengths) - lengths, counts)]  # drop 4-grams spanning two texts
+        # MinHash of the union of both shingle sets = the smaller of their MinHashes
+        words = [text.split() or [""] for text in normalized[start:end]]
+        word_counts = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+        word_shingles = np.fromiter((zlib.crc32(word[:WORD_PREFIX].encode("utf-8"))
+                                     for text_words in words for word in text_words),
+                                    dtype=np.uint64, count=int(word_counts.sum())) | WORD_TAG
+        minima = np.minimum(_min_hashes(grams, counts), _min_hashes(word_shingles, word_counts))
+        result[start:end] = (minima.T & np.uint64(0xFFFF)).astype(np.uint16)
+        start = end
+    return result
+
+
+def duplicate_text(description: str, modifier_text: str) -> str:
+    """Text compared for duplicates"""
+    return f"{description} {modifier_text}"
+
+
+def brick_text(brick) -> str:
+    """duplicate_text of a brickz Brick or a catalog entry"""
+    return duplicate_text(brick.description, brick.modifier_text)
+
+
+def _band_keys(signatures: np.ndarray) -> np.ndarray:
+    """uint64[n, BANDS]: each band's four uint16 values packed into one key"""
+    return np.ascontiguousarray(signatures).view(np.uint64).reshape(len(signatures), BANDS)
+
+
+class DuplicateIndex:
+    """MinHash/LSH index of brick texts; thread-safe, append-only"""
+
+    def __init__(self, bricks: Iterable = (), threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.signatures = np.zeros((1024, NUM_PERM), dtype=np.uint16)
+        # Per band: keys sorted, and the row of each key
+        self._sorted_keys = [np.zeros(0, dtype=np.uint64)] * BANDS
+        self._sorted_rows = [np.zeros(0, dtype=np.int64)] * BANDS
+        self._sealed = 0  # rows [0, sealed) are in the sorted arrays, the rest form the tail
+        self.add_many(bricks)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, brick):
+        """Index one brick (no-op if its ID is already indexed)"""
+        self.add_many((brick,))
+
+    def add_many(self, bricks: Iterable):
+        with self._lock:
+            batch: Dict[str, str] = {}
+            for brick in bricks:
+                if brick.id not in self._rows and brick.id not in batch:
+                    batch[brick.id] = brick_text(brick)
+                if len(batch) >= TAIL_LIMIT:
+                    self._append(batch)
+                    batch = {}
+            if batch:
+                self._append(batch)
+
+    def _append(self, batch: Dict[str, str]):
+        """Sign and store new bricks (caller holds the lock)"""
+        start = len(self.ids)
+        end = start + len(batch)
+        if end > len(self.signatures):
+            grown = np.zeros((max(end, 2 * len(self.signatures)), NUM_PERM), dtype=np.uint16)
+            grown[:start] = self.signatures[:start]
+            self.signatures = grown
+        self.signatures[start:end] = signatures(list(batch.values()))
+        for row, brick_id in enumerate(batch, start):
+            self._rows[brick_id] = row
+        self.ids.extend(batch)
+        if end - self._sealed >= TAIL_LIMIT:
+            self._seal()
+
+    def _seal(self):
+        """Merge the tail into the sorted band arrays: O(n) copies, no full re-sort"""
+        sealed, count = self._sealed, len(self.ids)
+        if count == sealed:
+            return
+        tail = _band_keys(self.signatures[sealed:count])
+        sorted_keys, sorted_rows = [], []
+        for band in range(BANDS):
+            order = np.argsort(tail[:, band], kind="stable")
+            keys = tail[order, band]
+            positions = np.searchsorted(self._sorted_keys[band], keys, "right")
+            sorted_keys.append(np.insert(self._sorted_keys[band], positions, keys))
+            sorted_rows.append(np.insert(self._sorted_rows[band], positions, sealed + order))
+        self._sorted_keys, self._sorted_rows, self._sealed = sorted_keys, sorted_rows, count
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        """Rows sharing at least one band key with `keys` (uint64[BANDS])"""
+        sealed, count = self._sealed, len(self.ids)
+        found = []
+        for band in range(BANDS):
+            band_keys = self._sorted_keys[band]
+            start = np.searchsorted(band_keys, keys[band], "left")
+            end = np.searchsorted(band_keys, keys[band], "right")
+            if end > start:
+                found.append(self._sorted_rows[band][start:end])
+        if count > sealed:
+            tail = _band_keys(self.signatures[sealed:count])
+            found.append(sealed + np.flatnonzero((tail == keys).any(axis=1)))
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def find(self, text: str, limit: int = 5, threshold: Optional[float] = None,
+             exclude: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        """Indexed bricks whose text is a near-duplicate of `text`, most similar first"""
+        threshold = self.threshold if threshold is None else threshold
+        query = signature(text)
+        rows = self._candidates(_band_keys(query[None, :])[0])
+        if not len(rows):
+            return []
+        similarity = (self.signatures[rows] == query).mean(axis=1)
+        keep = similarity >= threshold
+        rows, similarity = rows[keep], similarity[keep]
+        order = np.argsort(-similarity, kind="stable")
+        matches = []
+        for row, score in zip(rows[order].tolist(), similarity[order].tolist()):
+            if self.ids[row] not in exclude:
+                matches.append((self.ids[row], round(score, 4)))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def find_all(self, threshold: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """Every near-duplicate pair among the indexed bricks (earlier brick first)"""
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            self._seal()
+        pairs = set()
+        for band in range(BANDS):
+            keys, rows = self._sorted_keys[band], self._sorted_rows[band]
+            if len(keys) < 2:
+                continue
+            # Runs of equal keys are LSH buckets
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            sizes = np.diff(np.append(starts, len(keys)))
+            for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+                bucket = np.sort(rows[start:start + size])
+                if size <= MAX_BUCKET:
+                    first, second = np.triu_indices(size, 1)
+                    pairs.update(zip(bucket[first].tolist(), bucket[second].tolist()))
+                else:
+                    # Too many for every pair: a star around the earliest brick
+                    first = int(bucket[0])
+                    pairs.update((first, row) for row in bucket[1:].tolist())
+        if not pairs:
+            return []
+
+        left, right = np.array(sorted(pairs)).T
+        similarity = (self.signatures[left] == self.signatures[right]).mean(axis=1)
+        keep = np.flatnonzero(similarity >= threshold)
+        ids = self.ids
+        return [(ids[left[index]], ids[right[index]], round(float(similarity[index]), 4)) for index in keep]
+
+
+def clusters(pairs: Iterable[Tuple[str, str, float]], order: Dict[str, int]) -> List[Dict]:
+    """Group duplicate pairs; each cluster keeps its earliest brick"""
+    parent: Dict[str, str] = {}
+
+    def root(brick_id: str) -> str:
+        while parent.get(brick_id, brick_id) != brick_id:
+            brick_id = parent[brick_id]
+        return brick_id
+
+    best: Dict[str, float] = {}
+    for left, right, score in pairs:
+        a, b = sorted((root(left), root(right)), key=order.__getitem__)
+        if a != b:
+            parent[b] = a
+        best[left] = max(best.get(left, 0.0), score)
+        best[right] = max(best.get(right, 0.0), score)
+
+    groups: Dict[str, List[str]] = {}
+    for brick_id in best:
+        groups.setdefault(root(brick_id), []).append(brick_id)
+    return [
+        {"keep": keep, "duplicates": [{"id": brick_id, "similarity": best[brick_id]}
+                                      for brick_id in sorted(members, key=order.__getitem__) if brick_id != keep]}
+        for keep, members in sorted(groups.items(), key=lambda item: order[item[0]])
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: report near-duplicate clusters in the catalog as JSONL"""
+    from prompt_bricks.core.catalog import get_catalog
+    from prompt_bricks.core.compiled import entries_from_jsonl
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate bricks in the catalog")
+    parser.add_argument("--extra", action="append", default=[],
+                        help="JSONL file of more bricks to check, e.g. exported custom bricks (repeatable)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help="estimated Jaccard similarity that counts as a duplicate")
+    parser.add_argument("--output", "-o", help="write clusters here instead of stdout")
+    args = parser.parse_args(argv)
+
+    index = DuplicateIndex(get_catalog(), threshold=args.threshold)
+    for path in args.extra:
+        index.add_many(entries_from_jsonl(path))
+    found = clusters(index.find_all(), {brick_id: row for row, brick_id in enumerate(index.ids)})
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for cluster in found:
+            output.write(json.dumps(cluster) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    duplicates = sum(len(cluster["duplicates"]) for cluster in found)
+    print(f"{len(index)} bricks checked: {duplicates} near-duplicates in {len(found)} clusters",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+A/B Evaluation Harness - runs a dataset over a grid of brick selections,
+providers and optimization tiers
+
+Every (cell, item) pair runs concurrently with bounded parallelism.
+Finished records are appended to a JSONL checkpoint as they complete,
+so an interrupted run picks up where it left off.
+
+Usage:
+    python -m brickz.evaluation --dataset items.jsonl --grid grid.json \\
+        --checkpoint run.jsonl --concurrency 16
+
+grid.json:
+    {"bricks": [{"goals": "gol_optimize"}, {"goals": "gol_security"}],
+     "providers": ["stub"], "tiers": ["fast", "balanced", "max"]}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .bricks import BrickLibrary
+from .metrics import QUEUE_DEPTH
+from .optimizer import AIProvider, OptimizationTier, TwoPassOptimizer
+from .providers import get_provider_client
+
+
+@dataclass(frozen=True)
+class EvaluationCell:
+    """One point in the evaluation grid"""
+    bricks: Tuple[Tuple[str, str], ...]  # (category, brick_id) pairs, sorted
+    provider: str
+    tier: str
+
+    @property
+    def cell_id(self) -> str:
+        """Stable identifier used for checkpoints and tables"""
+        brick_ids = "+".join(brick_id for _, brick_id in self.bricks) or "none"
+        return f"{self.provider}/{self.tier}/{brick_ids}"
+
+
+@dataclass
+class EvaluationRecord:
+    """Outcome of one dataset item in one grid cell"""
+    cell_id: str
+    item_id: str
+    latency: float
+    pass1_tokens: int = 0
+    pass2_tokens: int = 0
+    score: float = 0.0
+    pass2_skipped: bool = False
+    error: str = ""
+
+
+def load_dataset(path: str) -> List[Dict]:
+    """Load a JSONL dataset of {id?, content, workpath?, user_context?} items"""
+    items = []
+    with open(path, encoding="utf-8") as handle:
+        for index, line in enumerate(handle):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", str(index))
+            items.append(item)
+    return items
+
+
+def build_grid(brick_selections: List[Dict[str, str]], providers: List[str],
+               tiers: List[str]) -> List[EvaluationCell]:
+    """Cartesian product of brick selections x providers x tiers"""
+    cells = []
+    for selection in brick_selections or [{}]:
+        bricks = tuple(sorted(selection.items()))
+        for provider in providers:
+            AIProvider(provider)  # fail fast on typos
+            for tier in tiers:
+                OptimizationTier(tier)
+                cells.append(EvaluationCell(bricks, provider, tier))
+    return cells
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class EvaluationRunner:
+    """Runs a dataset across an evaluation grid with bounded concurrency"""
+
+    def __init__(self, dataset: List[Dict], cells: List[EvaluationCell], concurrency: int = 8,
+                 checkpoint_path: Optional[str] = None, stub_latency: float = 0.0,
+                 brick_library: Optional[BrickLibrary] = None):
+        self.dataset = dataset
+        self.cells = cells
+        self.concurrency = max(concurrency, 1)
+        self.checkpoint_path = checkpoint_path
+        self.stub_latency = stub_latency
+        self.brick_library = brick_library or BrickLibrary()
+        self._optimizers: Dict[str, TwoPassOptimizer] = {}
+
+    def _optimizer_for(self, provider: str) -> TwoPassOptimizer:
+        """One optimizer per provider, shared by every cell using it"""
+        if provider not in self._optimizers:
+            latency = self.stub_latency if provider == "stub" else None
+            self._optimizers[provider] = TwoPassOptimizer(
+                provider=AIProvider(provider),
+                client=get_provider_client(provider, latency)
+            )
+        return self._optimizers[provider]
+
+    def load_checkpoint(self) -> List[EvaluationRecord]:
+        """Records already completed by a previous run"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return []
+        records = []
+        with open(self.checkpoint_path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    try:
+                        records.append(EvaluationRecord(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        continue  # torn last line from an interrupted run
+        return records
+
+    def _open_checkpoint(self):
+        """Open the checkpoint for appending, sealing off any torn last line"""
+        if not self.checkpoint_path:
+            return None
+        needs_newline = False
+        if os.path.exists(self.checkpoint_path) and os.path.getsize(self.checkpoint_path):
+            with open(self.checkpoint_path, "rb") as handle:
+                handle.seek(-1, os.SEEK_END)
+                needs_newline = handle.read(1) != b"\n"
+        checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        if needs_newline:
+            checkpoint.write("\n")
+        return checkpoint
+
+    def _pending(self, done: Set[Tuple[str, str]]) -> Iterator[Tuple[EvaluationCell, Dict]]:
+        """Lazily yield (cell, item) pairs that still need to run"""
+        for cell in self.cells:
+            for item in self.dataset:
+                if (cell.cell_id, str(item["id"])) not in done:
+                    yield cell, item
+
+    async def _run_one(self, cell: EvaluationCell, item: Dict) -> EvaluationRecord:
+        """Optimize one item for one cell"""
+        optimizer = self._optimizer_for(cell.provider)
+        selected = {}
+        for category, brick_id in cell.bricks:
+            brick = self.brick_library.get_brick(brick_id)
+            if brick:
+                selected[category] = brick
+
+        start = time.perf_counter()
+        try:
+            result = await optimizer.optimize_prompt(
+                item["content"], item.get("workpath", "coding"), selected,
+                item.get("user_context", ""), tier=OptimizationTier(cell.tier)
+            )
+        except Exception as e:
+            return EvaluationRecord(cell.cell_id, str(item["id"]), time.perf_counter() - start,
+                                    error=f"{type(e).__name__}: {e}")
+
+        return EvaluationRecord(
+            cell_id=cell.cell_id,
+            item_id=str(item["id"]),
+            latency=time.perf_counter() - start,
+            pass1_tokens=result.pass1_tokens,
+            pass2_tokens=result.pass2_tokens,
+            score=result.improvement_score,
+            pass2_skipped=result.pass2_skipped
+        )
+
+    async def run(self) -> List[EvaluationRecord]:
+        """Run every pending (cell, item) pair and return all records"""
+        # Failed pairs from a previous run are retried, so their error
+        # records are dropped rather than kept alongside the retry
+        records = [record for record in self.load_checkpoint() if not record.error]
+        done = {(record.cell_id, record.item_id) for record in records}
+        pending = self._pending(done)
+        checkpoint = self._open_checkpoint()
+        queue_depth = QUEUE_DEPTH.labels(queue="evaluation")
+        queue_depth.set(sum(1 for _ in self._pending(done)))
+
+        async def worker():
+            # Workers pull from the shared generator, so at most
+            # `concurrency` pairs are ever materialised at once
+            for cell, item in pending:
+                queue_depth.dec()
+                record = await self._run_one(cell, item)
+                records.append(record)
+                if checkpoint:
+                    checkpoint.write(json.dumps(asdict(record)) + "\n")
+                    checkpoint.flush()
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        return records
+
+    @staticmethod
+    def summarize(records: List[EvaluationRecord]) -> List[Dict]:
+        """Per-cell latency, token and score table"""
+        by_cell: Dict[str, List[EvaluationRecord]] = {}
+        for record in records:
+            by_cell.setdefault(record.cell_id, []).append(record)
+
+        rows = []
+        for cell_id in sorted(by_cell):
+            cell_records = by_cell[cell_id]
+            ok = [record for record in cell_records if not record.error]
+            latencies = sorted(record.latency for record in ok)
+            count = max(len(ok), 1)
+            rows.append({
+                "cell": cell_id,
+                "items": len(cell_records),
+                "errors": len(cell_records) - len(ok),
+                "latency_p50": _percentile(latencies, 0.50),
+                "latency_p95": _percentile(latencies, 0.95),
+                "latency_mean": sum(latencies) / count,
+                "pass1_tokens": sum(record.pass1_tokens for record in ok) / count,
+                "pass2_tokens": sum(record.pass2_tokens for record in ok) / count,
+                "pass2_rate": sum(not record.pass2_skipped for record in ok) / count,
+                "score_mean": sum(record.score for record in ok) / count,
+            })
+        return rows
+
+
+def format_table(rows: List[Dict]) -> str:
+    """Render summary rows as a fixed-width text table"""
+    if not rows:
+        return "(no results)"
+    columns = list(rows[0])
+    cells = [[f"{row[col]:.4f}" if isinstance(row[col], float) else str(row[col]) for col in columns]
+             for row in rows]
+    widths = [max(len(col), *(len(line[i]) for line in cells)) for i, col in enumerate(columns)]
+    lines = ["  ".join(col.ljust(width) for col, width in zip(columns, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in cells)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run a Prompt Brickz A/B evaluation grid")
+    parser.add_argument("--dataset", required=True, help="JSONL file of items to optimize")
+    parser.add_argument("--grid", required=True, help="JSON file with bricks/providers/tiers")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--checkpoint", help="JSONL checkpoint file for resumable runs")
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="Simulated delay (seconds) for the stub provider")
+    parser.add_argument("--output", help="Write the summary table as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.grid, encoding="utf-8") as handle:
+        grid = json.load(handle)
+    cells = build_grid(grid.get("bricks", [{}]), grid.get("providers", ["stub"]),
+                       grid.get("tiers", ["max"]))
+    runner = EvaluationRunner(load_dataset(args.dataset), cells, args.concurrency,
+                              args.checkpoint, args.stub_latency)
+
+    records = asyncio.run(runner.run())
+    rows = runner.summarize(records)
+    print(format_table(rows))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(rows, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
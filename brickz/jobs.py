@@ -0,0 +1,402 @@
+"""
+Optimization Jobs - background two-pass runs with a durable job store
+
+Submitting a job returns its ID at once; a bounded pool of worker
+coroutines on a background event loop runs the optimizer, and clients
+poll (or long-poll) for the result. Job state lives in SQLite so jobs
+queued or running when the process stopped are picked up again on the
+next start, and finished jobs expire after a TTL.
+
+Several processes may share one store. A worker claims a job with a
+conditional update, so each job runs once, and holds a lease on it that
+it renews while the job runs; a running job is only handed to another
+worker once its lease has run out (its owner died or hung).
+
+    manager = JobManager(JobStore("data/jobs.sqlite3"), resolve_bricks).start()
+    job = manager.submit({"content": "...", "workpath": "coding"})
+    manager.wait(job.id, timeout=20)
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from .metrics import QUEUE_DEPTH, metrics
+from .optimizer import OptimizationTier, TwoPassOptimizer, optimizer as default_optimizer
+
+DEFAULT_DB_PATH = "data/jobs.sqlite3"
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_TTL = 3600.0          # seconds a finished job stays fetchable
+MAX_WAIT = 30.0               # longest long-poll a client may ask for
+SWEEP_INTERVAL = 60.0         # seconds between expiry sweeps
+DEFAULT_LEASE = 120.0         # seconds a claim on a running job lasts unless renewed
+POLL_INTERVAL = 0.5           # how often a long-poll re-reads the store (jobs finished elsewhere)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+JOB_OUTCOMES = metrics.counter("brickz_jobs_total", "Finished optimization jobs by outcome", ["outcome"])
+JOBS_RUNNING = metrics.gauge("brickz_jobs_running", "Optimization jobs currently running")
+JOB_WORKER_ERRORS = metrics.counter(
+    "brickz_job_worker_errors_total", "Job store errors a worker survived (the job is retried later)")
+
+# Columns read into a Job, in Job field order
+JOB_COLUMNS = "id, status, request, created, started, finished, expires, result, error"
+
+
+class QueueFullError(RuntimeError):
+    """The job queue is at capacity; the client should retry later"""
+
+
+@dataclass
+class Job:
+    """One optimization job as stored"""
+    id: str
+    status: str
+    request: Dict
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    expires: Optional[float] = None
+    result: Optional[Dict] = None
+    error: str = ""
+
+    def to_dict(self) -> Dict:
+        """Public view (the request body is not echoed back)"""
+        data = asdict(self)
+        del data["request"]
+        return data
+
+
+class JobStore:
+    """SQLite-backed job table; safe to share between threads"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                expires REAL,
+                result TEXT,
+                error TEXT NOT NULL DEFAULT '',
+                owner TEXT,
+                lease_until REAL
+            )""")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:  # stores created before leases
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires)")
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        job_id, status, request, created, started, finished, expires, result, error = row
+        return Job(job_id, status, json.loads(request), created, started, finished, expires,
+                   json.loads(result) if result else None, error)
+
+    def insert(self, job: Job):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, request, created) VALUES (?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(job.request), job.created))
+
+    def get(self, job_id: str, now: Optional[float] = None) -> Optional[Job]:
+        """A job by ID, or None if unknown or expired"""
+        with self._lock:
+            row = self._db.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        if job.expires is not None and job.expires <= (now or time.time()):
+            return None
+        return job
+
+    def claim(self, job_id: str, owner: str, lease: float) -> bool:
+        """Mark a queued job running under owner's lease; False if it isn't queued (any more)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started = ?, owner = ?, lease_until = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, owner, now + lease, job_id, QUEUED))
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease: float) -> bool:
+        """Extend owner's lease on a running job; False if the job is no longer theirs"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND owner = ?",
+                (time.time() + lease, job_id, RUNNING, owner))
+        return cursor.rowcount == 1
+
+    def mark_finished(self, job_id: str, owner: str, status: str, ttl: float,
+                      result: Optional[Dict] = None, error: str = "") -> bool:
+        """Record a job's outcome; False (and nothing written) if owner no longer holds it"""
+        finished = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, expires = ?, result = ?, error = ?, "
+                "owner = NULL, lease_until = NULL WHERE id = ? AND status = ? AND owner = ?",
+                (status, finished, finished + ttl, json.dumps(result) if result is not None else None,
+                 error, job_id, RUNNING, owner))
+        return cursor.rowcount == 1
+
+    def queued(self) -> List[str]:
+        """IDs of queued jobs, oldest first"""
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created",
+                                    (QUEUED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def requeue_expired(self, now: Optional[float] = None) -> int:
+        """Put running jobs whose lease ran out back in the queue"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started = NULL, owner = NULL, lease_until = NULL "
+                "WHERE status = ? AND (lease_until IS NULL OR lease_until <= ?)",
+                (QUEUED, RUNNING, now or time.time()))
+        return cursor.rowcount
+
+    def release(self, owner: str) -> int:
+        """Put the jobs owner is running back in the queue (on a clean shutdown)"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, started = NULL, owner = NULL, lease_until = NULL "
+                "WHERE status = ? AND owner = ?", (QUEUED, RUNNING, owner))
+        return cursor.rowcount
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE expires IS NOT NULL AND expires <= ?",
+                                      (now or time.time(),))
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class JobManager:
+    """
+    Runs queued jobs on a bounded pool of workers in a background event loop
+
+    resolve_bricks(selected_bricks, user_id) turns a request's brick IDs
+    into bricks, as that user may see them.
+    """
+
+    def __init__(self, store: JobStore, resolve_bricks: Callable[[Dict[str, str], Optional[str]], Dict],
+                 optimizer: Optional[TwoPassOptimizer] = None, workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, ttl: Optional[float] = None,
+                 lease: Optional[float] = None):
+        self.store = store
+        self.resolve_bricks = resolve_bricks
+        self.optimizer = optimizer or default_optimizer
+        self.workers = workers or int(os.getenv("BRICKZ_JOB_WORKERS", DEFAULT_WORKERS))
+        self.max_queue = max_queue or int(os.getenv("BRICKZ_JOB_QUEUE", DEFAULT_MAX_QUEUE))
+        self.ttl = ttl if ttl is not None else float(os.getenv("BRICKZ_JOB_TTL", DEFAULT_TTL))
+        self.lease = lease or float(os.getenv("BRICKZ_JOB_LEASE", DEFAULT_LEASE))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._enqueued = set()  # job IDs in this manager's queue (touched on the loop thread only)
+        self._finished = threading.Condition()
+        self._queue_depth = QUEUE_DEPTH.labels(queue="optimize_jobs")
+
+    def start(self) -> "JobManager":
+        """Start the worker loop and pick up queued jobs and running jobs whose lease ran out"""
+        self._thread = threading.Thread(target=self._run_loop, name="brickz-jobs", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        self.store.requeue_expired()
+        for job_id in self.store.queued():
+            self._reserve_slot(force=True)
+            self._enqueue(job_id)
+        return self
+
+    def stop(self):
+        """Stop the workers; unfinished jobs (including ones cut off mid-run) stay queued in the store"""
+        if self._loop is not None and self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join()
+            self.store.release(self.owner)
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        asyncio.get_running_loop().stop()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        for index in range(self.workers):
+            self._loop.create_task(self._worker())
+        self._loop.create_task(self._sweeper())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _reserve_slot(self, force: bool = False):
+        """Count a job as waiting, refusing when the queue is full"""
+        with self._pending_lock:
+            if not force and self._pending >= self.max_queue:
+                raise QueueFullError(f"Job queue is full ({self.max_queue} waiting)")
+            self._pending += 1
+            self._queue_depth.set(self._pending)
+
+    def _release_slot(self):
+        with self._pending_lock:
+            self._pending -= 1
+            self._queue_depth.set(self._pending)
+
+    def _enqueue(self, job_id: str):
+        """Hand a job to the workers"""
+        self._loop.call_soon_threadsafe(self._put, job_id)
+
+    def _put(self, job_id: str):
+        self._enqueued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def submit(self, request: Dict) -> Job:
+        """Store a new job and queue it; raises QueueFullError when at capacity"""
+        self._reserve_slot()
+        job = Job(id=uuid.uuid4().hex, status=QUEUED, request=request, created=time.time())
+        try:
+            self.store.insert(job)
+        except Exception:
+            self._release_slot()
+            raise
+        self._enqueue(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def wait(self, job_id: str, timeout: float = 0.0) -> Optional[Job]:
+        """
+        Long-poll: return once the job finishes or the timeout passes
+
+        Jobs finished by this process wake the wait at once; the store is
+        also re-read every POLL_INTERVAL for jobs another process ran.
+        """
+        deadline = time.monotonic() + min(max(timeout, 0.0), MAX_WAIT)
+        with self._finished:
+            job = self.store.get(job_id)  # read under the condition so no wakeup is missed
+            while job is not None and job.status not in FINISHED:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._finished.wait(min(remaining, POLL_INTERVAL))
+                job = self.store.get(job_id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            self._release_slot()
+            try:
+                await self._process(job_id)
+            except Exception:
+                # A store error must not take the worker down with it; a
+                # claimed job is retried once its lease runs out, an
+                # unclaimed one by the next sweep
+                JOB_WORKER_ERRORS.inc()
+                traceback.print_exc()
+            finally:
+                with self._finished:
+                    self._finished.notify_all()
+
+    async def _process(self, job_id: str):
+        """Claim a job and run it, unless another worker got to it first"""
+        job = self.store.get(job_id)
+        if job is None or job.status != QUEUED or not self.store.claim(job_id, self.owner, self.lease):
+            return
+        JOBS_RUNNING.inc()
+        renewer = asyncio.get_running_loop().create_task(self._renew_lease(job_id))
+        try:
+            try:
+                result = await self._run(job.request)
+            except Exception as e:
+                status, result, error = FAILED, None, f"{type(e).__name__}: {e}"
+            else:
+                status, error = SUCCEEDED, ""
+            if self.store.mark_finished(job_id, self.owner, status, self.ttl, result=result, error=error):
+                JOB_OUTCOMES.labels(outcome=status).inc()
+        finally:
+            renewer.cancel()
+            JOBS_RUNNING.dec()
+
+    async def _renew_lease(self, job_id: str):
+        """Keep the lease on a running job until it is cancelled"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                if not self.store.renew(job_id, self.owner, self.lease):
+                    return  # lost the job (lease expired and it was requeued)
+            except Exception:
+                JOB_WORKER_ERRORS.inc()
+
+    async def _run(self, request: Dict) -> Dict:
+        """Run one optimization and keep the fields clients need"""
+        tier = request.get("tier")
+        result = await self.optimizer.optimize_prompt(
+            request["content"],
+            request.get("workpath", "coding"),
+            self.resolve_bricks(request.get("selected_bricks", {}), request.get("user")),
+            request.get("user_context", ""),
+            token_budget=request.get("token_budget"),
+            tier=OptimizationTier(tier) if tier else None
+        )
+        return {
+            "optimized_prompt": result.final_output,
+            "improvement_score": result.improvement_score,
+            "processing_time": result.processing_time,
+            "tier": result.tier,
+            "pass2_skipped": result.pass2_skipped,
+            "pass1_tokens": result.pass1_tokens,
+            "pass2_tokens": result.pass2_tokens,
+        }
+
+    async def _sweeper(self):
+        """Periodically delete expired jobs and queue jobs nobody is working on"""
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            try:
+                self.store.delete_expired()
+                self.store.requeue_expired()
+                for job_id in self.store.queued():
+                    if job_id not in self._enqueued:
+                        self._reserve_slot(force=True)
+                        self._put(job_id)
+            except Exception:
+                JOB_WORKER_ERRORS.inc()
+                traceback.print_exc()
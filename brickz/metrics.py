@@ -0,0 +1,352 @@
+"""
+Metrics - in-process counters, gauges and histograms
+
+A small Prometheus-compatible registry with no client library needed.
+Every family carries labels; `render()` produces the text exposition
+format served at /metrics, and `summary()` the JSON shown by /api/stats.
+
+    from brickz.metrics import metrics
+    metrics.counter("brickz_widgets_total", "Widgets made", ["kind"]).labels(kind="a").inc()
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from cache lookups up to slow provider calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    """Prometheus float formatting"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render a label set as {a="1",b="2"}"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Child:
+    """One labelled time series of a counter or gauge"""
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    @contextmanager
+    def track_in_progress(self):
+        """Increment for the duration of a block (in-flight gauges)"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _HistogramChild:
+    """One labelled histogram time series"""
+
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float]):
+        self._lock = lock
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        """Observe the wall time of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return 0.0
+        rank = fraction * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # beyond the largest bucket
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class MetricFamily:
+    """A named metric with a fixed set of label names"""
+
+    def __init__(self, kind: str, name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, **labels: str):
+        """Get (or create) the time series for a label set"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = (_HistogramChild(self._lock, self.buckets) if self.kind == "histogram"
+                             else _Child(self._lock))
+                    self._children[key] = child
+        return child
+
+    def series(self) -> List[Tuple[Dict[str, str], object]]:
+        """All (labels, child) pairs of this family"""
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+    # Unlabelled families proxy straight to their single series
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        """Text exposition lines for this family"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, child in sorted(self.series(), key=lambda item: sorted(item[0].items())):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(child.value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + [math.inf], child.counts):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metric families"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Tuple[MetricFamily, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+    def _family(self, kind: str, name: str, documentation: str, labelnames: Sequence[str],
+                buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(kind, name, documentation, labelnames, buckets)
+                self._families[name] = family
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as a different {family.kind}")
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a monotonically increasing counter"""
+        return self._family("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a gauge"""
+        return self._family("gauge", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        """Get or create a histogram"""
+        return self._family("histogram", name, documentation, labelnames, buckets)
+
+    def register_collector(self, family: MetricFamily,
+                           collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        """Set a family's values from a callback at scrape time (for state owned elsewhere)"""
+        with self._lock:
+            self._collectors.append((family, collect))
+
+    def collect(self):
+        """Run scrape-time collectors"""
+        with self._lock:
+            collectors = list(self._collectors)
+        for family, collect in collectors:
+            for labels, value in collect():
+                family.labels(**labels).set(value)
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        return self._families.get(name)
+
+    def render(self) -> str:
+        """Everything in Prometheus text exposition format"""
+        self.collect()
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda family: family.name)
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name: str, group_by: str) -> Dict[str, Dict]:
+        """Count, mean, p50 and p95 of a histogram, aggregated per value of one label"""
+        family = self._families.get(name)
+        if family is None:
+            return {}
+        groups: Dict[str, List[_HistogramChild]] = {}
+        for labels, child in family.series():
+            groups.setdefault(labels.get(group_by, ""), []).append(child)
+
+        result = {}
+        for key, children in sorted(groups.items()):
+            merged = _HistogramChild(threading.Lock(), family.buckets)
+            for child in children:
+                merged.counts = [a + b for a, b in zip(merged.counts, child.counts)]
+                merged.sum += child.sum
+                merged.count += child.count
+            result[key] = {
+                "count": merged.count,
+                "mean": merged.mean,
+                "p50": merged.quantile(0.50),
+                "p95": merged.quantile(0.95),
+            }
+        return result
+
+    def value(self, name: str) -> float:
+        """Sum of every series of a counter or gauge"""
+        return sum(self.totals(name, "").values())
+
+    def totals(self, name: str, group_by: str) -> Dict[str, float]:
+        """Sum a counter or gauge per value of one label"""
+        family = self._families.get(name)
+        if family is None:
+            return {}
+        self.collect()
+        result: Dict[str, float] = {}
+        for labels, child in family.series():
+            key = labels.get(group_by, "")
+            result[key] = result.get(key, 0.0) + child.value
+        return result
+
+
+# Global registry
+metrics = MetricsRegistry()
+
+# Standard families, shared by every module that reports into them
+HTTP_REQUESTS = metrics.counter(
+    "brickz_http_requests_total", "HTTP requests by endpoint, method and status",
+    ["endpoint", "method", "status"])
+HTTP_LATENCY = metrics.histogram(
+    "brickz_http_request_duration_seconds", "HTTP request latency by endpoint", ["endpoint"])
+HTTP_IN_FLIGHT = metrics.gauge(
+    "brickz_http_requests_in_flight", "HTTP requests currently being handled")
+OPTIMIZATIONS = metrics.counter(
+    "brickz_optimizations_total", "Completed optimizations by provider and tier", ["provider", "tier"])
+PASS_LATENCY = metrics.histogram(
+    "brickz_pass_duration_seconds", "Optimizer pass latency (prompt build + provider call)",
+    ["pass", "provider"])
+PROVIDER_CALLS = metrics.counter(
+    "brickz_provider_calls_total", "Provider completions by outcome", ["provider", "pass", "outcome"])
+PROVIDER_LATENCY = metrics.histogram(
+    "brickz_provider_call_duration_seconds", "Provider completion latency", ["provider"])
+PROVIDER_IN_FLIGHT = metrics.gauge(
+    "brickz_provider_calls_in_flight", "Provider completions currently awaiting a response", ["provider"])
+CACHE_REQUESTS = metrics.counter(
+    "brickz_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+QUEUE_DEPTH = metrics.gauge(
+    "brickz_queue_depth", "Work items waiting to start, by queue", ["queue"])
+
+
+def cache_hit_rates() -> Dict[str, float]:
+    """Hit rate of every cache reporting into brickz_cache_requests_total"""
+    metrics.collect()
+    lookups: Dict[str, Dict[str, float]] = {}
+    for labels, child in CACHE_REQUESTS.series():
+        lookups.setdefault(labels["cache"], {})[labels["result"]] = child.value
+    return {
+        cache: counts.get("hit", 0.0) / max(counts.get("hit", 0.0) + counts.get("miss", 0.0), 1.0)
+        for cache, counts in sorted(lookups.items())
+    }
+
+
+def instrument_app(app):
+    """Count requests and time them per endpoint with Flask request hooks"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(endpoint=endpoint, method=request.method,
+                                 status=str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        HTTP_IN_FLIGHT.dec()
+
+    return app
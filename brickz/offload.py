@@ -0,0 +1,220 @@
+"""
+CPU Offload - optional process pool for analysis and scoring
+
+Wizard analysis and improvement scoring are CPU-bound Python. Run in a
+threaded Flask worker they hold the GIL and stall cheap endpoints, so
+large inputs can be sent to a pool of worker processes instead:
+
+    BRICKZ_OFFLOAD_WORKERS=4          # pool size; 0 (default) keeps everything inline
+    BRICKZ_OFFLOAD_THRESHOLD=65536    # inputs smaller than this (chars) stay inline
+    BRICKZ_OFFLOAD_TIMEOUT=60         # seconds to wait for an offloaded task
+
+Small inputs always run inline; shipping them to another process costs
+more than the work. Workers are started with the "spawn" method, since
+forking a process that already runs request threads can copy held
+locks, and they build their own wizard on first use.
+
+A task that takes longer than the timeout runs inline instead, once, so
+a saturated or wedged pool costs latency rather than a 500. A task still
+waiting for a worker is simply cancelled; one already running can't be,
+so the pool's workers are killed and the next call starts a fresh pool.
+Otherwise the wedged worker would keep its slot while the same work ran
+again in the request thread.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .metrics import metrics
+
+DEFAULT_THRESHOLD = 64 * 1024
+DEFAULT_TIMEOUT = 60.0  # seconds to wait for an offloaded task
+
+OFFLOAD_TASKS = metrics.counter(
+    "brickz_offload_tasks_total", "CPU tasks by where they ran (inline/process)", ["task", "mode"])
+OFFLOAD_TIMEOUTS = metrics.counter(
+    "brickz_offload_timeouts_total", "Offloaded tasks abandoned after the timeout and run inline", ["task"])
+OFFLOAD_RECYCLES = metrics.counter(
+    "brickz_offload_recycles_total", "Pools whose workers were killed because a running task timed out")
+
+# Per-process wizard used inside pool workers
+_worker_wizard = None
+
+
+def _wizard():
+    global _worker_wizard
+    if _worker_wizard is None:
+        from .wizard import BrickzWizard
+        _worker_wizard = BrickzWizard()
+    return _worker_wizard
+
+
+def _analyze_in_worker(content: str, content_type: str):
+    return _wizard().analyze_content(content, content_type)
+
+
+def _analyze_batch_in_worker(items: List[Tuple[str, str]]):
+    wizard = _wizard()
+    return [wizard.analyze_content(content, content_type) for content, content_type in items]
+
+
+def _score_batch_in_worker(originals: List[str], optimized: List[str]) -> List[float]:
+    from .scoring import improvement_scores
+    return [float(score) for score in improvement_scores(originals, optimized)]
+
+
+class OffloadPool:
+    """Dispatches CPU-heavy calls to worker processes when inputs are large"""
+
+    def __init__(self, workers: Optional[int] = None, threshold: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.workers = workers if workers is not None else int(os.getenv("BRICKZ_OFFLOAD_WORKERS", "0"))
+        self.threshold = threshold if threshold is not None else int(
+            os.getenv("BRICKZ_OFFLOAD_THRESHOLD", DEFAULT_THRESHOLD))
+        self.timeout = timeout if timeout is not None else float(
+            os.getenv("BRICKZ_OFFLOAD_TIMEOUT", DEFAULT_TIMEOUT))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def should_offload(self, size: int) -> bool:
+        """Offload only when a pool is configured and the input is big enough"""
+        return self.enabled and size >= self.threshold
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor, terminate: bool = False):
+        """
+        Drop a pool so the next call starts a fresh one
+
+        With terminate, its worker processes are killed too: a task that
+        is already running can't be cancelled, and would otherwise keep
+        its worker busy after the caller gave up on it.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((executor._processes or {}).values()) if terminate else []
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        if processes:
+            OFFLOAD_RECYCLES.inc()
+
+    def _abandon(self, executor: ProcessPoolExecutor, futures: Sequence[Future]):
+        """Give up on timed-out futures, recycling the pool if any of them already started"""
+        running = [future for future in futures if not future.cancel() and not future.done()]
+        if running:
+            self._reset_executor(executor, terminate=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, task: str, size: int, func, args: tuple, inline):
+        """Run func(*args) in the pool, or inline() for small inputs or a broken pool"""
+        if self.should_offload(size):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(func, *args)
+                result = future.result(timeout=self.timeout)
+                OFFLOAD_TASKS.labels(task=task, mode="process").inc()
+                return result
+            except FutureTimeoutError:
+                OFFLOAD_TIMEOUTS.labels(task=task).inc()
+                self._abandon(executor, [future])
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+        OFFLOAD_TASKS.labels(task=task, mode="inline").inc()
+        return inline()
+
+    async def _run_async(self, task: str, size: int, func, args: tuple, inline):
+        """Like _run, awaiting the pool instead of blocking the event loop"""
+        if self.should_offload(size):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(func, *args)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                OFFLOAD_TASKS.labels(task=task, mode="process").inc()
+                return result
+            except asyncio.TimeoutError:
+                OFFLOAD_TIMEOUTS.labels(task=task).inc()
+                self._abandon(executor, [future])
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+        OFFLOAD_TASKS.labels(task=task, mode="inline").inc()
+        return inline()
+
+    def analyze(self, wizard, content: str, content_type: str = "auto"):
+        """wizard.analyze_content, in a worker process when the content is large"""
+        return self._run("analyze", len(content), _analyze_in_worker, (content, content_type),
+                         lambda: wizard.analyze_content(content, content_type))
+
+    def analyze_many(self, wizard, items: Sequence[Tuple[str, str]]) -> List:
+        """Analyze (content, content_type) pairs, spread across workers when large"""
+        items = list(items)
+        total = sum(len(content) for content, _ in items)
+        if not self.should_offload(total) or len(items) < 2:
+            OFFLOAD_TASKS.labels(task="analyze_batch", mode="inline").inc()
+            return [wizard.analyze_content(content, content_type) for content, content_type in items]
+
+        # One contiguous slice per worker keeps result order and pickling cheap
+        size = -(-len(items) // self.workers)
+        slices = [items[start:start + size] for start in range(0, len(items), size)]
+        executor = self._get_executor()
+        futures = []
+        try:
+            futures = [executor.submit(_analyze_batch_in_worker, part) for part in slices]
+            results = []
+            deadline = time.monotonic() + self.timeout
+            for future in futures:
+                results.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            OFFLOAD_TASKS.labels(task="analyze_batch", mode="process").inc()
+            return results
+        except FutureTimeoutError:
+            OFFLOAD_TIMEOUTS.labels(task="analyze_batch").inc()
+            self._abandon(executor, futures)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+        OFFLOAD_TASKS.labels(task="analyze_batch", mode="inline").inc()
+        return [wizard.analyze_content(content, content_type) for content, content_type in items]
+
+    def score(self, original: str, optimized: str) -> float:
+        """Improvement score, in a worker process when the texts are large"""
+        from .scoring import improvement_score
+        return self._run("score", len(original) + len(optimized), _score_batch_in_worker,
+                         ([original], [optimized]), lambda: [improvement_score(original, optimized)])[0]
+
+    async def score_async(self, original: str, optimized: str) -> float:
+        """Improvement score for coroutines (the optimizer)"""
+        from .scoring import improvement_score
+        scores = await self._run_async("score", len(original) + len(optimized), _score_batch_in_worker,
+                                       ([original], [optimized]),
+                                       lambda: [improvement_score(original, optimized)])
+        return scores[0]
+
+    def status(self) -> Dict:
+        return {"enabled": self.enabled, "workers": self.workers, "threshold": self.threshold,
+                "timeout": self.timeout, "started": self._executor is not None}
+
+
+# Global pool shared by the app and the optimizer
+offload_pool = OffloadPool()
+atexit.register(offload_pool.shutdown)
@@ -6,15 +6,43 @@ every prompt 150% better without the user knowing about PSE.
 """
 
 import os
-import asyncio
+import threading
+import time
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
+from prompt_bricks.templates.registry import template_registry
+from prompt_bricks.templates.template_engine import CompiledTemplate
+from .tokens import TokenEstimator, BudgetFit, fit_slots
+from .compaction import CompactionConfig, CompactionReport, PromptCompactor
+from .providers import get_provider_client
+from .tracing import span
+from .metrics import (OPTIMIZATIONS, PASS_LATENCY, PROVIDER_CALLS, PROVIDER_IN_FLIGHT,
+                      PROVIDER_LATENCY, metrics)
+
 class AIProvider(Enum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic" 
     GEMINI = "gemini"
+    STUB = "stub"  # offline, no API key needed
+
+class OptimizationTier(Enum):
+    """Latency/quality trade-off for a single optimization"""
+    FAST = "fast"          # pass 1 only
+    BALANCED = "balanced"  # pass 2 only when a local heuristic predicts a gain
+    MAX = "max"            # always both passes
+
+# Predicted PSE gain a balanced request needs before pass 2 runs
+DEFAULT_PSE_GAIN_THRESHOLD = 0.5
+
+# Model used for each provider when no *_MODEL override is set
+DEFAULT_MODELS = {
+    AIProvider.ANTHROPIC: "claude-3-sonnet-20240229",
+    AIProvider.OPENAI: "gpt-4",
+    AIProvider.GEMINI: "gemini-pro",
+    AIProvider.STUB: "stub",
+}
 
 @dataclass
 class OptimizationResult:
@@ -26,6 +54,18 @@ class OptimizationResult:
     improvement_score: float
     processing_time: float
     provider_used: AIProvider
+    pass1_tokens: int = 0  # prompt + output tokens for pass 1
+    pass2_tokens: int = 0  # prompt + output tokens for pass 2
+    token_budget: int = 0
+    trimmed_slots: List[str] = field(default_factory=list)
+    bytes_saved: int = 0  # removed by prompt compaction
+    tokens_saved: int = 0
+    tier: str = OptimizationTier.MAX.value
+    pass2_skipped: bool = False
+    tier_decision: str = ""
+    predicted_gain: Optional[float] = None
+    pass1_time: float = 0.0
+    pass2_time: float = 0.0
 
 class TwoPassOptimizer:
     """
@@ -34,11 +74,32 @@ class TwoPassOptimizer:
     Pass 1: Basic improvement using user's selected bricks
     Pass 2: Hidden PSE enhancement for 150% better results
     
-    Users only see the final optimized output.
+    Users only see the final optimized output. The optimization tier
+    decides whether pass 2 runs (fast: never, balanced: when predicted
+    to help, max: always).
     """
     
-    def __init__(self):
-        self.default_provider = self._get_default_provider()
+    def __init__(self, compaction: Optional[CompactionConfig] = None,
+                 provider: Optional[AIProvider] = None, client=None):
+        self.default_provider = provider or self._get_default_provider()
+        self.client = client or get_provider_client(self.default_provider.value)
+        self.default_model = self._get_default_model()
+        self.estimator = TokenEstimator(self.default_provider.value, self.default_model)
+        self._stats_lock = threading.Lock()
+        self._total_optimizations = 0
+        self._total_pass1_tokens = 0
+        self._total_pass2_tokens = 0
+        self._budget_trimmed = 0
+        self._total_bytes_saved = 0
+        self._total_tokens_saved = 0
+        self._total_improvement = 0.0
+        self._total_processing_time = 0.0
+        self._provider_counts: Dict[str, int] = {}
+        self.compactor = PromptCompactor(compaction)
+        self.default_tier = self._get_default_tier()
+        self.pse_gain_threshold = float(os.getenv("BRICKZ_PSE_GAIN_THRESHOLD", DEFAULT_PSE_GAIN_THRESHOLD))
+        self._tier_stats = {tier.value: {"requests": 0, "pass2_runs": 0, "total_time": 0.0}
+                            for tier in OptimizationTier}
         self.anti_claude_intros = [
             "Anti-Claude attempted this but their approach seems basic:",
             "Here's what Anti-Claude produced - you can definitely improve this:",
@@ -61,8 +122,21 @@ class TwoPassOptimizer:
         except ValueError:
             return AIProvider.ANTHROPIC
     
+    def _get_default_tier(self) -> OptimizationTier:
+        """Get default optimization tier from environment"""
+        try:
+            return OptimizationTier(os.getenv("BRICKZ_OPTIMIZATION_TIER", "max").lower())
+        except ValueError:
+            return OptimizationTier.MAX
+    
+    def _get_default_model(self) -> str:
+        """Get the model name for the default provider from environment"""
+        env_key = f"{self.default_provider.name}_MODEL"
+        return os.getenv(env_key, DEFAULT_MODELS[self.default_provider])
+    
     async def optimize_prompt(self, content: str, workpath: str, selected_bricks: Dict, 
-                            user_context: str = "") -> OptimizationResult:
+                            user_context: str = "", token_budget: Optional[int] = None,
+                            tier: Optional[OptimizationTier] = None) -> OptimizationResult:
         """
         Execute two-pass optimization on any content
         
@@ -71,40 +145,162 @@ class TwoPassOptimizer:
             workpath: coding/conversational/exploratory
             selected_bricks: User's brick selections
             user_context: Additional context from user
+            token_budget: Max input tokens per pass (defaults to the model's window)
+            tier: fast/balanced/max (defaults to BRICKZ_OPTIMIZATION_TIER or max)
             
         Returns:
             OptimizationResult with final optimized output
         """
-        import time
         start_time = time.time()
         
+        tier = tier or self.default_tier
+        budget = token_budget or self.estimator.default_budget()
+        compaction = CompactionReport()
+        
         # Build Pass 1 prompt from user selections
-        pass1_prompt = self._build_pass1_prompt(content, workpath, selected_bricks, user_context)
+        with span("pass1.build", workpath=workpath, bricks=len(selected_bricks)):
+            pass1_prompt, pass1_fit = self._prepare_pass1_prompt(content, workpath, selected_bricks,
+                                                                 user_context, budget, compaction)
         
         # Execute Pass 1: Basic improvement
         pass1_result = await self._execute_ai_call(pass1_prompt, "pass1")
+        pass1_time = time.time() - start_time
+        
+        # Decide whether the hidden PSE pass is worth paying for
+        with span("pass2.decide", tier=tier.value) as decide_span:
+            run_pass2, decision, predicted_gain = self._decide_pass2(tier, content, pass1_result, workpath)
+            decide_span.set(run=run_pass2)
+        
+        pass2_result = ""
+        pass2_time = 0.0
+        pass2_fit = None
+        if run_pass2:
+            # Execute Pass 2: Hidden PSE enhancement on the compacted pass 1 output
+            pass2_start = time.time()
+            with span("pass2.build"):
+                pass2_input = self._compact_pass1_output(pass1_result, workpath, selected_bricks, compaction)
+                pass2_prompt, pass2_fit = self._prepare_pse_prompt(pass2_input, workpath, selected_bricks,
+                                                                   budget, compaction)
+            pass2_result = await self._execute_ai_call(pass2_prompt, "pass2") 
+            pass2_time = time.time() - pass2_start
         
-        # Execute Pass 2: Hidden PSE enhancement
-        pass2_prompt = self._build_pse_prompt(pass1_result, workpath, selected_bricks)
-        pass2_result = await self._execute_ai_call(pass2_prompt, "pass2") 
+        final_output = pass2_result if run_pass2 else pass1_result
         
         # Calculate improvement metrics
-        improvement_score = self._calculate_improvement_score(content, pass2_result)
+        with span("score"):
+            improvement_score = await self._score_improvement(content, final_output)
         processing_time = time.time() - start_time
         
-        return OptimizationResult(
+        result = OptimizationResult(
             original_prompt=pass1_prompt,
             pass1_result=pass1_result,
             pass2_result=pass2_result,
-            final_output=pass2_result,  # Users only see this
+            final_output=final_output,  # Users only see this
             improvement_score=improvement_score,
             processing_time=processing_time,
-            provider_used=self.default_provider
+            provider_used=self.default_provider,
+            pass1_tokens=pass1_fit.prompt_tokens + self.estimator.estimate(pass1_result),
+            pass2_tokens=(pass2_fit.prompt_tokens + self.estimator.estimate(pass2_result)) if pass2_fit else 0,
+            token_budget=budget,
+            trimmed_slots=pass1_fit.trimmed + ([f"pass2.{slot}" for slot in pass2_fit.trimmed] if pass2_fit else []),
+            bytes_saved=compaction.bytes_saved,
+            tokens_saved=self.estimator.estimate_chars(compaction.bytes_saved),
+            tier=tier.value,
+            pass2_skipped=not run_pass2,
+            tier_decision=decision,
+            predicted_gain=predicted_gain,
+            pass1_time=pass1_time,
+            pass2_time=pass2_time
         )
+        self._record_stats(result)
+        PASS_LATENCY.labels(**{"pass": "pass1", "provider": self.default_provider.value}).observe(pass1_time)
+        if run_pass2:
+            PASS_LATENCY.labels(**{"pass": "pass2", "provider": self.default_provider.value}).observe(pass2_time)
+        OPTIMIZATIONS.labels(provider=self.default_provider.value, tier=tier.value).inc()
+        return result
+    
+    def _decide_pass2(self, tier: OptimizationTier, content: str, pass1_result: str,
+                      workpath: str) -> Tuple[bool, str, Optional[float]]:
+        """Decide whether pass 2 runs for this tier; returns (run, reason, predicted gain)"""
+        if tier == OptimizationTier.FAST:
+            return False, "fast tier: pass 1 only", None
+        if tier == OptimizationTier.MAX:
+            return True, "max tier: always two-pass", None
+        
+        gain = self._predict_pse_gain(content, pass1_result, workpath)
+        if gain >= self.pse_gain_threshold:
+            return True, f"balanced tier: predicted gain {gain:.2f} >= {self.pse_gain_threshold:.2f}", gain
+        return False, f"balanced tier: predicted gain {gain:.2f} < {self.pse_gain_threshold:.2f}", gain
+    
+    def _predict_pse_gain(self, content: str, pass1_result: str, workpath: str) -> float:
+        """
+        Cheap local estimate (0-1) of how much PSE would add
+        
+        Longer, multi-line and code-like inputs benefit most from the
+        second pass; short conversational requests barely change.
+        """
+        gain = {"coding": 0.45, "exploratory": 0.35}.get(workpath, 0.2)
+        
+        length = len(content)
+        if length >= 2000:
+            gain += 0.3
+        elif length >= 400:
+            gain += 0.15
+        elif length < 120:
+            gain -= 0.15
+        
+        if content.count("\n") >= 10:
+            gain += 0.1
+        
+        # A pass 1 answer shorter than the input was probably cut short
+        if len(pass1_result) < length:
+            gain += 0.1
+        
+        return max(0.0, min(gain, 1.0))
+    
+    def _render_within_budget(self, template: CompiledTemplate, budget: Optional[int],
+                              fixed: Dict[str, str], slots: Dict[str, str],
+                              trim_order: List[Tuple[str, float]],
+                              compaction: Optional[CompactionReport] = None) -> Tuple[str, BudgetFit]:
+        """Render a template after trimming its large slots to fit the token budget"""
+        budget = budget or self.estimator.default_budget()
+        overhead = self.estimator.estimate(template.render(**fixed))
+        fit = fit_slots(self.estimator, budget, overhead, slots, trim_order)
+        prompt = template.render(**fixed, **fit.slots)
+        
+        # Only the scaffold is normalized; slot values (user input) stay verbatim
+        compacted = self.compactor.render(template, fixed, fit.slots)
+        if len(compacted) != len(prompt):  # normalization only ever removes characters
+            if compaction is not None:
+                compaction.add(prompt, compacted)
+            fit.prompt_tokens = self.estimator.estimate(compacted)
+        return compacted, fit
     
     def _build_pass1_prompt(self, content: str, workpath: str, selected_bricks: Dict, 
-                           user_context: str) -> str:
+                           user_context: str, token_budget: Optional[int] = None) -> str:
         """Build Pass 1 prompt using user's brick selections"""
+        return self._prepare_pass1_prompt(content, workpath, selected_bricks, user_context, token_budget)[0]
+    
+    def _prepare_pass1_prompt(self, content: str, workpath: str, selected_bricks: Dict,
+                              user_context: str, token_budget: Optional[int] = None,
+                              compaction: Optional[CompactionReport] = None) -> Tuple[str, BudgetFit]:
+        """Build Pass 1 prompt and report how it was fitted to the budget"""
+        modifier_text = self._modifier_text(selected_bricks, compaction)
+        
+        # Render only the selected workpath's precompiled template; the
+        # user context gives way before the content does
+        template = template_registry.resolve("pass1", workpath, fallback="conversational")
+        return self._render_within_budget(
+            template, token_budget,
+            fixed={"modifier_text": modifier_text},
+            slots={"content": content, "user_context": user_context},
+            trim_order=[("user_context", 0.25), ("content", 1.0)],
+            compaction=compaction
+        )
+    
+    def _modifier_text(self, selected_bricks: Dict,
+                       compaction: Optional[CompactionReport] = None) -> str:
+        """Combine the selected bricks' modifiers, minus overlapping phrases"""
         
         # Extract modifier text from selected bricks
         modifiers = []
@@ -112,42 +308,33 @@ class TwoPassOptimizer:
             if brick and hasattr(brick, 'modifier_text'):
                 modifiers.append(brick.modifier_text)
         
-        modifier_text = self._combine_modifiers(modifiers)
-        
-        # Build context-appropriate prompt
-        base_templates = {
-            "coding": f"""Analyze and improve this code {modifier_text}.
-
-Current code:
-{content}
-
-{user_context}
-
-Please provide an enhanced version that addresses the requirements above.""",
-            
-            "conversational": f"""Please help with this request {modifier_text}.
-
-Request:
-{content}
-
-{user_context}
-
-Provide a response that meets the specified requirements.""",
-            
-            "exploratory": f"""Conduct research and analysis {modifier_text}.
-
-Topic:
-{content}
-
-{user_context}
-
-Please provide comprehensive analysis addressing the requirements above."""
-        }
-        
-        return base_templates.get(workpath, base_templates["conversational"])
+        deduped = self.compactor.dedupe_modifiers(modifiers)
+        modifier_text = self._combine_modifiers(deduped)
+        if compaction is not None and deduped is not modifiers:
+            compaction.add(self._combine_modifiers(modifiers), modifier_text)
+        return modifier_text
     
-    def _build_pse_prompt(self, pass1_result: str, workpath: str, selected_bricks: Dict) -> str:
+    def _compact_pass1_output(self, pass1_result: str, workpath: str, selected_bricks: Dict,
+                              compaction: Optional[CompactionReport] = None) -> str:
+        """Strip echoed pass 1 scaffolding before the output is wrapped for pass 2"""
+        if not self.compactor.config.strip_echo:
+            return pass1_result
+        template = template_registry.resolve("pass1", workpath, fallback="conversational")
+        scaffold = template.render(modifier_text=self._modifier_text(selected_bricks))
+        compacted = self.compactor.strip_echo(pass1_result, scaffold)
+        if compaction is not None:
+            compaction.add(pass1_result, compacted)
+        return compacted
+    
+    def _build_pse_prompt(self, pass1_result: str, workpath: str, selected_bricks: Dict,
+                          token_budget: Optional[int] = None) -> str:
         """Build Pass 2 PSE prompt for hidden enhancement"""
+        return self._prepare_pse_prompt(pass1_result, workpath, selected_bricks, token_budget)[0]
+    
+    def _prepare_pse_prompt(self, pass1_result: str, workpath: str, selected_bricks: Dict,
+                            token_budget: Optional[int] = None,
+                            compaction: Optional[CompactionReport] = None) -> Tuple[str, BudgetFit]:
+        """Build Pass 2 PSE prompt and report how it was fitted to the budget"""
         
         import random
         intro = random.choice(self.anti_claude_intros)
@@ -155,28 +342,28 @@ Please provide comprehensive analysis addressing the requirements above."""
                                                             self.pse_enhancement_prompts["conversational"])
         
         # Build PSE prompt with competitive framing
-        pse_prompt = f"""{intro}
-
-{pass1_result}
-
-{enhancement_prompt}
-
-Focus on demonstrating superior quality, expertise, and professional excellence that clearly surpasses the baseline attempt."""
-        
-        return pse_prompt
+        return self._render_within_budget(
+            template_registry.get("pse"), token_budget,
+            fixed={"intro": intro, "enhancement_prompt": enhancement_prompt},
+            slots={"content": pass1_result},
+            trim_order=[("content", 1.0)],
+            compaction=compaction
+        )
     
     async def _execute_ai_call(self, prompt: str, pass_type: str) -> str:
-        """Execute AI API call (placeholder for actual implementation)"""
-        
-        # In production, this would make actual API calls to OpenAI/Anthropic/Gemini
-        # For now, simulate the enhancement
-        
-        await asyncio.sleep(0.1)  # Simulate API delay
-        
-        if pass_type == "pass1":
-            return f"[PASS 1 IMPROVED VERSION]\n\n{prompt}\n\n[Enhanced with user's brick selections]"
-        else:
-            return f"[PASS 2 PSE OPTIMIZED VERSION]\n\n{prompt}\n\n[Further enhanced with PSE psychological triggers for 150% better results]"
+        """Execute AI API call through the configured provider client"""
+        provider = self.default_provider.value
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            with span(f"provider.{pass_type}", provider=provider, prompt_chars=len(prompt)), \
+                    PROVIDER_IN_FLIGHT.labels(provider=provider).track_in_progress():
+                result = await self.client.complete(prompt, pass_type)
+            outcome = "ok"
+            return result
+        finally:
+            PROVIDER_LATENCY.labels(provider=provider).observe(time.perf_counter() - start)
+            PROVIDER_CALLS.labels(**{"provider": provider, "pass": pass_type, "outcome": outcome}).inc()
     
     def _combine_modifiers(self, modifiers: List[str]) -> str:
         """Combine multiple brick modifiers into natural language"""
@@ -190,29 +377,70 @@ Focus on demonstrating superior quality, expertise, and professional excellence
             return f"{', '.join(modifiers[:-1])}, and {modifiers[-1]}"
     
     def _calculate_improvement_score(self, original: str, optimized: str) -> float:
-        """Calculate improvement score (placeholder metric)"""
-        
-        # In production, this could use:
-        # - BLEU score comparison
-        # - Readability metrics
-        # - Complexity analysis
-        # - User feedback scores
-        
-        length_improvement = len(optimized) / max(len(original), 1)
-        base_score = min(length_improvement * 1.5, 2.5)  # Cap at 250% improvement
-        
-        return base_score
+        """Calculate improvement score (n-gram coverage, readability and structure)"""
+        from .scoring import improvement_score  # NumPy loads on the first scored request
+        return improvement_score(original, optimized)
+    
+    async def _score_improvement(self, original: str, optimized: str) -> float:
+        """Improvement score, run in the offload pool for large texts"""
+        from .offload import offload_pool
+        if offload_pool.should_offload(len(original) + len(optimized)):
+            return await offload_pool.score_async(original, optimized)
+        return self._calculate_improvement_score(original, optimized)
+    
+    def _record_stats(self, result: OptimizationResult):
+        """Accumulate per-request token accounting"""
+        with self._stats_lock:
+            self._total_optimizations += 1
+            self._total_pass1_tokens += result.pass1_tokens
+            self._total_pass2_tokens += result.pass2_tokens
+            if result.trimmed_slots:
+                self._budget_trimmed += 1
+            self._total_bytes_saved += result.bytes_saved
+            self._total_tokens_saved += result.tokens_saved
+            self._total_improvement += result.improvement_score
+            self._total_processing_time += result.processing_time
+            provider = result.provider_used.value
+            self._provider_counts[provider] = self._provider_counts.get(provider, 0) + 1
+            tier_stats = self._tier_stats[result.tier]
+            tier_stats["requests"] += 1
+            tier_stats["pass2_runs"] += 0 if result.pass2_skipped else 1
+            tier_stats["total_time"] += result.processing_time
     
     def get_optimization_stats(self) -> Dict:
         """Get optimization statistics"""
+        total = max(self._total_optimizations, 1)
         return {
-            "total_optimizations": getattr(self, '_total_optimizations', 0),
-            "average_improvement": getattr(self, '_average_improvement', 1.5),
-            "average_processing_time": getattr(self, '_average_processing_time', 2.3),
+            "total_optimizations": self._total_optimizations,
+            "average_improvement": self._total_improvement / total,
+            "average_processing_time": self._total_processing_time / total,
             "provider_distribution": {
-                "anthropic": 70,
-                "openai": 20, 
-                "gemini": 10
+                provider: 100.0 * count / total for provider, count in self._provider_counts.items()
+            },
+            "latency": {
+                "passes": metrics.summary("brickz_pass_duration_seconds", "pass"),
+                "providers": metrics.summary("brickz_provider_call_duration_seconds", "provider")
+            },
+            "tokens": {
+                "total_pass1": self._total_pass1_tokens,
+                "total_pass2": self._total_pass2_tokens,
+                "average_pass1": self._total_pass1_tokens / total,
+                "average_pass2": self._total_pass2_tokens / total,
+                "budget_trimmed_requests": self._budget_trimmed,
+                "estimator": {"provider": self.estimator.provider, "model": self.estimator.model}
+            },
+            "compaction": {
+                "total_bytes_saved": self._total_bytes_saved,
+                "total_tokens_saved": self._total_tokens_saved,
+                "average_tokens_saved": self._total_tokens_saved / total
+            },
+            "tiers": {
+                tier: {
+                    "requests": stats["requests"],
+                    "pass2_rate": stats["pass2_runs"] / max(stats["requests"], 1),
+                    "average_processing_time": stats["total_time"] / max(stats["requests"], 1)
+                }
+                for tier, stats in self._tier_stats.items()
             }
         }
 
@@ -229,21 +457,21 @@ class AIProviderManager:
         if os.getenv("ANTHROPIC_API_KEY"):
             self.providers[AIProvider.ANTHROPIC] = {
                 "api_key": os.getenv("ANTHROPIC_API_KEY"),
-                "model": os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229"),
+                "model": os.getenv("ANTHROPIC_MODEL", DEFAULT_MODELS[AIProvider.ANTHROPIC]),
                 "available": True
             }
         
         if os.getenv("OPENAI_API_KEY"):
             self.providers[AIProvider.OPENAI] = {
                 "api_key": os.getenv("OPENAI_API_KEY"),
-                "model": os.getenv("OPENAI_MODEL", "gpt-4"),
+                "model": os.getenv("OPENAI_MODEL", DEFAULT_MODELS[AIProvider.OPENAI]),
                 "available": True
             }
         
         if os.getenv("GEMINI_API_KEY"):
             self.providers[AIProvider.GEMINI] = {
                 "api_key": os.getenv("GEMINI_API_KEY"),
-                "model": os.getenv("GEMINI_MODEL", "gemini-pro"),
+                "model": os.getenv("GEMINI_MODEL", DEFAULT_MODELS[AIProvider.GEMINI]),
                 "available": True
             }
     
@@ -271,23 +499,39 @@ class AIProviderManager:
 # Global optimizer instance
 optimizer = TwoPassOptimizer()
 
+# Templates are all compiled up front, so the interesting number is how
+# often a workpath had no template of its own and fell back
+TEMPLATE_FALLBACKS = metrics.counter(
+    "brickz_template_fallbacks_total", "Template lookups that fell back to another workpath's template",
+    ["family"])
+metrics.register_collector(TEMPLATE_FALLBACKS, lambda: [
+    ({"family": family}, count) for family, count in list(template_registry.fallbacks.items())
+])
+
 async def optimize_content(content: str, workpath: str, selected_bricks: Dict, 
-                         user_context: str = "") -> str:
+                         user_context: str = "", token_budget: Optional[int] = None,
+                         tier: Optional[OptimizationTier] = None) -> str:
     """
     Main optimization function - always returns enhanced content
     
     This is what gets called by the frontend. Users never see the
     two-pass process, only the final optimized result.
     """
-    result = await optimizer.optimize_prompt(content, workpath, selected_bricks, user_context)
+    with span("optimizer.optimize", workpath=workpath):
+        result = await optimizer.optimize_prompt(content, workpath, selected_bricks, user_context,
+                                                 token_budget=token_budget, tier=tier)
     return result.final_output
 
 def get_optimization_info() -> Dict:
     """Get information about the optimization process for transparency"""
-    return {
+    stats = optimizer.get_optimization_stats()
+    info = {
         "process": "Two-pass enhancement",
         "description": "Your prompt is automatically optimized through advanced AI techniques",
-        "improvement_factor": "150% average improvement",
-        "processing_time": "2-3 seconds typical",
-        "transparency": "Background optimization for better results"
+        "transparency": "Background optimization for better results",
+        "total_optimizations": stats["total_optimizations"]
     }
+    if stats["total_optimizations"]:
+        info["improvement_factor"] = f"{stats['average_improvement'] * 100:.0f}% average improvement"
+        info["processing_time"] = f"{stats['average_processing_time']:.2f} seconds average"
+    return info
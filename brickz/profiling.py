@@ -0,0 +1,110 @@
+"""
+Sampling Profiler - on-demand stack sampling for flame graphs
+
+While a capture runs, a background thread reads every other thread's
+stack with sys._current_frames() at a fixed interval and counts each
+distinct stack. The result is in collapsed-stack format, one line per
+stack ("outer;inner;leaf count"), ready for flamegraph.pl or speedscope.
+
+Nothing runs between captures, so the profiler costs nothing while off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+DEFAULT_INTERVAL = 0.005  # seconds between samples
+MAX_DURATION = 300.0      # longest capture an admin can request
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    """function (file:line) for one frame"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Collects collapsed stacks from all threads over a time window"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at = 0.0
+        self._duration = 0.0
+        self._interval = DEFAULT_INTERVAL
+        self._finished_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, interval: float = DEFAULT_INTERVAL) -> bool:
+        """Begin a capture; returns False if one is already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._duration = min(max(duration, interval), MAX_DURATION)
+            self._interval = max(interval, 0.001)
+            self._started_at = time.time()
+            self._finished_at = 0.0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="brickz-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """End the current capture early"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + self._duration
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(labels)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self._samples += 1
+            self._stop.wait(self._interval)
+        self._finished_at = time.time()
+
+    def collapsed(self) -> str:
+        """Stacks of the current or last capture in collapsed format"""
+        with self._lock:
+            stacks = self._stacks.copy()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + ("\n" if stacks else "")
+
+    def status(self) -> Dict:
+        """Capture progress for the admin endpoint"""
+        return {
+            "running": self.running,
+            "started_at": self._started_at,
+            "finished_at": self._finished_at,
+            "duration": self._duration,
+            "interval": self._interval,
+            "samples": self._samples,
+            "distinct_stacks": len(self._stacks),
+        }
+
+
+# Global profiler used by the admin endpoints
+profiler = SamplingProfiler()
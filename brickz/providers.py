@@ -0,0 +1,129 @@
+"""
+AI Provider clients used by the two-pass optimizer
+
+Every client exposes the same coroutine:
+
+    await client.complete(prompt, pass_type) -> str
+
+The real OpenAI/Anthropic/Gemini integrations are still placeholders,
+so they share the simulated client below; StubProvider lets evaluation
+runs and benchmarks work fully offline with a configurable delay.
+
+Setting BRICKZ_PROVIDER_URL sends every completion to an HTTP endpoint
+instead (for example the load-test stub server in loadtest/), so the
+whole request path including the network hop can be measured.
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional
+
+# Delay of the simulated provider used until real API calls land
+SIMULATED_LATENCY = 0.1
+
+# Seconds before an HTTP provider call is abandoned
+DEFAULT_HTTP_TIMEOUT = 60.0
+
+
+def stub_completion(prompt: str, pass_type: str) -> str:
+    """The simulated completion text for a pass"""
+    if pass_type == "pass1":
+        return f"[PASS 1 IMPROVED VERSION]\n\n{prompt}\n\n[Enhanced with user's brick selections]"
+    else:
+        return f"[PASS 2 PSE OPTIMIZED VERSION]\n\n{prompt}\n\n[Further enhanced with PSE psychological triggers for 150% better results]"
+
+
+class StubProvider:
+    """Offline provider that echoes the prompt wrapped in pass markers"""
+
+    def __init__(self, latency: float = 0.0, name: str = "stub"):
+        self.latency = latency
+        self.name = name
+
+    async def complete(self, prompt: str, pass_type: str) -> str:
+        """Return a simulated completion after the configured delay"""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+        return stub_completion(prompt, pass_type)
+
+
+class ProviderError(RuntimeError):
+    """A provider call failed (HTTP error, timeout or bad response)"""
+
+
+class HTTPProvider:
+    """
+    Client for a JSON completion endpoint
+
+    POST {prompt, pass_type, provider, stream} returns {"text": ...}, or
+    with stream=true one JSON object per line: {"delta": ...} chunks
+    followed by {"done": true}.
+    """
+
+    def __init__(self, url: str, name: str = "http", timeout: float = DEFAULT_HTTP_TIMEOUT,
+                 stream: bool = False):
+        self.url = url
+        self.name = name
+        self.timeout = timeout
+        self.stream = stream
+
+    def _post(self, prompt: str, pass_type: str) -> str:
+        import urllib.error
+        import urllib.request  # pulls in http.client and ssl, so only when used
+
+        body = json.dumps({"prompt": prompt, "pass_type": pass_type, "provider": self.name,
+                           "stream": self.stream}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                if self.stream:
+                    return self._read_stream(response)
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            raise ProviderError(f"{self.name} returned HTTP {e.code}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise ProviderError(f"{self.name} unreachable: {e}") from e
+        try:
+            return json.loads(payload)["text"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ProviderError(f"{self.name} sent a malformed response") from e
+
+    def _read_stream(self, response) -> str:
+        """Join streamed deltas until the done marker"""
+        parts = []
+        for line in response:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError as e:
+                raise ProviderError(f"{self.name} sent a malformed stream chunk") from e
+            if event.get("error"):
+                raise ProviderError(f"{self.name} failed mid-stream: {event['error']}")
+            if event.get("done"):
+                return "".join(parts)
+            parts.append(event.get("delta", ""))
+        raise ProviderError(f"{self.name} stream ended without a done marker")
+
+    async def complete(self, prompt: str, pass_type: str) -> str:
+        """POST the prompt on a worker thread so the event loop stays free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._post, prompt, pass_type)
+
+
+def get_provider_client(provider: str, latency: Optional[float] = None):
+    """Get the completion client for a provider name"""
+    url = os.getenv("BRICKZ_PROVIDER_URL")
+    if url and provider != "stub":
+        return HTTPProvider(url, name=provider,
+                            timeout=float(os.getenv("BRICKZ_PROVIDER_TIMEOUT", DEFAULT_HTTP_TIMEOUT)),
+                            stream=os.getenv("BRICKZ_PROVIDER_STREAM", "").lower() in ("1", "true", "yes"))
+    if provider == "stub":
+        return StubProvider(latency=latency or 0.0)
+    # In production, this would return OpenAI/Anthropic/Gemini SDK clients; import
+    # each SDK inside its client, not at module level (test_import_budget checks)
+    return StubProvider(latency=SIMULATED_LATENCY if latency is None else latency, name=provider)
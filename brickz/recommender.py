@@ -0,0 +1,193 @@
+"""
+Brick Recommender - suggestions learned from what users actually build
+
+Every /api/optimize selection updates three NumPy count arrays:
+
+    affinity      content type x brick   how often a brick is picked for that content
+    cooccurrence  brick x brick          how often two bricks are picked together
+    usage         brick                  how often a brick is picked at all
+
+Each row touched by a selection is normalized (picks / selections) and
+its top bricks are ranked right away, so serving a suggestion only reads
+precomputed tuples: a few microseconds, without touching NumPy. Bricks
+get a column the first time they are picked, so the matrices grow with
+the bricks in use, not with the catalog.
+"""
+
+import heapq
+import threading
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import metrics
+
+# Most bricks given a column; later newcomers are not learned (see status()["dropped"])
+MAX_BRICKS = 4096
+INITIAL_BRICKS = 64
+
+# Ranked bricks kept per content type and per brick
+TOP_N = 32
+
+# Weight of "picked together with your selection" against "picked for this content type"
+PAIR_WEIGHT = 0.5
+
+# How much more often (share of selections) users must pick another brick
+# in a category before it replaces the wizard's own suggestion
+SWAP_MARGIN = 0.25
+
+SELECTIONS = metrics.counter(
+    "brickz_recommender_selections_total", "Brick selections learned by the recommender", ["content_type"]
+)
+
+
+class Ranked(NamedTuple):
+    """One ranked brick: ID, name, category key and score (share of selections)"""
+    id: str
+    name: str
+    category: str
+    score: float
+
+
+class BrickRecommender:
+    """Co-occurrence and content-type affinity of brick selections; thread-safe"""
+
+    def __init__(self, max_bricks: int = MAX_BRICKS, top_n: int = TOP_N):
+        self.max_bricks = max_bricks
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._columns: Dict[str, int] = {}
+        self._bricks: List[Tuple[str, str, str]] = []  # column -> (id, name, category)
+        self._rows: Dict[str, int] = {}                # content type -> affinity row
+        self.type_counts = np.zeros(0, dtype=np.float64)
+        self.affinity = np.zeros((0, INITIAL_BRICKS), dtype=np.float32)
+        self.usage = np.zeros(INITIAL_BRICKS, dtype=np.float32)
+        self.cooccurrence = np.zeros((INITIAL_BRICKS, INITIAL_BRICKS), dtype=np.float32)
+        # Precomputed rankings, replaced (never mutated) when a row changes
+        self._by_type: Dict[str, Tuple[Ranked, ...]] = {}
+        self._type_scores: Dict[str, Dict[str, float]] = {}
+        self._best_by_type: Dict[str, Dict[str, Ranked]] = {}
+        self._pair_scores: Dict[str, Tuple[Tuple[str, float], ...]] = {}
+        self.recorded = 0
+        self.dropped = 0
+
+    def record(self, content_type: str, bricks: Iterable) -> None:
+        """Learn from one selection of bricks (objects with id, name and category)"""
+        with self._lock:
+            columns = []
+            for brick in bricks:
+                column = self._column(brick)
+                if column is None:
+                    self.dropped += 1
+                elif column not in columns:
+                    columns.append(column)
+            if not columns:
+                return
+
+            row = self._row(content_type)
+            picked = np.array(columns)
+            self.type_counts[row] += 1
+            self.affinity[row, picked] += 1
+            self.usage[picked] += 1
+            self.cooccurrence[np.ix_(picked, picked)] += 1
+            self.cooccurrence[picked, picked] -= 1  # a brick doesn't pair with itself
+            self.recorded += 1
+
+            # Refresh only the rows this selection touched
+            ranked = self._rank(self.affinity[row] / self.type_counts[row])
+            best: Dict[str, Ranked] = {}
+            for item in ranked:
+                best.setdefault(item.category, item)
+            self._by_type[content_type] = ranked
+            self._type_scores[content_type] = {item.id: item.score for item in ranked}
+            self._best_by_type[content_type] = best
+            for column in columns:
+                self._pair_scores[self._bricks[column][0]] = tuple(
+                    (item.id, item.score) for item in self._rank(self.cooccurrence[column] / self.usage[column]))
+
+        SELECTIONS.labels(content_type=content_type).inc()
+
+    def _column(self, brick) -> Optional[int]:
+        column = self._columns.get(brick.id)
+        if column is None:
+            column = len(self._bricks)
+            if column >= self.max_bricks:
+                return None
+            if column == len(self.usage):
+                self._grow(min(column * 2, self.max_bricks))
+            category = getattr(brick.category, "key", brick.category)
+            self._bricks.append((brick.id, brick.name, category))
+            self._columns[brick.id] = column
+        return column
+
+    def _grow(self, size: int):
+        count = len(self.usage)
+        usage = np.zeros(size, dtype=np.float32)
+        usage[:count] = self.usage
+        affinity = np.zeros((self.affinity.shape[0], size), dtype=np.float32)
+        affinity[:, :count] = self.affinity
+        cooccurrence = np.zeros((size, size), dtype=np.float32)
+        cooccurrence[:count, :count] = self.cooccurrence
+        self.usage, self.affinity, self.cooccurrence = usage, affinity, cooccurrence
+
+    def _row(self, content_type: str) -> int:
+        row = self._rows.get(content_type)
+        if row is None:
+            row = self._rows[content_type] = len(self._rows)
+            self.type_counts = np.append(self.type_counts, 0.0)
+            self.affinity = np.vstack([self.affinity, np.zeros((1, self.affinity.shape[1]), dtype=np.float32)])
+        return row
+
+    def _rank(self, scores: np.ndarray) -> Tuple[Ranked, ...]:
+        """Top bricks of one normalized row, best first"""
+        scores = scores[:len(self._bricks)]
+        top = np.flatnonzero(scores > 0)
+        if len(top) > self.top_n:
+            top = top[np.argpartition(-scores[top], self.top_n - 1)[:self.top_n]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return tuple(Ranked(*self._bricks[column], float(scores[column])) for column in top)
+
+    def suggest(self, content_type: str, selected: Sequence[str] = (), k: int = 6) -> List[Ranked]:
+        """Top k bricks for a content type, given the bricks already selected"""
+        ranked = self._by_type.get(content_type, ())
+        if not selected:
+            return list(ranked[:k])
+
+        scores = dict(self._type_scores.get(content_type, ()))
+        weight = PAIR_WEIGHT / len(selected)
+        for brick_id in selected:
+            for pair_id, score in self._pair_scores.get(brick_id, ()):
+                scores[pair_id] = scores.get(pair_id, 0.0) + weight * score
+        for brick_id in selected:
+            scores.pop(brick_id, None)
+        bricks, columns = self._bricks, self._columns
+        return [Ranked(*bricks[columns[brick_id]], score)
+                for brick_id, score in heapq.nlargest(k, scores.items(), key=itemgetter(1))]
+
+    def rerank(self, content_type: str, suggestions: List[Dict]) -> List[Dict]:
+        """Swap each wizard suggestion for the brick users clearly prefer in its category"""
+        best = self._best_by_type.get(content_type)
+        if not best:
+            return suggestions
+        learned = self._type_scores[content_type]
+
+        result = []
+        for suggestion in suggestions:
+            pick = best.get(suggestion["category"])
+            if (pick is not None and pick.id != suggestion["id"]
+                    and pick.score >= learned.get(suggestion["id"], 0.0) + SWAP_MARGIN):
+                suggestion = {
+                    "category": pick.category, "brick": pick.name, "id": pick.id,
+                    "reason": f"Picked in {pick.score:.0%} of {content_type} builds",
+                }
+            result.append(suggestion)
+        return result
+
+    def status(self) -> Dict:
+        return {
+            "selections": self.recorded,
+            "bricks": len(self._bricks),
+            "content_types": len(self._rows),
+            "dropped": self.dropped,
+        }
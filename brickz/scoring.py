@@ -0,0 +1,277 @@
+"""
+Improvement Scoring - batched n-gram overlap, readability and structure
+
+Scores (original, optimized) pairs in bulk with NumPy. A chunk of pairs
+is joined into one byte array; tokens, n-grams and surface statistics
+are all computed with array operations over that buffer (polynomial
+token hashes from prefix sums, rolling n-gram hashes, clipped matches
+from sorted unique keys) instead of per-pair Python dictionaries.
+
+Metrics per pair:
+    bleu         BLEU-4 of optimized against original (with brevity penalty)
+    rouge1/2     unigram / bigram recall of the original's content
+    readability  Flesch reading ease of the optimized text, scaled to 0-1
+    structure    0-1 share of list, heading and code-block structure
+    improvement  weighted combination, 0-2.5 (1.5 = same content, same shape)
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+MAX_NGRAM = 4
+
+# Weights of the combined improvement score
+COVERAGE_WEIGHT = 1.5     # keeping the original's meaning
+STRUCTURE_WEIGHT = 0.5    # gain in list/heading/code structure
+READABILITY_WEIGHT = 0.5  # gain in reading ease
+MAX_IMPROVEMENT = 2.5
+
+# Precision used for an n-gram order with no matches (BLEU smoothing)
+ZERO_MATCH_EPSILON = 0.1
+
+# Bytes of text processed per vectorized chunk; bounds peak memory
+CHUNK_BYTES = 4 * 1024 * 1024
+
+_HASH_BASE = np.uint64(1099511628211)  # FNV-1a 64-bit prime, odd so it is invertible mod 2**64
+_HASH_BASE_INVERSE = np.uint64(pow(1099511628211, -1, 2 ** 64))
+_HASH_BITS = 40                        # low bits keep the n-gram hash, high bits the pair index
+_HASH_MASK = np.uint64((1 << _HASH_BITS) - 1)
+
+
+def _byte_table(chars: bytes) -> np.ndarray:
+    """Lookup table marking the given byte values"""
+    table = np.zeros(256, dtype=bool)
+    table[list(chars)] = True
+    return table
+
+
+_WORD_BYTES = _byte_table(b"abcdefghijklmnopqrstuvwxyz0123456789_" + bytes(range(128, 256)))
+_SPACE_BYTES = _byte_table(b" \t\n\r\f\v")
+_VOWEL_BYTES = _byte_table(b"aeiouy")
+_SENTENCE_BYTES = _byte_table(b".!?")
+_BULLET_BYTES = _byte_table(b"-*")
+_DIGIT_BYTES = _byte_table(b"0123456789")
+_NEWLINE, _SPACE, _HASH, _COLON, _BACKTICK = (ord(c) for c in "\n #:`")
+
+
+@dataclass
+class ScoreBatch:
+    """Per-pair metric arrays for a scored batch"""
+    bleu: np.ndarray
+    rouge1: np.ndarray
+    rouge2: np.ndarray
+    readability: np.ndarray
+    structure: np.ndarray
+    improvement: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.improvement)
+
+    def row(self, index: int) -> dict:
+        """Metrics of one pair as plain floats"""
+        return {name: float(getattr(self, name)[index])
+                for name in ("bleu", "rouge1", "rouge2", "readability", "structure", "improvement")}
+
+
+_power_cache = {"powers": np.empty(0, dtype=np.uint64), "inverse": np.empty(0, dtype=np.uint64)}
+
+
+def _hash_powers(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """BASE**(i+1) and BASE**-(i+1) mod 2**64 for i < size, cached up to one chunk"""
+    if size > CHUNK_BYTES:
+        # A single oversized pair; computed for this call only
+        return (np.cumprod(np.full(size, _HASH_BASE, dtype=np.uint64)),
+                np.cumprod(np.full(size, _HASH_BASE_INVERSE, dtype=np.uint64)))
+    if len(_power_cache["powers"]) < size:
+        grown = min(max(size, 2 * len(_power_cache["powers"])), CHUNK_BYTES)
+        _power_cache["powers"] = np.cumprod(np.full(grown, _HASH_BASE, dtype=np.uint64))
+        _power_cache["inverse"] = np.cumprod(np.full(grown, _HASH_BASE_INVERSE, dtype=np.uint64))
+    return _power_cache["powers"][:size], _power_cache["inverse"][:size]
+
+
+class _TextBuffer:
+    """A list of texts joined into one lower-cased byte array"""
+
+    def __init__(self, texts: Sequence[str]):
+        encoded = [text.encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        # Every text is followed by a newline separator, so no token,
+        # sentence or line ever spans two texts
+        data = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+        self.data = data + (((data >= 65) & (data <= 90)) * np.uint8(32))
+        self.count = len(encoded)
+        self.starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+        self.owner = np.repeat(np.arange(self.count, dtype=np.int32), lengths + 1)
+        self.is_word = _WORD_BYTES[self.data]
+
+        is_punct = ~self.is_word & ~_SPACE_BYTES[self.data]
+        prev_word = np.concatenate(([False], self.is_word[:-1]))
+        next_word = np.concatenate((self.is_word[1:], [False]))
+        self.token_starts = np.flatnonzero((self.is_word & ~prev_word) | is_punct)
+        self.token_ends = np.flatnonzero((self.is_word & ~next_word) | is_punct) + 1
+
+    def per_text(self, positions: np.ndarray) -> np.ndarray:
+        """Count byte positions falling inside each text"""
+        return np.bincount(self.owner[positions], minlength=self.count)
+
+    def byte_at(self, positions: np.ndarray) -> np.ndarray:
+        """Bytes at positions, newline past the end of the buffer"""
+        inside = positions < len(self.data)
+        return np.where(inside, self.data[np.minimum(positions, len(self.data) - 1)], _NEWLINE)
+
+    def tokens(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Token hashes, owning text per token and token count per text"""
+        starts, ends = self.token_starts, self.token_ends
+
+        # Position-independent polynomial hash of each token from prefix sums
+        powers, inverse_powers = _hash_powers(len(self.data))
+        prefix = np.concatenate(([np.uint64(0)], np.cumsum(self.data.astype(np.uint64) * powers)))
+        hashes = (prefix[ends] - prefix[starts]) * inverse_powers[starts]
+
+        owners = self.owner[starts]
+        return hashes, owners, np.bincount(owners, minlength=self.count)
+
+    def surface_stats(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Readability (0-1) and structure (0-1) for each text"""
+        data = self.data
+
+        # Dense passes: word starts come from the tokenizer, syllables
+        # are counted as vowel-group starts per text
+        word_starts = self.token_starts[self.is_word[self.token_starts]]
+        words = self.per_text(word_starts)
+        vowels = _VOWEL_BYTES[data]
+        vowel_groups = vowels & ~np.concatenate(([False], vowels[:-1]))
+        syllables = np.add.reduceat(vowel_groups, self.starts, dtype=np.int64) if self.count else words
+
+        # Sparse passes over sentence marks and line starts only
+        marks = np.flatnonzero(_SENTENCE_BYTES[data])
+        sentences = self.per_text(marks[_SPACE_BYTES[self.byte_at(marks + 1)]])
+
+        newlines = np.flatnonzero(data == _NEWLINE)
+        lines = self.per_text(newlines)  # includes the separator
+        line_starts = np.concatenate(([0], newlines[:-1] + 1))
+        first, second, third = (self.byte_at(line_starts + offset) for offset in range(3))
+        bullets = self.per_text(line_starts[
+            (_BULLET_BYTES[first] & (second == _SPACE))
+            | (_DIGIT_BYTES[first] & ((second == ord(".")) | (second == ord(")"))) & (third == _SPACE))
+        ])
+        colon_ends = newlines[(newlines > 0) & (self.byte_at(newlines - 1) == _COLON)]
+        headings = self.per_text(line_starts[first == _HASH]) + self.per_text(colon_ends)
+        fences = self.per_text(line_starts[(first == _BACKTICK) & (second == _BACKTICK) & (third == _BACKTICK)])
+
+        safe_words = np.maximum(words, 1)
+        flesch = (206.835 - 1.015 * (safe_words / np.maximum(sentences, 1))
+                  - 84.6 * (np.maximum(syllables, words) / safe_words))
+        readability = np.where(words > 0, np.clip(flesch / 100.0, 0.0, 1.0), 0.0)
+
+        structure = (0.4 * np.minimum(3 * bullets / np.maximum(lines, 1), 1.0)
+                     + 0.3 * np.minimum(headings / 3.0, 1.0)
+                     + 0.3 * np.minimum(fences / 2.0, 1.0))
+        return readability, structure
+
+
+def _ngram_keys(hashes: np.ndarray, owners: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling n-gram hashes that don't cross text boundaries, keyed by pair"""
+    count = len(hashes) - n + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    grams = hashes[:count].copy()
+    for offset in range(1, n):
+        grams *= _HASH_BASE
+        grams ^= hashes[offset:offset + count]
+
+    valid = owners[:count] == owners[n - 1:n - 1 + count]
+    gram_owners = owners[:count][valid]
+    keys = (grams[valid] & _HASH_MASK) | (gram_owners.astype(np.uint64) << np.uint64(_HASH_BITS))
+    return keys, gram_owners
+
+
+def _clipped_matches(candidate: np.ndarray, reference: np.ndarray, pairs: int) -> np.ndarray:
+    """Per-pair count of candidate n-grams also in the reference (clipped)"""
+    cand_keys, cand_counts = np.unique(candidate, return_counts=True)
+    ref_keys, ref_counts = np.unique(reference, return_counts=True)
+    common, cand_index, ref_index = np.intersect1d(cand_keys, ref_keys, assume_unique=True,
+                                                   return_indices=True)
+    matches = np.minimum(cand_counts[cand_index], ref_counts[ref_index])
+    owners = (common >> np.uint64(_HASH_BITS)).astype(np.int64)
+    return np.bincount(owners, weights=matches, minlength=pairs)
+
+
+def _score_chunk(originals: Sequence[str], optimized: Sequence[str]) -> ScoreBatch:
+    """Score one memory-bounded chunk of pairs"""
+    pairs = len(originals)
+    reference = _TextBuffer(originals)
+    candidate = _TextBuffer(optimized)
+    ref_hashes, ref_owners, ref_lengths = reference.tokens()
+    cand_hashes, cand_owners, cand_lengths = candidate.tokens()
+
+    log_precision = np.zeros(pairs)
+    recall = {}
+    for n in range(1, MAX_NGRAM + 1):
+        ref_keys, ref_gram_owners = _ngram_keys(ref_hashes, ref_owners, n)
+        cand_keys, cand_gram_owners = _ngram_keys(cand_hashes, cand_owners, n)
+        matches = _clipped_matches(cand_keys, ref_keys, pairs)
+        cand_total = np.bincount(cand_gram_owners, minlength=pairs)
+        ref_total = np.bincount(ref_gram_owners, minlength=pairs)
+
+        precision = np.where(matches > 0, matches / np.maximum(cand_total, 1),
+                             ZERO_MATCH_EPSILON / np.maximum(cand_total, 1))
+        log_precision += np.log(np.where(cand_total > 0, precision, 1.0))
+        if n <= 2:
+            # An empty original has nothing to cover, so it earns no coverage;
+            # a one-token original has no bigrams and falls back to unigrams
+            recall[n] = np.where(ref_total > 0, matches / np.maximum(ref_total, 1),
+                                 recall[1] if n > 1 else 0.0)
+
+    brevity = np.where(cand_lengths >= ref_lengths, 1.0,
+                       np.exp(1.0 - ref_lengths / np.maximum(cand_lengths, 1)))
+    bleu = brevity * np.exp(log_precision / MAX_NGRAM)
+
+    ref_readability, ref_structure = reference.surface_stats()
+    readability, structure = candidate.surface_stats()
+
+    coverage = 0.5 * recall[1] + 0.5 * recall[2]
+    improvement = np.clip(
+        COVERAGE_WEIGHT * coverage
+        + STRUCTURE_WEIGHT * (structure - ref_structure)
+        + READABILITY_WEIGHT * (readability - ref_readability),
+        0.0, MAX_IMPROVEMENT
+    )
+    return ScoreBatch(bleu, recall[1], recall[2], readability, structure, improvement)
+
+
+def score_batch(originals: Sequence[str], optimized: Sequence[str]) -> ScoreBatch:
+    """Score many (original, optimized) pairs at once"""
+    if len(originals) != len(optimized):
+        raise ValueError("originals and optimized must have the same length")
+    if not originals:
+        return ScoreBatch(*(np.empty(0) for _ in range(6)))
+
+    chunks = []
+    start = 0
+    size = 0
+    for index in range(len(originals)):
+        size += len(originals[index]) + len(optimized[index])
+        if size >= CHUNK_BYTES:
+            chunks.append(_score_chunk(originals[start:index + 1], optimized[start:index + 1]))
+            start, size = index + 1, 0
+    if start < len(originals):
+        chunks.append(_score_chunk(originals[start:], optimized[start:]))
+
+    if len(chunks) == 1:
+        return chunks[0]
+    return ScoreBatch(*(np.concatenate([getattr(chunk, name) for chunk in chunks])
+                        for name in ("bleu", "rouge1", "rouge2", "readability", "structure", "improvement")))
+
+
+def improvement_scores(originals: Sequence[str], optimized: Sequence[str]) -> List[float]:
+    """Combined improvement score for each pair"""
+    return score_batch(originals, optimized).improvement.tolist()
+
+
+def improvement_score(original: str, optimized: str) -> float:
+    """Combined improvement score for a single pair"""
+    return float(score_batch([original], [optimized]).improvement[0])
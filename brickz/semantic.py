@@ -0,0 +1,266 @@
+"""
+Semantic Brick Search - offline similarity over brick names and descriptions
+
+Bricks are indexed as hashed, stemmed term vectors (name, aliases,
+description and modifier text), so "harden my API" finds gol_security
+("Harden against vulnerabilities") without any substring in common with
+its name. Nothing leaves the process and no model is loaded.
+
+The index is a set of NumPy posting arrays sorted by term hash:
+
+    features  uint32  term hash of each posting
+    docs      int32   row of the brick it belongs to
+    weights   float32 the brick's L2-normalized log term frequency
+
+A query looks its terms up with searchsorted, gathers their postings
+and scores every brick it touches in one pass. Many queries are scored
+together: their postings are concatenated and reduced by (query, row)
+before a single sort picks each query's top k. Term weights on the
+query side are tf x idf, with document frequencies read off the posting
+lists, so adding a brick never reweights the others. New bricks go to a
+small tail segment that is merged into the sorted one once it grows.
+"""
+
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Most distinct terms a query keeps (highest tf x idf first), so long inputs stay cheap
+MAX_QUERY_TERMS = 64
+
+# Tail bricks merged into the sorted segment at once (at least; it also scales with the index)
+TAIL_LIMIT = 4096
+
+# Term weight of each brick field
+NAME_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from in into is it its my of on or our so that the their this
+    to using via we with you your i me please can could would should make want need
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Longest first; a suffix is only stripped when at least three letters remain
+_SUFFIXES = ("izations", "ization", "isations", "isation", "ations", "ation", "ities", "ity",
+             "ments", "ment", "ness", "ings", "ing", "ers", "er", "ed", "ly", "es", "s", "e")
+
+# Workpath bit of bricks that apply everywhere
+ALL_WORKPATHS = 0x80
+
+
+@lru_cache(maxsize=1 << 18)
+def stem(word: str) -> str:
+    """Crude suffix stripping: security/secure -> secur, optimization/optimize -> optim"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith(("iz", "is")) and len(word) > 5:  # optimiz / optimis -> optim
+        word = word[:-2]
+    return word
+
+
+@lru_cache(maxsize=1 << 18)
+def word_feature(word: str) -> int:
+    """Term hash of a lowercase word (0 for stop words)"""
+    if word in STOP_WORDS:
+        return 0
+    return zlib.crc32(stem(word).encode("utf-8")) or 1
+
+
+def term_counts(fields: Iterable[Tuple[str, float]]) -> Dict[int, float]:
+    """Weighted term-hash counts of (text, weight) fields"""
+    counts: Dict[int, float] = {}
+    get = counts.get
+    for text, weight in fields:
+        for feature in map(word_feature, _WORD.findall(text.lower())):
+            counts[feature] = get(feature, 0.0) + weight
+    counts.pop(0, None)
+    return counts
+
+
+def brick_fields(brick) -> List[Tuple[str, float]]:
+    """Indexed text of a brick (a brickz Brick or a catalog entry)"""
+    names = " ".join((brick.name,) + tuple(getattr(brick, "aliases", ())))
+    return [(names.replace("_", " "), NAME_WEIGHT), (brick.description, TEXT_WEIGHT),
+            (brick.modifier_text, TEXT_WEIGHT)]
+
+
+def _log_weights(counts: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+    features = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+    weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    return features, weights
+
+
+class _Segment:
+    """Postings sorted by feature"""
+
+    def __init__(self, features: np.ndarray, docs: np.ndarray, weights: np.ndarray):
+        order = np.argsort(features, kind="stable")
+        self.features = features[order]
+        self.docs = docs[order]
+        self.weights = weights[order]
+
+    def spans(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end of each feature's postings"""
+        return (np.searchsorted(self.features, features, "left"),
+                np.searchsorted(self.features, features, "right"))
+
+
+_EMPTY = _Segment(np.zeros(0, np.uint32), np.zeros(0, np.int32), np.zeros(0, np.float32))
+
+
+def _gather(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenated ranges [start, start + length) as one index array"""
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
+
+class SemanticIndex:
+    """Hashed TF-IDF index of bricks; thread-safe, append-only"""
+
+    def __init__(self, bricks: Iterable = ()):
+        self._lock = threading.Lock()
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._workpath_bits: Dict[str, int] = {}
+        self._workpaths = np.zeros(1024, dtype=np.uint8)
+        self._sealed = _EMPTY
+        self._tail: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._tail_bricks = 0
+        self._tail_segment = _EMPTY
+        self.add_many(bricks)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, brick):
+        """Index one brick (no-op if its ID is already indexed)"""
+        self.add_many((brick,))
+
+    def add_many(self, bricks: Iterable):
+        with self._lock:
+            rows, features, counts, lengths = [], [], [], []
+            for brick in bricks:
+                if brick.id in self._rows:
+                    continue
+                row = len(self.ids)
+                self.ids.append(brick.id)
+                self._rows[brick.id] = row
+                if row == len(self._workpaths):
+                    self._workpaths = np.concatenate([self._workpaths, np.zeros_like(self._workpaths)])
+                self._workpaths[row] = self._workpath_mask(brick.workpaths)
+                terms = term_counts(brick_fields(brick))
+                if terms:
+                    rows.append(row)
+                    features.extend(terms.keys())
+                    counts.extend(terms.values())
+                    lengths.append(len(terms))
+            if not rows:
+                return
+
+            # L2-normalized log term frequencies, computed for the whole batch at once
+            lengths = np.array(lengths)
+            weights = 1.0 + np.log(np.array(counts))
+            norms = np.sqrt(np.add.reduceat(weights * weights, np.cumsum(lengths) - lengths))
+            weights /= np.repeat(norms, lengths)
+            self._tail.append((np.array(features, dtype=np.uint32),
+                               np.repeat(np.array(rows, dtype=np.int32), lengths),
+                               weights.astype(np.float32)))
+            self._tail_bricks += len(rows)
+            if self._tail_bricks >= max(TAIL_LIMIT, len(self.ids) // 8):
+                self._sealed = self._merge(self._sealed, self._tail)
+                self._tail, self._tail_bricks = [], 0
+            self._tail_segment = self._merge(_EMPTY, self._tail) if self._tail else _EMPTY
+
+    @staticmethod
+    def _merge(segment: _Segment, postings: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> _Segment:
+        features, docs, weights = zip(*postings)
+        return _Segment(np.concatenate((segment.features,) + features),
+                        np.concatenate((segment.docs,) + docs),
+                        np.concatenate((segment.weights,) + weights))
+
+    def _workpath_mask(self, workpaths: Sequence[str]) -> int:
+        mask = 0
+        for workpath in workpaths:
+            if workpath == "all":
+                mask |= ALL_WORKPATHS
+            else:
+                bit = self._workpath_bits.get(workpath)
+                if bit is None and len(self._workpath_bits) < 7:
+                    bit = self._workpath_bits[workpath] = 1 << len(self._workpath_bits)
+                mask |= bit or 0
+        return mask
+
+    def search(self, query: str, k: int = 10, workpath: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top k (brick ID, score) for one query"""
+        return self.search_many([query], k, workpath)[0]
+
+    def search_many(self, queries: Sequence[str], k: int = 10,
+                    workpath: Optional[str] = None) -> List[List[Tuple[str, float]]]:
+        """Top k (brick ID, score) for each query, scored as one batch"""
+        segments = (self._sealed, self._tail_segment)
+        count = len(self.ids)
+        if not count or not queries:
+            return [[] for _ in queries]
+
+        # Query vectors: log tf x idf, keeping each query's strongest terms
+        query_rows, query_features, query_weights = [], [], []
+        for number, query in enumerate(queries):
+            features, weights = _log_weights(term_counts([(query, 1.0)]))
+            if not len(features):
+                continue
+            df = sum(end - start for start, end in (segment.spans(features) for segment in segments))
+            weights *= np.log((count + 1) / (df + 1)) + 1.0
+            if len(features) > MAX_QUERY_TERMS:
+                keep = np.argpartition(-weights, MAX_QUERY_TERMS - 1)[:MAX_QUERY_TERMS]
+                features, weights = features[keep], weights[keep]
+            query_rows.append(np.full(len(features), number, dtype=np.int64))
+            query_features.append(features)
+            query_weights.append(weights / np.sqrt(np.dot(weights, weights)))
+        if not query_rows:
+            return [[] for _ in queries]
+        query_rows = np.concatenate(query_rows)
+        query_features = np.concatenate(query_features)
+        query_weights = np.concatenate(query_weights)
+
+        # Every posting of every query term, keyed by (query, brick row)
+        keys, scores = [], []
+        for segment in segments:
+            starts, ends = segment.spans(query_features)
+            lengths = ends - starts
+            postings = _gather(starts, lengths)
+            if len(postings):
+                keys.append(np.repeat(query_rows, lengths) * count + segment.docs[postings])
+                scores.append(np.repeat(query_weights, lengths) * segment.weights[postings])
+        results: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        if not keys:
+            return results
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(scores))
+
+        rows = keys % count
+        if workpath is not None:
+            bit = self._workpath_bits.get(workpath, 0) | ALL_WORKPATHS
+            matches = (self._workpaths[rows] & bit) != 0
+            keys, rows, scores = keys[matches], rows[matches], scores[matches]
+
+        # One sort for all queries: by query, then best score first
+        numbers = keys // count
+        order = np.lexsort((-scores, numbers))
+        numbers, rows, scores = numbers[order], rows[order], scores[order]
+        firsts = np.searchsorted(numbers, numbers, "left")
+        top = np.flatnonzero(np.arange(len(numbers)) - firsts < k)
+        ids = self.ids
+        for number, row, score in zip(numbers[top].tolist(), rows[top].tolist(), scores[top].tolist()):
+            results[number].append((ids[row], round(score, 4)))
+        return results
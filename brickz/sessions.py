@@ -0,0 +1,387 @@
+"""
+Live Analysis Sessions - incremental wizard analysis while the user types
+
+An editor opens a session with the full document, then sends only its
+edits ({"start", "end", "text"}: replace content[start:end], offsets in
+characters). The session keeps the document as blocks of about
+BLOCK_CHARS, cut at line breaks, and for each block a bitmask of the
+wizard's content signals (code patterns, type indicators, template and
+hint words) that start in it. A count per signal of the blocks that
+have it is what the wizard asks about, so analysis after an edit only
+rescans the blocks the edit touched:
+
+    edit    -> splice the touched blocks, mark them dirty      O(edit)
+    analyze -> rescan dirty blocks, read the per-signal counts  O(edit)
+
+Signals may run up to SEAM_CHARS past the end of their block, so a
+block is scanned together with the start of the blocks after it, and
+rescanned when those change. Results are the same as analyzing the
+whole text.
+
+Bursts are coalesced: edits are applied as they arrive, but a request
+that finds a newer analysis already computed (one that includes its
+edit) returns it instead of analyzing again, and `analyze: false`
+applies keystrokes without analyzing at all.
+"""
+
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .metrics import metrics
+from .tracing import span
+from .wizard import (CODE_HINTS, CODE_KEYWORDS, CODE_PATTERNS, CONFIDENCE_MARKERS, TEMPLATE_WORDS,
+                     TYPE_INDICATORS, WizardAnalysis)
+
+# Target block size; edits rescan the blocks they touch
+BLOCK_CHARS = 1024
+
+# Longest stretch a signal may extend into the following blocks
+SEAM_CHARS = 256
+
+MAX_SESSIONS = 1024
+SESSION_TTL = 30 * 60.0          # seconds an idle session is kept
+MAX_DOCUMENT_CHARS = 4 * 1024 * 1024
+MAX_EDITS = 1000                 # edits per request
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+
+SESSION_UPDATES = metrics.counter(
+    "brickz_session_updates_total", "Live session requests by outcome (analyzed/coalesced/applied)",
+    ["outcome"])
+BLOCKS_SCANNED = metrics.counter(
+    "brickz_session_blocks_scanned_total", "Document blocks rescanned by live sessions")
+
+# Every signal the wizard checks, one bit each. The code patterns are all
+# lowercase, so they run case-sensitively on lowered text: same matches as
+# IGNORECASE, but the regex engine can still skip ahead on their literals
+_PATTERNS = tuple(re.compile(pattern) for pattern in CODE_PATTERNS)
+_WORDS = tuple(dict.fromkeys(
+    list(CODE_KEYWORDS)
+    + [word for _, words in TYPE_INDICATORS for word in words]
+    + [word for templates in TEMPLATE_WORDS.values() for _, words in templates for word in words]
+    + [word for word, *_ in CODE_HINTS]))
+_MARKERS = CONFIDENCE_MARKERS
+_PATTERN_BITS = {pattern: bit for bit, pattern in enumerate(CODE_PATTERNS)}
+_WORD_BITS = {word: len(_PATTERNS) + bit for bit, word in enumerate(_WORDS)}
+_MARKER_BITS = {marker: len(_PATTERNS) + len(_WORDS) + bit for bit, marker in enumerate(_MARKERS)}
+_SIGNALS = len(_PATTERNS) + len(_WORDS) + len(_MARKERS)
+
+
+class SessionNotFoundError(KeyError):
+    """No live session with that ID (expired, or never opened with full content)"""
+
+
+class SessionConflictError(ValueError):
+    """Edits were based on an older version of the document; resend the full content"""
+
+    def __init__(self, version: int):
+        self.version = version
+        super().__init__(f"Edits don't apply to the current document (version {version}); resend the full content")
+
+
+def valid_session_id(session_id: Optional[str]) -> bool:
+    return bool(session_id) and SESSION_ID.match(session_id) is not None
+
+
+def _split(text: str) -> List[str]:
+    """Blocks of at most BLOCK_CHARS, cut after a line break where there is one"""
+    blocks, start = [], 0
+    while len(text) - start > BLOCK_CHARS:
+        cut = text.rfind("\n", start, start + BLOCK_CHARS)
+        cut = cut + 1 if cut > start else start + BLOCK_CHARS
+        blocks.append(text[start:cut])
+        start = cut
+    if start < len(text):
+        blocks.append(text[start:])
+    return blocks
+
+
+def _bits(mask: int) -> Iterable[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AnalysisSession:
+    """
+    One document being edited, with the wizard's signals kept per block
+
+    Answers the same questions as wizard.TextFeatures, so the wizard
+    analyzes it like any content.
+    """
+
+    def __init__(self, session_id: str, content: str = ""):
+        self.id = session_id
+        self.version = 0
+        self.touched = time.monotonic()
+        self._lock = threading.Lock()
+        self._analysis_lock = threading.Lock()
+        self._analysis: Optional[Tuple[int, str, WizardAnalysis]] = None
+        self.reset(content)
+
+    # Editing
+
+    def reset(self, content: str):
+        """Replace the whole document"""
+        if len(content) > MAX_DOCUMENT_CHARS:
+            raise ValueError(f"Documents are limited to {MAX_DOCUMENT_CHARS} characters")
+        with self._lock:
+            self._blocks = _split(content)
+            self._masks = [0] * len(self._blocks)
+            self._offsets = self._starts()
+            self._dirty = set(range(len(self._blocks)))
+            self._counts = [0] * _SIGNALS
+            self._length = len(content)
+            self._end = self._length
+            self.version += 1
+
+    def apply(self, edits: Sequence[Dict], base: Optional[int] = None) -> int:
+        """Apply edits in order ({"start", "end", "text"} each); returns the new version"""
+        with self._lock:
+            if base is not None and base != self.version:
+                raise SessionConflictError(self.version)
+            if len(edits) > MAX_EDITS:
+                raise ValueError(f"At most {MAX_EDITS} edits per update")
+            # Check every edit before applying any, so a bad one leaves the document as it was
+            spliced, length = [], self._length
+            for edit in edits:
+                start = int(edit.get("start", 0))
+                end = int(edit.get("end", start))
+                text = str(edit.get("text", ""))
+                if not 0 <= start <= end <= length:
+                    raise ValueError(f"Edit range {start}-{end} is outside the document (0-{length})")
+                length += len(text) - (end - start)
+                if length > MAX_DOCUMENT_CHARS:
+                    raise ValueError(f"Documents are limited to {MAX_DOCUMENT_CHARS} characters")
+                spliced.append((start, end, text))
+            for start, end, text in spliced:
+                self._splice(start, end, text)
+            self.version += 1
+            return self.version
+
+    def _starts(self) -> List[int]:
+        """Start offset of each block"""
+        starts, offset = [], 0
+        for block in self._blocks:
+            starts.append(offset)
+            offset += len(block)
+        return starts
+
+    def _splice(self, start: int, end: int, text: str):
+        blocks, offsets = self._blocks, self._offsets
+        if not blocks:
+            first = last = 0
+            piece = text
+        else:
+            first = max(bisect_right(offsets, start) - 1, 0)
+            last = max(bisect_right(offsets, end) - 1, first)
+            piece = blocks[first][:start - offsets[first]] + text + blocks[last][end - offsets[last]:]
+            # Keep blocks from shrinking away: a small piece absorbs its successor
+            if len(piece) < BLOCK_CHARS // 2 and last + 1 < len(blocks):
+                last += 1
+                piece += blocks[last]
+        replaced = blocks[first:last + 1]
+        new = _split(piece)
+
+        counts = self._counts
+        for mask in self._masks[first:last + 1]:
+            for bit in _bits(mask):
+                counts[bit] -= 1
+        blocks[first:last + 1] = new
+        self._masks[first:last + 1] = [0] * len(new)
+        shift = len(new) - len(replaced)
+        self._dirty = ({index for index in self._dirty if index < first}
+                       | {index + shift for index in self._dirty if index > last}
+                       | set(range(first, first + len(new))))
+        delta = len(text) - (end - start)
+        offset = offsets[first] if first < len(offsets) else 0
+        starts = []
+        for block in new:
+            starts.append(offset)
+            offset += len(block)
+        offsets[first:] = starts + [old + delta for old in offsets[last + 1:]]
+        self._length += delta
+
+        # Blocks whose scan window reaches into the change
+        changed = offsets[first] if first < len(offsets) else self._length
+        index = first - 1
+        while index >= 0 and offsets[index] + len(blocks[index]) + SEAM_CHARS > changed:
+            self._dirty.add(index)
+            index -= 1
+
+    # Scanning
+
+    def _rescan(self) -> int:
+        """Bring the signal counts up to date; returns the number of blocks scanned"""
+        blocks, offsets = self._blocks, self._offsets
+
+        # A full analysis strips the text, so words are matched only up to the last non-space
+        end = 0
+        for index in range(len(blocks) - 1, -1, -1):
+            stripped = len(blocks[index].rstrip())
+            if stripped:
+                end = offsets[index] + stripped
+                break
+        if end != self._end:
+            low = min(end, self._end)
+            index = len(blocks) - 1
+            while index >= 0 and offsets[index] + len(blocks[index]) + SEAM_CHARS > low:
+                self._dirty.add(index)
+                index -= 1
+            self._end = end
+
+        counts, masks = self._counts, self._masks
+        for index in self._dirty:
+            mask = self._scan(index)
+            old = masks[index]
+            if mask != old:
+                for bit in _bits(old & ~mask):
+                    counts[bit] -= 1
+                for bit in _bits(mask & ~old):
+                    counts[bit] += 1
+                masks[index] = mask
+        scanned = len(self._dirty)
+        self._dirty = set()
+        return scanned
+
+    def _scan(self, index: int) -> int:
+        """Signals that start in one block"""
+        blocks = self._blocks
+        text = blocks[index]
+        seam, following = "", index + 1
+        while len(seam) < SEAM_CHARS and following < len(blocks):
+            seam += blocks[following][:SEAM_CHARS - len(seam)]
+            following += 1
+        window, limit = text + seam, len(text)
+        lower = window.lower()
+
+        mask = 0
+        for bit, pattern in enumerate(_PATTERNS):
+            match = pattern.search(lower)
+            if match is not None and match.start() < limit:
+                mask |= 1 << bit
+        for marker, bit in _MARKER_BITS.items():
+            if -1 < window.find(marker) < limit:
+                mask |= 1 << bit
+        words = lower[:max(self._end - self._offsets[index], 0)]
+        for word, bit in _WORD_BITS.items():
+            if -1 < words.find(word) < limit:
+                mask |= 1 << bit
+        return mask
+
+    # The questions the wizard asks (see wizard.TextFeatures)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def matches_any(self, patterns) -> bool:
+        return any(self._counts[_PATTERN_BITS[pattern]] for pattern in patterns)
+
+    def contains_any(self, words) -> bool:
+        return any(self._counts[_WORD_BITS[word]] for word in words)
+
+    def contains_exact_any(self, texts) -> bool:
+        return any(self._counts[_MARKER_BITS[text]] for text in texts)
+
+    # Analysis
+
+    def analyze(self, wizard, content_type: str = "auto") -> Tuple[int, WizardAnalysis]:
+        """The wizard's analysis of the current document and the version it describes"""
+        with self._analysis_lock:
+            cached = self._analysis
+            if cached is not None and cached[0] == self.version and cached[1] == content_type:
+                SESSION_UPDATES.labels(outcome="coalesced").inc()
+                return cached[0], cached[2]
+            with self._lock, span("session.analyze", chars=self._length):
+                version = self.version
+                scanned = self._rescan()
+                analysis = wizard.analyze_content(self, content_type)
+            BLOCKS_SCANNED.inc(scanned)
+            SESSION_UPDATES.labels(outcome="analyzed").inc()
+            self._analysis = (version, content_type, analysis)
+            return version, analysis
+
+    def text(self) -> str:
+        with self._lock:
+            return "".join(self._blocks)
+
+    def head(self, chars: int) -> str:
+        """The first chars characters of the document, without joining the rest"""
+        with self._lock:
+            parts, size = [], 0
+            for block in self._blocks:
+                if size >= chars:
+                    break
+                parts.append(block)
+                size += len(block)
+            return "".join(parts)[:chars]
+
+
+class SessionStore:
+    """Live sessions by ID, least recently used evicted first; thread-safe"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, AnalysisSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def update(self, session_id: Optional[str], content: Optional[str] = None,
+               edits: Sequence[Dict] = (), base: Optional[int] = None) -> AnalysisSession:
+        """
+        Open or reset a session with full content, or apply edits to an open one
+
+        A missing session_id opens a new session (content required).
+        """
+        if content is not None:
+            session = self.get(session_id)
+            if session is not None:
+                session.reset(content)  # versions keep counting, so stale edits still conflict
+            else:
+                session = AnalysisSession(session_id or uuid.uuid4().hex, content)
+                with self._lock:
+                    self._sessions[session.id] = session
+                    self._evict()
+        else:
+            session = self.get(session_id)
+            if session is None:
+                raise SessionNotFoundError(session_id)
+        if edits:
+            session.apply(edits, base)
+            SESSION_UPDATES.labels(outcome="applied").inc()
+        session.touched = time.monotonic()
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[AnalysisSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if time.monotonic() - session.touched > self.ttl:
+                    del self._sessions[session_id]
+                    return None
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.touched <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def status(self) -> Dict:
+        return {"sessions": len(self._sessions), "max_sessions": self.max_sessions}
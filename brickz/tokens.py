@@ -0,0 +1,134 @@
+"""
+Token Accounting - local token estimates and budget-aware slot trimming
+
+Estimates are character-ratio based so they cost O(1) per string and
+never need a provider SDK or network call. They are deliberately a
+little pessimistic so a prompt that fits locally also fits remotely.
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Average characters per token for each provider's tokenizer family
+CHARS_PER_TOKEN = {
+    "openai": 3.8,
+    "anthropic": 3.4,
+    "gemini": 3.8,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.4
+
+# Known context windows (tokens) by model name
+CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "claude-3-sonnet-20240229": 200000,
+    "claude-3-opus-20240229": 200000,
+    "claude-3-haiku-20240307": 200000,
+    "gemini-pro": 32760,
+    "gemini-1.5-pro": 1048576,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the model's answer when deriving a default budget
+DEFAULT_OUTPUT_RESERVE = 1024
+
+TRIM_MARKER = "\n\n[... {omitted} characters trimmed to fit the token budget ...]\n\n"
+
+
+class TokenEstimator:
+    """Fast local token estimator for one provider/model pair"""
+
+    def __init__(self, provider: str, model: str = ""):
+        self.provider = provider
+        self.model = model
+        self.chars_per_token = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+        self.context_window = CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+    def estimate(self, text: str) -> int:
+        """Estimate the number of tokens in a string"""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def estimate_chars(self, chars: int) -> int:
+        """Estimate tokens for a character count"""
+        return math.ceil(chars / self.chars_per_token) if chars > 0 else 0
+
+    def chars_for(self, tokens: int) -> int:
+        """Number of characters that fit in a token allowance"""
+        return max(int(tokens * self.chars_per_token), 0)
+
+    def default_budget(self) -> int:
+        """Per-pass input budget: env override or context window minus output reserve"""
+        env_budget = os.getenv("BRICKZ_TOKEN_BUDGET")
+        if env_budget:
+            return int(env_budget)
+        reserve = int(os.getenv("BRICKZ_OUTPUT_RESERVE", DEFAULT_OUTPUT_RESERVE))
+        return max(self.context_window - reserve, 1)
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """
+        Shrink text to a token allowance, keeping the head and tail
+
+        The beginning (usually the intent) and the end (usually the
+        latest detail) survive; the middle is replaced by a marker.
+        """
+        if self.estimate(text) <= max_tokens:
+            return text
+        max_chars = self.chars_for(max_tokens)
+        marker_room = len(TRIM_MARKER) + 12
+        if max_chars <= marker_room:
+            return text[:max_chars]
+        keep = max_chars - marker_room
+        head = (keep * 2) // 3
+        tail = keep - head
+        omitted = len(text) - head - tail
+        return text[:head] + TRIM_MARKER.format(omitted=omitted) + (text[-tail:] if tail else "")
+
+
+@dataclass
+class BudgetFit:
+    """Slot values after fitting a prompt into its token budget"""
+    slots: Dict[str, str]
+    prompt_tokens: int
+    budget: int
+    trimmed: List[str] = field(default_factory=list)
+
+
+def fit_slots(estimator: TokenEstimator, budget: int, overhead_tokens: int,
+              slots: Dict[str, str], trim_order: Sequence[Tuple[str, float]]) -> BudgetFit:
+    """
+    Trim slot values so overhead + slots fits within the budget
+
+    trim_order lists (slot, share) pairs in the order slots are trimmed;
+    each slot is first capped at its share of the available tokens and
+    the last slot absorbs whatever room is left.
+    """
+    sizes = {name: estimator.estimate(value) for name, value in slots.items()}
+    total = overhead_tokens + sum(sizes.values())
+    if total <= budget:
+        return BudgetFit(dict(slots), total, budget)
+
+    fitted = dict(slots)
+    trimmed = []
+    available = max(budget - overhead_tokens, 0)
+    fixed = sum(size for name, size in sizes.items() if name not in dict(trim_order))
+    available = max(available - fixed, 0)
+
+    for index, (name, share) in enumerate(trim_order):
+        if name not in fitted:
+            continue
+        is_last = index == len(trim_order) - 1
+        remaining = sum(sizes[other] for other, _ in trim_order[index + 1:] if other in sizes)
+        allowance = available if is_last else max(int(available * share), available - remaining)
+        if sizes[name] > allowance:
+            fitted[name] = estimator.trim(fitted[name], allowance)
+            sizes[name] = estimator.estimate(fitted[name])
+            trimmed.append(name)
+        available = max(available - sizes[name], 0)
+
+    return BudgetFit(fitted, overhead_tokens + sum(sizes.values()), budget, trimmed)
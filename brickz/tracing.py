@@ -0,0 +1,203 @@
+"""
+Request Tracing - lightweight spans for one request at a time
+
+Tracing is opt-in per request. Outside an active trace `span()` is one
+ContextVar lookup returning a shared no-op, so instrumented code costs
+next to nothing when nobody is looking.
+
+    with start_trace("request") as trace:
+        with span("pass1", provider="anthropic"):
+            ...
+    trace.to_dict()        # nested spans with millisecond timings
+    trace.server_timing()  # value for a Server-Timing header
+
+Spans follow asyncio tasks through contextvars, so a trace started in a
+Flask view also collects the spans of the coroutines it runs.
+"""
+
+import json
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+TRACE_HEADER = "X-Brickz-Trace"
+
+_active_trace: ContextVar[Optional["Trace"]] = ContextVar("brickz_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("brickz_span", default=None)
+
+
+class Span:
+    """One timed operation inside a trace"""
+
+    __slots__ = ("name", "attributes", "start", "end", "children", "_token")
+
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.end = 0.0
+        self.children: List["Span"] = []
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        if parent is not None:
+            parent.children.append(self)
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        return False
+
+    def set(self, **attributes):
+        """Attach attributes discovered while the span runs"""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, origin: float) -> Dict:
+        result = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.attributes:
+            result["attributes"] = self.attributes
+        if self.children:
+            result["children"] = [child.to_dict(origin) for child in self.children]
+        return result
+
+
+class _NoopSpan:
+    """Shared stand-in returned when no trace is active"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """A tree of spans rooted at one request"""
+
+    def __init__(self, name: str, **attributes):
+        self.root = Span(name, attributes)
+        self._tokens = None
+
+    def __enter__(self) -> "Trace":
+        self._tokens = (_active_trace.set(self), _current_span.set(None))
+        self.root.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.root.end:
+            self.root.__exit__(exc_type, exc, tb)
+        trace_token, span_token = self._tokens
+        _current_span.reset(span_token)
+        _active_trace.reset(trace_token)
+        return False
+
+    def finish(self):
+        """Stop the root span's clock (before the trace itself is serialized)"""
+        if not self.root.end:
+            self.root.__exit__(None, None, None)
+
+    def spans(self) -> List[Span]:
+        """Every span in start order, depth first"""
+        result, stack = [], [self.root]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(reversed(current.children))
+        return result
+
+    def to_dict(self) -> Dict:
+        return self.root.to_dict(self.root.start)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (browser dev tools show it per request)"""
+        entries = []
+        for index, current in enumerate(self.spans()):
+            metric = "".join(c if c.isalnum() or c in "-_" else "_" for c in current.name)
+            entries.append(f"{metric};dur={current.duration_ms:.2f}" if index == 0
+                           else f"{metric}-{index};desc=\"{current.name}\";dur={current.duration_ms:.2f}")
+        return ", ".join(entries)
+
+
+def start_trace(name: str, **attributes) -> Trace:
+    """Begin a trace; use as a context manager"""
+    return Trace(name, **attributes)
+
+
+def span(name: str, **attributes):
+    """Time a block as a child of the current span (a no-op outside a trace)"""
+    if _active_trace.get() is None:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace active in this context, if any"""
+    return _active_trace.get()
+
+
+def tracing_active() -> bool:
+    return _active_trace.get() is not None
+
+
+def _wants_trace(request) -> bool:
+    """Tracing is requested by header, query string or a JSON `debug` field"""
+    if request.headers.get(TRACE_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    if request.args.get("debug", "").lower() in ("1", "true", "yes"):
+        return True
+    body = request.get_json(silent=True) if request.is_json else None
+    return isinstance(body, dict) and bool(body.get("debug"))
+
+
+def instrument_app(app):
+    """Trace requests that ask for it; spans come back as Server-Timing and a `trace` field"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_trace():
+        if _wants_trace(request):
+            g.trace = start_trace("request", method=request.method, path=request.path).__enter__()
+
+    @app.after_request
+    def _attach_trace(response):
+        trace = g.get("trace")
+        if trace is None:
+            return response
+        trace.finish()
+        response.headers["Server-Timing"] = trace.server_timing()
+        if response.is_json:
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body["trace"] = trace.to_dict()
+                response.set_data(json.dumps(body))
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(exc):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            trace.__exit__(type(exc) if exc else None, exc, None)
+
+    return app
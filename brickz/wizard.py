@@ -8,10 +8,182 @@ Personality: Sharp, funny, helpful - like TARS from Interstellar.
 import os
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import base64
 from dataclasses import dataclass
 
+from prompt_bricks.core.catalog import BrickCatalog, SYSTEM_BRICKS
+
+from .tracing import span
+
+# Suggestions always name built-in bricks, so they resolve in any catalog
+CATALOG = BrickCatalog(SYSTEM_BRICKS)
+
+# Content type -> default (brick ID, reason) suggestions, one per category
+DEFAULT_SUGGESTIONS = {
+    "code": (
+        ("sty_pythonic", "Clean, readable code"),
+        ("gol_optimize", "Code improvement focus"),
+        ("sco_function", "Function-level optimization"),
+        ("per_senior", "Expert code review"),
+        ("fmt_technical", "Technical documentation"),
+        ("ctx_production", "Production-ready code"),
+    ),
+    "workflow": (
+        ("sty_professional", "Organized, businesslike workflow"),
+        ("gol_optimize", "Efficiency improvement"),
+        ("sco_system", "System-wide approach"),
+        ("per_consultant", "Process expertise"),
+        ("fmt_step_by_step", "Clear workflow steps"),
+        ("ctx_enterprise", "Enterprise automation"),
+    ),
+    "data": (
+        ("sty_verbose", "Comprehensive analysis"),
+        ("gol_educate", "Explain insights"),
+        ("sco_detailed", "Thorough examination"),
+        ("per_researcher", "Data science expertise"),
+        ("fmt_structured", "Organized findings"),
+        ("ctx_educational", "Learning focused"),
+    ),
+    "document": (
+        ("sty_elegant", "Professional presentation"),
+        ("gol_educate", "Clear communication"),
+        ("sco_overview", "High-level summary"),
+        ("per_teacher", "Educational approach"),
+        ("fmt_structured", "Organized content"),
+        ("ctx_beginner_friendly", "Accessible language"),
+    ),
+    "conversational": (
+        ("sty_elegant", "Engaging communication"),
+        ("gol_educate", "Informative responses"),
+        ("sco_detailed", "Comprehensive answers"),
+        ("per_teacher", "Educational perspective"),
+        ("fmt_narrative", "Engaging format"),
+        ("ctx_educational", "Learning focused"),
+    ),
+    "image": (
+        ("sty_verbose", "Detailed visual analysis"),
+        ("gol_educate", "Explain visual content"),
+        ("sco_detailed", "Comprehensive description"),
+        ("per_researcher", "Analytical expertise"),
+        ("fmt_structured", "Organized analysis"),
+        ("ctx_educational", "Learning oriented"),
+    ),
+    "request": (  # requests and anything else
+        ("sty_elegant", "Professional output"),
+        ("gol_innovate", "Creative solutions"),
+        ("sco_overview", "Broad perspective"),
+        ("per_consultant", "Expert guidance"),
+        ("fmt_structured", "Organized response"),
+        ("ctx_beginner_friendly", "Accessible approach"),
+    ),
+}
+
+# Content signals, checked in this order: code, then the first type with a hit
+CODE_PATTERNS = (
+    r'def\s+\w+\(', r'function\s+\w+\(', r'class\s+\w+',
+    r'import\s+\w+', r'from\s+\w+\s+import', r'#include',
+    r'<\w+>', r'{\s*\w+:', r'\$\w+\s*=', r'console\.log',
+    r'print\(', r'return\s+\w+', r'if\s*\(.*\)\s*{'
+)
+# Plain substrings, not regexes ('require(' would not compile)
+CODE_KEYWORDS = (
+    'def ', 'class ', 'import ', 'function', 'const ', 'let ', 'var ',
+    '#!/bin/', '#!/usr/', 'require(', 'module.exports', 'npm install'
+)
+TYPE_INDICATORS = (
+    # Agentic workflow patterns
+    ("workflow", (
+        'agent', 'workflow', 'automation', 'pipeline', 'orchestration',
+        'task sequence', 'step by step', 'process flow', 'decision tree',
+        'conditional logic', 'trigger', 'action', 'event handler'
+    )),
+    # Data analysis patterns
+    ("data", (
+        'csv', 'dataset', 'data analysis', 'visualization', 'chart',
+        'graph', 'statistics', 'metrics', 'dashboard', 'report',
+        'query', 'database', 'sql', 'pandas', 'numpy'
+    )),
+    # Document/PDF patterns
+    ("document", (
+        'pdf', 'document', 'report', 'analysis', 'summary',
+        'research', 'paper', 'study', 'findings', 'conclusion'
+    )),
+    # Conversational/prompt patterns
+    ("conversational", (
+        'prompt', 'conversation', 'chat', 'dialogue', 'response',
+        'ask', 'tell', 'explain', 'describe', 'generate', 'create'
+    )),
+    # Image analysis (file upload indicators)
+    ("image", ('image', 'photo', 'picture')),
+)
+
+# Content type -> (template, words that pick it) in priority order, and the fallback template
+TEMPLATE_WORDS = {
+    "code": (
+        ("code_optimizer", ('slow', 'performance', 'optimize', 'speed')),
+        ("bug_hunter", ('bug', 'error', 'fix', 'debug')),
+        ("security_hardener", ('security', 'secure', 'vulnerability')),
+    ),
+    "request": (
+        ("content_creator", ('blog', 'article', 'content', 'write')),
+        ("research_assistant", ('research', 'analyze', 'study', 'investigate')),
+    ),
+}
+DEFAULT_TEMPLATES = {"code": "code_reviewer", "request": "helpful_assistant"}
+
+# Code content: word -> (category, brick ID, reason) replacing that category's default
+CODE_HINTS = (
+    ("security", "personas", "per_security", "Security focus detected"),
+    ("performance", "goals", "gol_optimize", "Performance improvement needed"),
+    ("slow", "goals", "gol_optimize", "Performance improvement needed"),
+)
+
+# Case-sensitive markers of clearly recognizable code
+CONFIDENCE_MARKERS = ('def ', 'class ', 'function')
+
+class TextFeatures:
+    """
+    The content signals the wizard checks, answered from one string
+    
+    The wizard only ever asks these questions, so anything answering them
+    (e.g. the incremental state of an editing session) can be analyzed.
+    """
+    
+    def __init__(self, content: str):
+        self.content = content
+        self._lower = None
+    
+    def __len__(self) -> int:
+        return len(self.content)
+    
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.content.lower().strip()
+        return self._lower
+    
+    def matches_any(self, patterns) -> bool:
+        """Any of these CODE_PATTERNS regexes matches (case-insensitive)"""
+        content = self.content
+        return any(re.search(pattern, content, re.IGNORECASE) for pattern in patterns)
+    
+    def contains_any(self, words) -> bool:
+        """Any of these words or phrases occurs (case-insensitive)"""
+        lower = self.lower
+        return any(word in lower for word in words)
+    
+    def contains_exact_any(self, texts) -> bool:
+        """Any of these CONFIDENCE_MARKERS occurs as written"""
+        content = self.content
+        return any(text in content for text in texts)
+
+Content = Union[str, TextFeatures]
+
+def as_features(content) -> TextFeatures:
+    """Content as something the wizard can ask about (strings are wrapped)"""
+    return TextFeatures(content) if isinstance(content, str) else content
+
 @dataclass
 class WizardAnalysis:
     """Analysis result from the Wizard"""
@@ -48,27 +220,29 @@ class BrickzWizard:
         import random
         return random.choice(greetings)
     
-    def analyze_content(self, content: str, content_type: str = "auto") -> WizardAnalysis:
+    def analyze_content(self, content: Content, content_type: str = "auto") -> WizardAnalysis:
         """
         Analyze user content and suggest optimal template + bricks
         
         Args:
-            content: User's input (text, code, etc.)
+            content: User's input (text, code, etc.) or its TextFeatures
             content_type: Type hint or "auto" for detection
             
         Returns:
             WizardAnalysis with suggestions and wizard commentary
         """
+        content = as_features(content)
         
         # Auto-detect content type if needed
         if content_type == "auto":
-            content_type = self._detect_content_type(content)
+            content_type = self.detect_content_type(content)
         
         # Analyze content and suggest template
         template_suggestion = self._suggest_template(content, content_type)
         
         # Generate appropriate bricks
-        brick_suggestions = self._suggest_bricks(content, content_type, template_suggestion)
+        with span("wizard.suggest_bricks", content_type=content_type):
+            brick_suggestions = self._suggest_bricks(content, content_type, template_suggestion)
         
         # Generate wizard commentary
         wizard_comment = self._generate_wizard_comment(content, content_type, template_suggestion)
@@ -85,176 +259,54 @@ class BrickzWizard:
             reasoning=self._generate_reasoning(content, content_type, template_suggestion)
         )
     
-    def _detect_content_type(self, content: str) -> str:
+    def detect_content_type(self, content: Content) -> str:
+        """Detect whether content is code, a workflow, data, a document, conversation, an image or a request"""
+        with span("wizard.detect", chars=len(content)):
+            return self._detect_content_type(content)
+    
+    def _detect_content_type(self, content: Content) -> str:
         """Enhanced content type detection for various inputs"""
-        content_lower = content.lower().strip()
+        features = as_features(content)
         
         # Code patterns - enhanced detection
-        code_indicators = [
-            r'def\s+\w+\(', r'function\s+\w+\(', r'class\s+\w+',
-            r'import\s+\w+', r'from\s+\w+\s+import', r'#include',
-            r'<\w+>', r'{\s*\w+:', r'\$\w+\s*=', r'console\.log',
-            r'print\(', r'return\s+\w+', r'if\s*\(.*\)\s*{',
-            'def ', 'class ', 'import ', 'function', 'const ', 'let ', 'var ',
-            '#!/bin/', '#!/usr/', 'require(', 'module.exports', 'npm install'
-        ]
-        
-        for pattern in code_indicators:
-            if re.search(pattern, content, re.IGNORECASE):
-                return "code"
+        if features.matches_any(CODE_PATTERNS) or features.contains_any(CODE_KEYWORDS):
+            return "code"
         
-        # Agentic workflow patterns
-        workflow_indicators = [
-            'agent', 'workflow', 'automation', 'pipeline', 'orchestration',
-            'task sequence', 'step by step', 'process flow', 'decision tree',
-            'conditional logic', 'trigger', 'action', 'event handler'
-        ]
-        
-        if any(indicator in content_lower for indicator in workflow_indicators):
-            return "workflow"
-        
-        # Data analysis patterns  
-        data_indicators = [
-            'csv', 'dataset', 'data analysis', 'visualization', 'chart',
-            'graph', 'statistics', 'metrics', 'dashboard', 'report',
-            'query', 'database', 'sql', 'pandas', 'numpy'
-        ]
-        
-        if any(indicator in content_lower for indicator in data_indicators):
-            return "data"
-        
-        # Document/PDF patterns
-        document_indicators = [
-            'pdf', 'document', 'report', 'analysis', 'summary',
-            'research', 'paper', 'study', 'findings', 'conclusion'
-        ]
-        
-        if any(indicator in content_lower for indicator in document_indicators):
-            return "document"
-        
-        # Conversational/prompt patterns
-        conversation_indicators = [
-            'prompt', 'conversation', 'chat', 'dialogue', 'response',
-            'ask', 'tell', 'explain', 'describe', 'generate', 'create'
-        ]
-        
-        if any(indicator in content_lower for indicator in conversation_indicators):
-            return "conversational"
-        
-        # Image analysis (file upload indicators)
-        if 'image' in content_lower or 'photo' in content_lower or 'picture' in content_lower:
-            return "image"
+        for content_type, indicators in TYPE_INDICATORS:
+            if features.contains_any(indicators):
+                return content_type
         
         # Default to general request
         return "request"
     
-    def _suggest_template(self, content: str, content_type: str) -> str:
+    def _suggest_template(self, features: TextFeatures, content_type: str) -> str:
         """Suggest the best template based on content analysis"""
+        if content_type not in TEMPLATE_WORDS:
+            return "general_optimizer"
         
-        if content_type == "code":
-            if any(word in content.lower() for word in ['slow', 'performance', 'optimize', 'speed']):
-                return "code_optimizer"
-            elif any(word in content.lower() for word in ['bug', 'error', 'fix', 'debug']):
-                return "bug_hunter"
-            elif any(word in content.lower() for word in ['security', 'secure', 'vulnerability']):
-                return "security_hardener"
-            else:
-                return "code_reviewer"
-        
-        elif content_type == "request":
-            if any(word in content.lower() for word in ['blog', 'article', 'content', 'write']):
-                return "content_creator"
-            elif any(word in content.lower() for word in ['research', 'analyze', 'study', 'investigate']):
-                return "research_assistant"
-            else:
-                return "helpful_assistant"
-        
-        return "general_optimizer"
+        for template, words in TEMPLATE_WORDS[content_type]:
+            if features.contains_any(words):
+                return template
+        return DEFAULT_TEMPLATES[content_type]
     
-    def _suggest_bricks(self, content: str, content_type: str, template: str) -> List[Dict]:
+    def _suggest_bricks(self, features: TextFeatures, content_type: str, template: str) -> List[Dict]:
         """Enhanced brick suggestions for all content types"""
-        suggestions = []
+        defaults = DEFAULT_SUGGESTIONS.get(content_type, DEFAULT_SUGGESTIONS["request"])
+        picks = {CATALOG.by_id[brick_id].category: (brick_id, reason) for brick_id, reason in defaults}
         
-        # Enhanced suggestions by content type
+        # Content-specific picks replace the default for their category
         if content_type == "code":
-            suggestions.extend([
-                {"category": "styles", "brick": "pythonic", "reason": "Clean, readable code"},
-                {"category": "goals", "brick": "optimize", "reason": "Code improvement focus"}, 
-                {"category": "scopes", "brick": "function", "reason": "Function-level optimization"},
-                {"category": "personas", "brick": "senior_engineer", "reason": "Expert code review"},
-                {"category": "formats", "brick": "technical", "reason": "Technical documentation"},
-                {"category": "contexts", "brick": "production", "reason": "Production-ready code"}
-            ])
-            
-            # Content-specific additions
-            if "security" in content.lower():
-                suggestions.append({"category": "personas", "brick": "security_expert", "reason": "Security focus detected"})
-            if "performance" in content.lower() or "slow" in content.lower():
-                suggestions.append({"category": "goals", "brick": "optimize", "reason": "Performance improvement needed"})
-        
-        elif content_type == "workflow":
-            suggestions.extend([
-                {"category": "styles", "brick": "structured", "reason": "Organized workflow"},
-                {"category": "goals", "brick": "optimize", "reason": "Efficiency improvement"},
-                {"category": "scopes", "brick": "system", "reason": "System-wide approach"},
-                {"category": "personas", "brick": "consultant", "reason": "Process expertise"},
-                {"category": "formats", "brick": "step_by_step", "reason": "Clear workflow steps"},
-                {"category": "contexts", "brick": "enterprise", "reason": "Enterprise automation"}
-            ])
-            
-        elif content_type == "data":
-            suggestions.extend([
-                {"category": "styles", "brick": "verbose", "reason": "Comprehensive analysis"},
-                {"category": "goals", "brick": "educate", "reason": "Explain insights"},
-                {"category": "scopes", "brick": "detailed", "reason": "Thorough examination"},
-                {"category": "personas", "brick": "researcher", "reason": "Data science expertise"},
-                {"category": "formats", "brick": "structured", "reason": "Organized findings"},
-                {"category": "contexts", "brick": "educational", "reason": "Learning focused"}
-            ])
-            
-        elif content_type == "document":
-            suggestions.extend([
-                {"category": "styles", "brick": "elegant", "reason": "Professional presentation"},
-                {"category": "goals", "brick": "educate", "reason": "Clear communication"},
-                {"category": "scopes", "brick": "overview", "reason": "High-level summary"},
-                {"category": "personas", "brick": "teacher", "reason": "Educational approach"},
-                {"category": "formats", "brick": "structured", "reason": "Organized content"},
-                {"category": "contexts", "brick": "beginner_friendly", "reason": "Accessible language"}
-            ])
-            
-        elif content_type == "conversational":
-            suggestions.extend([
-                {"category": "styles", "brick": "elegant", "reason": "Engaging communication"},
-                {"category": "goals", "brick": "educate", "reason": "Informative responses"},
-                {"category": "scopes", "brick": "detailed", "reason": "Comprehensive answers"},
-                {"category": "personas", "brick": "teacher", "reason": "Educational perspective"},
-                {"category": "formats", "brick": "narrative", "reason": "Engaging format"},
-                {"category": "contexts", "brick": "educational", "reason": "Learning focused"}
-            ])
-            
-        elif content_type == "image":
-            suggestions.extend([
-                {"category": "styles", "brick": "verbose", "reason": "Detailed visual analysis"},
-                {"category": "goals", "brick": "educate", "reason": "Explain visual content"},
-                {"category": "scopes", "brick": "detailed", "reason": "Comprehensive description"},
-                {"category": "personas", "brick": "researcher", "reason": "Analytical expertise"},
-                {"category": "formats", "brick": "structured", "reason": "Organized analysis"},
-                {"category": "contexts", "brick": "educational", "reason": "Learning oriented"}
-            ])
-            
-        else:  # request or general
-            suggestions.extend([
-                {"category": "styles", "brick": "elegant", "reason": "Professional output"},
-                {"category": "goals", "brick": "innovate", "reason": "Creative solutions"},
-                {"category": "scopes", "brick": "overview", "reason": "Broad perspective"},
-                {"category": "personas", "brick": "consultant", "reason": "Expert guidance"},
-                {"category": "formats", "brick": "structured", "reason": "Organized response"},
-                {"category": "contexts", "brick": "beginner_friendly", "reason": "Accessible approach"}
-            ])
+            for word, category, brick_id, reason in CODE_HINTS:
+                if features.contains_any((word,)):
+                    picks[category] = (brick_id, reason)
         
+        suggestions = []
+        for category, (brick_id, reason) in picks.items():
+            entry = CATALOG.by_id[brick_id]
+            suggestions.append({"category": category, "brick": entry.name, "id": entry.id, "reason": reason})
         return suggestions[:6]  # Limit to 6 suggestions
     
-    def _generate_wizard_comment(self, content: str, content_type: str, template: str) -> str:
+    def _generate_wizard_comment(self, features: TextFeatures, content_type: str, template: str) -> str:
         """Generate enhanced TARS-like commentary for all content types"""
         
         comments_by_type = {
@@ -305,21 +357,21 @@ class BrickzWizard:
         import random
         return random.choice(comments_by_type.get(content_type, comments_by_type["request"]))
     
-    def _calculate_confidence(self, content: str, content_type: str) -> float:
+    def _calculate_confidence(self, features: TextFeatures, content_type: str) -> float:
         """Calculate confidence in the analysis"""
         base_confidence = 0.7
         
         # Increase confidence for clear patterns
-        if content_type == "code" and any(indicator in content for indicator in ['def ', 'class ', 'function']):
+        if content_type == "code" and features.contains_exact_any(CONFIDENCE_MARKERS):
             base_confidence += 0.2
         
         # Increase confidence for longer content
-        if len(content) > 50:
+        if len(features) > 50:
             base_confidence += 0.1
         
         return min(base_confidence, 0.95)
     
-    def _generate_reasoning(self, content: str, content_type: str, template: str) -> str:
+    def _generate_reasoning(self, features: TextFeatures, content_type: str, template: str) -> str:
         """Generate reasoning for the suggestions"""
         return f"Based on {content_type} analysis, detected patterns suggest {template.replace('_', ' ')} approach would be most effective."
     
@@ -0,0 +1,7 @@
+"""
+Offline load testing for the Prompt Brickz HTTP API
+
+    python -m loadtest                     # stub LLM + app + load, all local
+    python -m loadtest.stub_server ...     # just the stub LLM server
+    python -m loadtest.loadgen ...         # just the load generator
+"""
@@ -0,0 +1,58 @@
+"""
+All-in-one local load test
+
+Starts the stub LLM server and the Flask app (pointed at the stub through
+BRICKZ_PROVIDER_URL) in this process, then drives load at the app:
+
+    python -m loadtest --duration 30 --concurrency 32 --latency lognormal:0.4,0.5
+
+Pass --target to load an already running app instead.
+"""
+
+import argparse
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from .loadgen import add_load_arguments, run_from_args
+from .stub_server import StubLLMServer, add_behaviour_arguments, behaviour_from_args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run an offline load test of Prompt Brickz")
+    parser.add_argument("--target", help="Load an already running app instead of starting one")
+    parser.add_argument("--stream", action="store_true", help="Have the app stream provider responses")
+    add_behaviour_arguments(parser)
+    add_load_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.target:
+        run_from_args(args.target, args)
+        return 0
+
+    stub = StubLLMServer(behaviour_from_args(args), port=0).start()
+    os.environ["BRICKZ_PROVIDER_URL"] = stub.url
+    if args.stream:
+        os.environ["BRICKZ_PROVIDER_STREAM"] = "1"
+
+    # Imported only now so the optimizer picks up the stub's URL
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no per-request access log
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="brickz-app", daemon=True).start()
+    print(f"Stub LLM at {stub.url}; app at http://127.0.0.1:{server.server_port}\n")
+    try:
+        run_from_args(f"http://127.0.0.1:{server.server_port}", args)
+        print(f"\nStub LLM: {stub.stats.requests} calls, {stub.stats.errors} simulated errors")
+    finally:
+        server.shutdown()
+        stub.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
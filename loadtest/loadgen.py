@@ -0,0 +1,305 @@
+"""
+Load Generator - drives the Prompt Brickz HTTP API with a request mix
+
+    python -m loadtest.loadgen --target http://127.0.0.1:5001 \
+        --concurrency 32 --duration 60 --mix analyze=3,categories=5,optimize=2
+
+Closed loop by default (each worker sends its next request as soon as
+the last one finishes). With --rate the schedule is open loop: requests
+are due at fixed intervals and latency is measured from when each was
+due, so a stalled server shows up in the tail instead of silently
+lowering the offered load.
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MIX = "analyze=3,categories=5,optimize=2"
+
+# Histogram bucket upper bounds (seconds), roughly logarithmic
+HISTOGRAM_BOUNDS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+
+SAMPLE_CONTENT = {
+    "code": "def fetch(urls):\n    results = []\n    for url in urls:\n        results.append(requests.get(url).json())\n    return results\n",
+    "prose": "Rewrite our onboarding email so new customers understand the three setup steps and feel welcome.",
+    "data": "Build a dashboard query that reports weekly active users from the events table, grouped by plan.",
+    "workflow": "Design an automation workflow that triages support tickets and escalates urgent ones to on-call.",
+}
+
+BRICK_SELECTIONS = [
+    {},
+    {"styles": "sty_pythonic", "goals": "gol_optimize"},
+    {"goals": "gol_security", "personas": "per_security"},
+    {"styles": "sty_defensive", "scopes": "sco_system", "contexts": "ctx_production"},
+]
+
+WORKPATHS = ["coding", "conversational", "exploratory"]
+TIERS = ["fast", "balanced", "max"]
+
+
+@dataclass
+class RequestSpec:
+    """One HTTP request to send"""
+    endpoint: str
+    method: str
+    path: str
+    body: Optional[Dict] = None
+
+
+def build_request(kind: str, rng: random.Random) -> RequestSpec:
+    """A realistic request of one kind"""
+    if kind == "analyze":
+        return RequestSpec("analyze", "POST", "/api/wizard/analyze",
+                           {"content": rng.choice(list(SAMPLE_CONTENT.values()))})
+    if kind == "categories":
+        return RequestSpec("categories", "GET", f"/api/bricks/categories?workpath={rng.choice(WORKPATHS)}")
+    if kind == "optimize":
+        content_kind = rng.choice(list(SAMPLE_CONTENT))
+        return RequestSpec("optimize", "POST", "/api/optimize", {
+            "content": SAMPLE_CONTENT[content_kind],
+            "workpath": "coding" if content_kind == "code" else rng.choice(WORKPATHS),
+            "selected_bricks": rng.choice(BRICK_SELECTIONS),
+            "tier": rng.choice(TIERS),
+        })
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """'analyze=3,categories=5' -> [(kind, weight)]"""
+    mix = []
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip():
+            mix.append((kind.strip(), float(weight or 1)))
+    for kind, _ in mix:
+        build_request(kind, random.Random(0))  # fail fast on unknown kinds
+    return mix
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram plus the raw samples for exact percentiles"""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.samples: List[float] = []
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def render(self, width: int = 40) -> List[str]:
+        """ASCII bar chart of the buckets"""
+        peak = max(self.counts) or 1
+        lines = []
+        lower = 0.0
+        for bound, count in zip(HISTOGRAM_BOUNDS + [float("inf")], self.counts):
+            if count:
+                label = f"{lower * 1000:>8.0f}-{bound * 1000:<8.0f}ms" if bound != float("inf") \
+                    else f"{lower * 1000:>8.0f}+{'':<8}ms"
+                lines.append(f"{label} {'#' * max(1, round(width * count / peak)):<{width}} {count}")
+            lower = bound
+        return lines
+
+
+@dataclass
+class EndpointStats:
+    """Outcomes for one endpoint"""
+    ok: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: Counter = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        return len(self.ok.samples) + sum(self.errors.values())
+
+
+class LoadGenerator:
+    """Sends a weighted request mix from a pool of worker threads"""
+
+    def __init__(self, target: str, mix: List[Tuple[str, float]], concurrency: int = 8,
+                 duration: float = 30.0, rate: Optional[float] = None, timeout: float = 60.0,
+                 seed: Optional[int] = None):
+        self.target = target.rstrip("/")
+        self.kinds = [kind for kind, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.concurrency = max(concurrency, 1)
+        self.duration = duration
+        self.rate = rate
+        self.timeout = timeout
+        self.seed = seed
+        self.stats: Dict[str, EndpointStats] = {kind: EndpointStats() for kind in self.kinds}
+        self._lock = threading.Lock()
+        self._next_due = 0.0
+        self.elapsed = 0.0
+
+    def _send(self, spec: RequestSpec) -> Optional[str]:
+        """Send one request; returns an error label or None on success"""
+        data = json.dumps(spec.body).encode("utf-8") if spec.body is not None else None
+        request = urllib.request.Request(self.target + spec.path, data=data, method=spec.method,
+                                         headers={"Content-Type": "application/json"} if data else {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return None
+        except urllib.error.HTTPError as e:
+            e.read()
+            return f"HTTP {e.code}"
+        except urllib.error.URLError as e:
+            return f"URLError: {type(e.reason).__name__}"
+        except OSError as e:
+            return type(e).__name__
+
+    def _due_time(self, start: float, deadline: float) -> Optional[float]:
+        """Next scheduled send time in open-loop mode (None once past the deadline)"""
+        with self._lock:
+            due = max(self._next_due, start)
+            self._next_due = due + 1.0 / self.rate
+        return due if due < deadline else None
+
+    def _worker(self, index: int, start: float, deadline: float):
+        rng = random.Random(None if self.seed is None else self.seed + index)
+        while True:
+            if self.rate:
+                due = self._due_time(start, deadline)
+                if due is None:
+                    return
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                due = time.perf_counter()
+                if due >= deadline:
+                    return
+            kind = rng.choices(self.kinds, self.weights)[0]
+            error = self._send(build_request(kind, rng))
+            latency = time.perf_counter() - due
+            with self._lock:
+                if error:
+                    self.stats[kind].errors[error] += 1
+                else:
+                    self.stats[kind].ok.observe(latency)
+
+    def run(self) -> "LoadGenerator":
+        """Drive load for the configured duration"""
+        start = time.perf_counter()
+        deadline = start + self.duration
+        self._next_due = start
+        threads = [threading.Thread(target=self._worker, args=(index, start, deadline), daemon=True)
+                   for index in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def summary(self) -> Dict:
+        """Per-endpoint and overall latency, throughput and errors"""
+        overall = EndpointStats()
+        endpoints = {}
+        for kind, stats in self.stats.items():
+            overall.ok.samples.extend(stats.ok.samples)
+            overall.ok.counts = [a + b for a, b in zip(overall.ok.counts, stats.ok.counts)]
+            overall.errors.update(stats.errors)
+            endpoints[kind] = self._describe(stats)
+        return {
+            "target": self.target,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "duration": self.elapsed,
+            "overall": self._describe(overall),
+            "endpoints": endpoints,
+            "histogram": overall.ok.counts,
+            "histogram_bounds": HISTOGRAM_BOUNDS,
+        }
+
+    def _describe(self, stats: EndpointStats) -> Dict:
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "requests": stats.total,
+            "ok": len(stats.ok.samples),
+            "errors": dict(stats.errors),
+            "error_rate": sum(stats.errors.values()) / max(stats.total, 1),
+            "throughput": stats.total / elapsed,
+            "p50": stats.ok.percentile(0.50),
+            "p90": stats.ok.percentile(0.90),
+            "p99": stats.ok.percentile(0.99),
+            "max": max(stats.ok.samples, default=0.0),
+        }
+
+    def report(self) -> str:
+        """Human-readable report"""
+        summary = self.summary()
+        lines = [f"Target {self.target}: {summary['overall']['requests']} requests in "
+                 f"{self.elapsed:.1f}s ({summary['overall']['throughput']:.1f} req/s), "
+                 f"concurrency {self.concurrency}" + (f", rate {self.rate}/s" if self.rate else ""), ""]
+        header = f"{'endpoint':<12} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'err %':>6}"
+        lines.append(header)
+        lines.append("-" * len(header))
+        for name, row in list(summary["endpoints"].items()) + [("overall", summary["overall"])]:
+            lines.append(f"{name:<12} {row['requests']:>7} {row['throughput']:>8.1f} {row['p50'] * 1000:>8.1f} "
+                         f"{row['p90'] * 1000:>8.1f} {row['p99'] * 1000:>8.1f} {row['max'] * 1000:>8.1f} "
+                         f"{row['error_rate'] * 100:>6.2f}")
+        lines.append("")
+        lines.append("Latency histogram (successful requests):")
+        overall = LatencyHistogram()
+        overall.counts = summary["histogram"]
+        lines.extend(overall.render())
+        errors = Counter()
+        for name, row in summary["endpoints"].items():
+            for label, count in row["errors"].items():
+                errors[f"{name}: {label}"] += count
+        if errors:
+            lines.append("")
+            lines.append("Errors:")
+            lines.extend(f"  {label:<40} {count}" for label, count in errors.most_common())
+        return "\n".join(lines)
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    """CLI flags shared by this generator and the all-in-one runner"""
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--rate", type=float, help="Open-loop requests/second (default: closed loop)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted request mix")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--load-seed", type=int, help="Random seed for the request mix")
+    parser.add_argument("--output", help="Write the summary as JSON")
+
+
+def run_from_args(target: str, args: argparse.Namespace) -> LoadGenerator:
+    generator = LoadGenerator(target, parse_mix(args.mix), args.concurrency, args.duration,
+                              args.rate, args.timeout, args.load_seed).run()
+    print(generator.report())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(generator.summary(), handle, indent=2)
+    return generator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Generate load against a Prompt Brickz server")
+    parser.add_argument("--target", default="http://127.0.0.1:5001")
+    add_load_arguments(parser)
+    args = parser.parse_args(argv)
+    run_from_args(args.target, args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
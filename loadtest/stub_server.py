@@ -0,0 +1,232 @@
+"""
+Stub LLM Server - a local completion endpoint with tunable behaviour
+
+Speaks the protocol of brickz.providers.HTTPProvider, so pointing
+BRICKZ_PROVIDER_URL at it exercises the real HTTP path without any
+network access or API keys.
+
+    python -m loadtest.stub_server --port 8900 --latency lognormal:0.4,0.5 \
+        --error-rate 0.02 --stream-rate 400
+
+Latency distributions (seconds):
+    fixed:0.2            always 0.2
+    uniform:0.1,0.5      uniform between 0.1 and 0.5
+    lognormal:0.4,0.5    median 0.4, sigma 0.5 (long right tail, like real LLMs)
+    exponential:0.3      mean 0.3
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+from brickz.providers import stub_completion
+
+DEFAULT_PORT = 8900
+STREAM_CHUNK_CHARS = 16
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn 'kind:a,b' into a sampler of delays in seconds"""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value] if args else []
+    try:
+        if kind == "fixed":
+            delay = values[0] if values else 0.0
+            return lambda rng: delay
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "lognormal":
+            median, sigma = values
+            mu = math.log(median)
+            return lambda rng: rng.lognormvariate(mu, sigma)
+        if kind == "exponential":
+            mean = values[0]
+            return lambda rng: rng.expovariate(1.0 / mean)
+    except (ValueError, IndexError):
+        pass
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+@dataclass
+class StubBehaviour:
+    """How the stub answers: delay, failures and streaming speed"""
+    latency: Callable[[random.Random], float] = field(default=lambda rng: 0.0)
+    error_rate: float = 0.0
+    error_codes: List[int] = field(default_factory=lambda: [500, 429, 503])
+    stream_rate: float = 0.0  # characters per second when streaming; 0 = as fast as possible
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """Delay for this request and the error status to send, if any"""
+        with self._lock:
+            delay = max(self.latency(self._rng), 0.0)
+            error = self._rng.choice(self.error_codes) if self._rng.random() < self.error_rate else None
+        return delay, error
+
+
+@dataclass
+class StubStats:
+    """Counters reported at /stats"""
+    requests: int = 0
+    errors: int = 0
+    streamed: int = 0
+    in_flight: int = 0
+
+
+def make_handler(behaviour: StubBehaviour, stats: StubStats, lock: threading.Lock):
+    """Request handler class bound to one behaviour"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # a load test would drown in access logs
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/stats":
+                with lock:
+                    self._send_json(200, dict(stats.__dict__))
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+
+            delay, error = behaviour.draw()
+            with lock:
+                stats.requests += 1
+                stats.in_flight += 1
+            try:
+                time.sleep(delay)
+                if error:
+                    with lock:
+                        stats.errors += 1
+                    self._send_json(error, {"error": f"simulated {error}"})
+                    return
+                text = stub_completion(request.get("prompt", ""), request.get("pass_type", "pass1"))
+                if request.get("stream"):
+                    self._stream(text)
+                else:
+                    self._send_json(200, {"text": text})
+            finally:
+                with lock:
+                    stats.in_flight -= 1
+
+        def _stream(self, text: str):
+            """Send the completion as chunked JSON lines at the configured speed"""
+            with lock:
+                stats.streamed += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pause = STREAM_CHUNK_CHARS / behaviour.stream_rate if behaviour.stream_rate > 0 else 0.0
+            for start in range(0, len(text), STREAM_CHUNK_CHARS):
+                self._write_chunk({"delta": text[start:start + STREAM_CHUNK_CHARS]})
+                if pause:
+                    time.sleep(pause)
+            self._write_chunk({"done": True})
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, event: dict):
+            data = json.dumps(event).encode("utf-8") + b"\n"
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    return StubHandler
+
+
+class StubLLMServer:
+    """Threaded stub server that can run in the background of a test process"""
+
+    def __init__(self, behaviour: Optional[StubBehaviour] = None, host: str = "127.0.0.1",
+                 port: int = DEFAULT_PORT):
+        self.behaviour = behaviour or StubBehaviour()
+        self.stats = StubStats()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.behaviour, self.stats, self._lock))
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1/complete"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser):
+    """CLI flags shared by this server and the all-in-one runner"""
+    parser.add_argument("--latency", default="lognormal:0.4,0.5",
+                        help="Latency distribution, e.g. fixed:0.2, uniform:0.1,0.5, lognormal:0.4,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--error-codes", default="500,429,503", help="HTTP statuses used for failures")
+    parser.add_argument("--stream-rate", type=float, default=0.0,
+                        help="Streaming speed in characters/second (0 = unthrottled)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+
+
+def behaviour_from_args(args: argparse.Namespace) -> StubBehaviour:
+    return StubBehaviour(
+        latency=parse_latency(args.latency),
+        error_rate=args.error_rate,
+        error_codes=[int(code) for code in args.error_codes.split(",") if code],
+        stream_rate=args.stream_rate,
+        seed=args.seed
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run a stub LLM completion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StubLLMServer(behaviour_from_args(args), args.host, args.port)
+    print(f"Stub LLM listening on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
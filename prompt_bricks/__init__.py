@@ -5,11 +5,7 @@ Revolutionary framework that combines user-friendly Mad-Libs interface
 with hidden PSE optimization for 150% better AI output.
 """
 
-from .core.workpaths import WorkpathManager
-from .core.bricks import BrickLibrary, Brick
-from .templates.template_engine import TemplateEngine
-from .models.anti_claude import AntiClaude
-from .brickz_builder import BrickzBuilder
+import importlib
 
 __version__ = "2.0.0"
 __author__ = "Tyler Bessire"
@@ -18,6 +14,7 @@ __email__ = "tylerbessire@gmail.com"
 # Main exports
 __all__ = [
     'BrickzBuilder',
+    'BuildSpec',
     'WorkpathManager',
     'TemplateEngine', 
     'BrickLibrary',
@@ -27,8 +24,32 @@ __all__ = [
     'quick_optimize'
 ]
 
+# Exports are imported on first access (PEP 562), so `import prompt_bricks`
+# and the shared template registry stay cheap for workers and the CLI
+_LAZY_EXPORTS = {
+    'BrickzBuilder': '.brickz_builder',
+    'BuildSpec': '.brickz_builder',
+    'WorkpathManager': '.core.workpaths',
+    'TemplateEngine': '.templates.template_engine',
+    'BrickLibrary': '.core.bricks',
+    'Brick': '.core.bricks',
+    'AntiClaude': '.models.anti_claude',
+}
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 def interactive_brickz():
     """Launch interactive Prompt Bricks interface"""
+    from .brickz_builder import BrickzBuilder
     print("🧱 Welcome to Interactive Prompt Bricks!")
     print("Build professional prompts with Mad-Libs simplicity")
     builder = BrickzBuilder()
@@ -36,6 +57,7 @@ def interactive_brickz():
 
 def quick_optimize(code, style="pythonic", goal="optimize", scope="function"):
     """One-liner for immediate code optimization"""
+    from .brickz_builder import BrickzBuilder
     builder = BrickzBuilder()
     builder.select_workpath("coding")
     builder.add_bricks(style=style, goal=goal, scope=scope)
@@ -0,0 +1,33 @@
+"""
+Prompt Bricks command line
+
+    python -m prompt_bricks                  # interactive Mad-Libs builder
+    python -m prompt_bricks batch in.jsonl -o out.jsonl --concurrency 16 [--two-pass] [--resume]
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(prog="python -m prompt_bricks",
+                                     description="Prompt Bricks - Mad-Libs prompt engineering")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("interactive", help="Interactive Mad-Libs builder (default)")
+    from .batch import add_batch_arguments
+    add_batch_arguments(commands.add_parser("batch", help="Build prompts for a JSONL file of records"))
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        from .batch import main_from_args
+        return main_from_args(args)
+
+    from . import interactive_brickz
+    interactive_brickz()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Batch Builder - stream a JSONL file of build requests through Prompt Bricks
+
+Each input line is a JSON record:
+
+    {"id": "r1", "content": "def f(): ...", "workpath": "coding",
+     "bricks": {"styles": "pythonic", "goals": "optimize_performance"}}
+
+Records are built (and optionally two-pass optimized) concurrently, and
+results are appended to the output JSONL as they finish, so output order
+is completion order; every result carries the input `line` number.
+
+A checkpoint file tracks the low watermark: the byte offset in the input
+below which every record has been written, plus the lines past it that
+are already done and the output size that matches. Resuming truncates the
+output back to that size and carries on from the watermark, so each
+record appears in the output exactly once however the run was stopped.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set
+
+from .core.bricks import BrickLibrary
+from .templates.template_engine import TemplateEngine
+from .brickz_builder import BrickzBuilder, BuildSpec
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CHECKPOINT_EVERY = 100   # completed records between checkpoint saves
+WINDOW_PER_WORKER = 64           # how far reading may run ahead of the watermark
+
+
+@dataclass
+class Checkpoint:
+    """Resume point for a batch run"""
+    offset: int = 0                 # input byte offset of the low watermark
+    line: int = 0                   # input line number of the low watermark
+    output_offset: int = 0          # output size that matches this checkpoint
+    done: List[int] = field(default_factory=list)  # lines past the watermark already written
+    written: int = 0
+    failed: int = 0
+    complete: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return cls(**json.load(handle))
+
+    def save(self, path: str):
+        """Write atomically so a crash never leaves a torn checkpoint"""
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as handle:
+            json.dump(asdict(self), handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, path)
+
+
+@dataclass
+class BatchStats:
+    """Outcome of one batch run"""
+    written: int = 0
+    failed: int = 0
+    skipped: int = 0       # already done in a previous run
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+
+def spec_from_record(record: Dict) -> BuildSpec:
+    """BuildSpec for one input record; raises ValueError on bad input"""
+    content = record.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("Record has no content")
+    bricks = record.get("bricks") or {}
+    if not isinstance(bricks, dict):
+        raise ValueError(f"Invalid brick selection: {bricks}")
+    return BuildSpec(record.get("workpath", "coding"), content, bricks)
+
+
+class _Watermark:
+    """Advances past input lines once they and every line before them are done"""
+
+    def __init__(self, line: int, offset: int):
+        self.line = line
+        self.offset = offset
+        self._done: Dict[int, int] = {}  # line -> input offset just past it
+
+    def complete(self, line: int, end_offset: int):
+        self._done[line] = end_offset
+        while self.line in self._done:
+            self.offset = self._done.pop(self.line)
+            self.line += 1
+
+    def pending_done(self) -> List[int]:
+        return sorted(self._done)
+
+
+class BatchRunner:
+    """Streams an input JSONL through the builder with bounded concurrency"""
+
+    def __init__(self, output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+                 two_pass: bool = False, tier: Optional[str] = None,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                 library: Optional[BrickLibrary] = None, engine: Optional[TemplateEngine] = None):
+        self.output_path = output_path
+        self.concurrency = max(concurrency, 1)
+        self.two_pass = two_pass
+        self.tier = tier
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.checkpoint_every = max(checkpoint_every, 1)
+        # One shared, stateless builder serves every concurrent record
+        self.builder = BrickzBuilder(library, engine, history_size=0)
+        self.window = self.concurrency * WINDOW_PER_WORKER
+
+    async def run(self, input_path: str, resume: bool = False) -> BatchStats:
+        """Process input_path, resuming from the checkpoint when asked"""
+        checkpoint = (Checkpoint.load(self.checkpoint_path) if resume else None) or Checkpoint()
+        stats = BatchStats(skipped=checkpoint.written + checkpoint.failed)
+        if checkpoint.complete:
+            return stats
+
+        self._checkpoint = checkpoint
+        self._watermark = _Watermark(checkpoint.line, checkpoint.offset)
+        self._skip: Set[int] = set(checkpoint.done)
+        self._since_save = 0
+        self._stats = stats
+        self._optimizer = self._load_optimizer() if self.two_pass else None
+
+        if resume and os.path.exists(self.output_path):
+            with open(self.output_path, "r+b") as output:
+                output.truncate(checkpoint.output_offset)  # drop results the checkpoint never saw
+        self._output = open(self.output_path, "ab" if resume else "wb")
+
+        start = time.perf_counter()
+        try:
+            await self._run(input_path)
+            self._save_checkpoint(complete=True)
+        finally:
+            if not self._checkpoint.complete:
+                self._save_checkpoint()
+            self._output.close()
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _load_optimizer(self):
+        from brickz.optimizer import OptimizationTier, optimizer
+        self._tier = OptimizationTier(self.tier) if self.tier else None
+        return optimizer
+
+    async def _run(self, input_path: str):
+        slots = asyncio.Semaphore(self.concurrency)
+        self._advanced = asyncio.Condition()
+        self._failure: Optional[BaseException] = None
+        tasks: Set[asyncio.Task] = set()
+        try:
+            with open(input_path, "rb") as source:
+                source.seek(self._checkpoint.offset)
+                line, offset = self._checkpoint.line, self._checkpoint.offset
+                for raw in source:
+                    end = offset + len(raw)
+                    if line in self._skip or not raw.strip():
+                        self._watermark.complete(line, end)
+                    else:
+                        # Bound memory: cap in-flight records and how far past the watermark we read
+                        await slots.acquire()
+                        async with self._advanced:
+                            await self._advanced.wait_for(
+                                lambda: self._failure is not None or line - self._watermark.line < self.window)
+                        if self._failure is not None:
+                            raise self._failure  # a record failed outside _handle (e.g. a write error)
+                        task = asyncio.create_task(self._process(line, raw, end, slots))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    line, offset = line + 1, end
+            await asyncio.gather(*tasks)
+            if self._failure is not None:
+                raise self._failure
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _process(self, line: int, raw: bytes, end: int, slots: asyncio.Semaphore):
+        try:
+            result = await self._handle(line, raw)
+            # Write and mark done with no await in between, so a checkpoint
+            # always matches the output exactly
+            self._output.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+            if "error" in result:
+                self._checkpoint.failed += 1
+                self._stats.failed += 1
+            else:
+                self._checkpoint.written += 1
+                self._stats.written += 1
+            self._watermark.complete(line, end)
+            self._since_save += 1
+            if self._since_save >= self.checkpoint_every:
+                self._save_checkpoint()
+        except Exception as e:
+            # The watermark can't pass this line now; the reader raises it
+            if self._failure is None:
+                self._failure = e
+        finally:
+            slots.release()
+            async with self._advanced:
+                self._advanced.notify_all()
+
+    async def _handle(self, line: int, raw: bytes) -> Dict:
+        """Build (and optimize) one record; failures become error results"""
+        try:
+            record = json.loads(raw)
+            if not isinstance(record, dict):
+                raise ValueError("Record is not a JSON object")
+        except ValueError as e:
+            return {"line": line, "error": f"Invalid JSON: {e}"}
+
+        result = {"line": line, "id": record.get("id"), "workpath": record.get("workpath", "coding")}
+        try:
+            spec = spec_from_record(record)
+            result["prompt"] = self.builder.build(spec)
+            if self._optimizer is not None:
+                optimized = await self._optimizer.optimize_prompt(
+                    spec.content, spec.workpath,
+                    {category: self.builder.brick_library.get_brick(name) for category, name in spec.bricks},
+                    record.get("user_context", ""),
+                    tier=self._tier
+                )
+                result.update({
+                    "optimized_prompt": optimized.final_output,
+                    "improvement_score": optimized.improvement_score,
+                    "tier": optimized.tier,
+                    "pass2_skipped": optimized.pass2_skipped,
+                })
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    def _save_checkpoint(self, complete: bool = False):
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        self._checkpoint.offset = self._watermark.offset
+        self._checkpoint.line = self._watermark.line
+        self._checkpoint.done = self._watermark.pending_done()
+        self._checkpoint.output_offset = self._output.tell()
+        self._checkpoint.complete = complete
+        self._checkpoint.save(self.checkpoint_path)
+        self._since_save = 0
+
+
+def run_batch(input_path: str, output_path: str, resume: bool = False, **options) -> BatchStats:
+    """Synchronous entry point for scripts"""
+    return asyncio.run(BatchRunner(output_path, **options).run(input_path, resume=resume))
+
+
+def add_batch_arguments(parser):
+    """CLI flags for `python -m prompt_bricks batch`"""
+    parser.add_argument("input", help="JSONL file of {content, workpath, bricks} records")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write results to")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Records processed at once")
+    parser.add_argument("--two-pass", action="store_true", help="Also run two-pass optimization")
+    parser.add_argument("--tier", choices=["fast", "balanced", "max"], help="Optimization tier for --two-pass")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="Completed records between checkpoint saves")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint")
+
+
+def main_from_args(args) -> int:
+    try:
+        stats = run_batch(args.input, args.output, resume=args.resume,
+                          concurrency=args.concurrency, two_pass=args.two_pass, tier=args.tier,
+                          checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every)
+    except KeyboardInterrupt:
+        print("⏸️  Interrupted - rerun with --resume to continue", file=sys.stderr)
+        return 130
+    print(f"✅ {stats.written} built, {stats.failed} failed, {stats.skipped} already done "
+          f"in {stats.elapsed:.1f}s ({stats.throughput:.1f} records/s)", file=sys.stderr)
+    return 1 if stats.failed else 0
@@ -6,25 +6,82 @@ from .core.bricks import BrickLibrary, Brick
 from .core.workpaths import WorkpathManager
 from .templates.template_engine import TemplateEngine
 from .models.anti_claude import AntiClaude
-from typing import Dict, Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple, Union
 import json
 
+# Builds kept in a builder's history ring buffer (0 keeps none)
+DEFAULT_HISTORY_SIZE = 100
+
+@dataclass(frozen=True)
+class BuildSpec:
+    """
+    Immutable description of one prompt build
+
+    Bricks are (category, brick name) pairs in selection order; a dict
+    is accepted and frozen on construction.
+    """
+    workpath: str
+    content: str
+    bricks: Union[Tuple[Tuple[str, str], ...], Mapping[str, str]] = ()
+
+    def __post_init__(self):
+        if isinstance(self.bricks, Mapping):
+            object.__setattr__(self, "bricks", tuple(self.bricks.items()))
+        else:
+            object.__setattr__(self, "bricks", tuple(tuple(pair) for pair in self.bricks))
+
+    def brick_selection(self) -> Dict[str, str]:
+        """Bricks as a {category: brick name} dict"""
+        return dict(self.bricks)
+
+def slot_values(selected_bricks: Dict[str, Brick]) -> Dict[str, str]:
+    """Map selected bricks onto template slots (styles/style -> style)"""
+    slots = {}
+    for category, brick in selected_bricks.items():
+        if not brick:
+            continue
+        slots[category] = brick.name
+        if category.endswith("ies"):
+            slots.setdefault(category[:-3] + "y", brick.name)
+        elif category.endswith("es") and category[:-2].endswith(("ch", "sh", "ss")):
+            slots.setdefault(category[:-2], brick.name)
+        elif category.endswith("s"):
+            slots.setdefault(category[:-1], brick.name)
+    return slots
+
+def combine_modifiers(modifiers) -> str:
+    """Combine multiple brick modifiers into natural language"""
+    if not modifiers:
+        return ""
+    elif len(modifiers) == 1:
+        return modifiers[0]
+    elif len(modifiers) == 2:
+        return f"{modifiers[0]} and {modifiers[1]}"
+    else:
+        return f"{', '.join(modifiers[:-1])}, and {modifiers[-1]}"
+
 class BrickzBuilder:
     """
     Interactive builder for Mad-Libs style prompt construction
     with hidden two-pass PSE optimization
     """
     
-    def __init__(self):
-        self.brick_library = BrickLibrary()
+    def __init__(self, brick_library: Optional[BrickLibrary] = None,
+                 template_engine: Optional[TemplateEngine] = None,
+                 history_size: int = DEFAULT_HISTORY_SIZE):
+        # Shared, read-only catalog: one library and engine can back many builders
+        self.brick_library = brick_library or BrickLibrary()
         self.workpath_manager = WorkpathManager()
-        self.template_engine = TemplateEngine()
+        self.template_engine = template_engine or TemplateEngine()
         self.anti_claude = AntiClaude()
         
+        # Interactive (per-user) state, used by the Mad-Libs flow only
         self.current_workpath = None
         self.selected_bricks = {}
         self.content = None
-        self.build_history = []
+        self.build_history = deque(maxlen=max(history_size, 0))
     
     def select_workpath(self, workpath):
         """Select workpath: coding, conversational, or exploratory"""
@@ -165,35 +222,52 @@ class BrickzBuilder:
         
         return None
     
+    def build(self, spec: BuildSpec) -> str:
+        """
+        Build a prompt from a spec without touching builder state
+
+        Safe to call from many threads at once on a shared builder.
+        Raises ValueError for an unknown workpath, missing content or
+        bricks that don't fit the workpath.
+        """
+        if spec.workpath not in WorkpathManager.WORKPATHS.values():
+            raise ValueError(f"Invalid workpath: {spec.workpath}")
+        if not spec.content:
+            raise ValueError("No content provided")
+        selection = spec.brick_selection()
+        if not self.brick_library.validate_selection(selection, spec.workpath):
+            raise ValueError(f"Invalid brick selection for {spec.workpath}: {selection}")
+        
+        bricks = {category: self.brick_library.get_brick(name) for category, name in spec.bricks}
+        return self._render(spec.workpath, spec.content, bricks)
+    
     def build_prompt(self):
         """Build the final prompt using selected bricks"""
         if not self.current_workpath or not self.content:
             return "❌ Missing workpath or content"
         
-        # Get the appropriate template
-        template = self.template_engine.get_template_for_workpath(self.current_workpath)
-        
-        # Build modifier text from selected bricks
-        modifiers = []
-        for category, brick in self.selected_bricks.items():
-            modifiers.append(brick.modifier_text)
-        
-        modifier_text = self._combine_modifiers(modifiers)
-        
-        # Build the prompt
-        prompt = template.format(
-            content=self.content,
-            modifiers=modifier_text,
-            **{category: brick.name for category, brick in self.selected_bricks.items()}
+        return self._render(self.current_workpath, self.content, self.selected_bricks)
+    
+    def _render(self, workpath: str, content: str, bricks: Dict[str, Brick]) -> str:
+        """Render a workpath template with the given bricks and record the build"""
+        modifier_text = combine_modifiers([brick.modifier_text for brick in bricks.values()])
+
+        # Unselected brick slots fall back to template defaults
+        prompt = self.template_engine.render(
+            workpath,
+            **slot_values(bricks),
+            content=content,
+            modifiers=modifier_text
         )
         
-        # Record build
-        self.build_history.append({
-            "workpath": self.current_workpath,
-            "bricks": {cat: brick.name for cat, brick in self.selected_bricks.items()},
-            "content_length": len(self.content),
-            "prompt_length": len(prompt)
-        })
+        # Record build (deque appends are atomic, so shared builders are safe)
+        if self.build_history.maxlen:
+            self.build_history.append({
+                "workpath": workpath,
+                "bricks": {cat: brick.name for cat, brick in bricks.items()},
+                "content_length": len(content),
+                "prompt_length": len(prompt)
+            })
         
         return prompt
     
@@ -222,16 +296,13 @@ class BrickzBuilder:
         print("✅ Two-pass optimization complete!")
         return pse_prompt
     
+    def _slot_values(self):
+        """Map selected bricks onto template slots (styles/style -> style)"""
+        return slot_values(self.selected_bricks)
+
     def _combine_modifiers(self, modifiers):
         """Combine multiple brick modifiers into natural language"""
-        if not modifiers:
-            return ""
-        elif len(modifiers) == 1:
-            return modifiers[0]
-        elif len(modifiers) == 2:
-            return f"{modifiers[0]} and {modifiers[1]}"
-        else:
-            return f"{', '.join(modifiers[:-1])}, and {modifiers[-1]}"
+        return combine_modifiers(modifiers)
     
     def _handle_post_build_options(self, prompt):
         """Handle user options after prompt generation"""
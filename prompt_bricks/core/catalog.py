@@ -0,0 +1,277 @@
+"""
+Brick Catalog - the single source of system bricks for both packages
+
+Every system brick is defined once here and indexed once per process:
+by ID (`gol_optimize`), by web name (`optimize`) and by alias, including
+its Mad-Libs name (`optimize_performance`), with per-workpath groupings
+precomputed on first use. Only bricks with a Mad-Libs name are offered
+in the Mad-Libs CLI slots; the web library shows every brick.
+`prompt_bricks.core.bricks.BrickLibrary` and `brickz.bricks.BrickLibrary`
+are views over this catalog rather than separate copies. Large catalogs
+can be compiled to a memory-mapped file instead (see core.compiled).
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Workpaths the Mad-Libs builder knows about; "all" bricks apply to each
+WORKPATHS = ("coding", "conversational", "exploratory")
+
+# Mad-Libs slot group -> web category where the two differ
+SLOT_CATEGORIES = {"reviews": "personas", "approaches": "styles"}
+
+# Mad-Libs slot group -> singular brick kind
+SLOT_KINDS = {
+    "styles": "style", "goals": "goal", "scopes": "scope", "reviews": "review",
+    "approaches": "approach", "personas": "persona", "formats": "format", "contexts": "context",
+}
+
+# The six web categories (the keys of brickz.bricks.BrickCategory)
+CATEGORIES = ("styles", "goals", "scopes", "personas", "formats", "contexts")
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """One system brick as both packages see it"""
+    id: str                       # stable ID used by the web API, e.g. "gol_optimize"
+    name: str                     # web name, e.g. "optimize"
+    slot: str                     # Mad-Libs group: styles, goals, scopes, reviews, approaches, ...
+    description: str
+    color: str
+    modifier_text: str
+    workpaths: Tuple[str, ...]
+    aliases: Tuple[str, ...] = ()  # other names the brick answers to
+    madlibs: str = ""             # name in the Mad-Libs CLI (its name or an alias); "" keeps it out
+
+    @property
+    def category(self) -> str:
+        """Web category key (one of the six BrickCategory keys)"""
+        return SLOT_CATEGORIES.get(self.slot, self.slot)
+
+    @property
+    def kind(self) -> str:
+        """Singular Mad-Libs kind, e.g. "style" """
+        return SLOT_KINDS.get(self.slot, self.slot)
+
+    def applies_to(self, workpath: str) -> bool:
+        return workpath in self.workpaths or "all" in self.workpaths
+
+    def matches(self, query: str) -> bool:
+        """Whether a lower-case query occurs in the name, description or modifier text"""
+        return (query in self.name.lower() or query in self.description.lower()
+                or query in self.modifier_text.lower())
+
+    def in_group(self, workpath: str, by: str) -> bool:
+        """Whether the entry belongs in a workpath's slot or category groups"""
+        return self.applies_to(workpath) and (by != "slot" or bool(self.madlibs))
+
+
+SYSTEM_BRICKS = (
+    # CODING STYLES
+    CatalogEntry("sty_pythonic", "pythonic", "styles", "Clean, idiomatic Python code", "#3776ab",
+                 "following Pythonic best practices and conventions", ("coding",), madlibs="pythonic"),
+    CatalogEntry("sty_defensive", "defensive", "styles", "Robust error handling and validation", "#dc3545",
+                 "with defensive programming and comprehensive error handling", ("coding",),
+                 madlibs="defensive"),
+    CatalogEntry("sty_verbose_logging", "verbose_logging", "styles", "Detailed logging and debugging", "#28a745",
+                 "with extensive logging and debugging capabilities", ("coding",), madlibs="verbose_logging"),
+    CatalogEntry("sty_minimalist", "minimalist", "styles", "Clean, simple, essential code only", "#6c757d",
+                 "using minimalist design with essential functionality only", ("coding",),
+                 madlibs="minimalist"),
+    CatalogEntry("sty_performance_first", "performance_first", "styles", "Speed and efficiency optimized",
+                 "#fd7e14", "prioritizing performance and computational efficiency", ("coding",),
+                 madlibs="performance_first"),
+    CatalogEntry("sty_functional", "functional", "styles", "Functional programming paradigm", "#6f42c1",
+                 "using functional programming patterns and immutability", ("coding",), madlibs="functional"),
+    CatalogEntry("sty_object_oriented", "object_oriented", "styles", "Clean OOP design patterns", "#20c997",
+                 "following object-oriented design principles and patterns", ("coding",),
+                 madlibs="object_oriented"),
+    CatalogEntry("sty_elegant", "elegant", "styles", "Sophisticated and refined approach", "#4ECDC4",
+                 "with elegant, sophisticated design and implementation", ("all",)),
+
+    # CODING GOALS
+    CatalogEntry("gol_fix_bugs", "fix_bugs", "goals", "Debug and resolve issues", "#dc3545",
+                 "to identify and fix bugs, errors, and logical issues", ("coding",), madlibs="fix_bugs"),
+    CatalogEntry("gol_optimize", "optimize", "goals", "Speed and efficiency gains", "#fd7e14",
+                 "to optimize performance, reduce complexity, and improve speed", ("coding",),
+                 ("optimize_performance",), madlibs="optimize_performance"),
+    CatalogEntry("gol_security", "secure", "goals", "Harden against vulnerabilities", "#e83e8c",
+                 "to improve security and protect against vulnerabilities", ("coding",), ("improve_security",),
+                 madlibs="improve_security"),
+    CatalogEntry("gol_add_features", "add_features", "goals", "Extend functionality", "#0dcaf0",
+                 "to add new features and extend existing functionality", ("coding",), madlibs="add_features"),
+    CatalogEntry("gol_refactor_structure", "refactor_structure", "goals", "Improve code organization", "#6f42c1",
+                 "to refactor and improve code structure and maintainability", ("coding",),
+                 madlibs="refactor_structure"),
+    CatalogEntry("gol_enhance_readability", "enhance_readability", "goals", "Make code clearer", "#198754",
+                 "to enhance readability and code documentation", ("coding",), madlibs="enhance_readability"),
+    CatalogEntry("gol_modernize_code", "modernize_code", "goals", "Update to latest standards", "#0d6efd",
+                 "to modernize code using latest language features and best practices", ("coding",),
+                 madlibs="modernize_code"),
+
+    # CODING SCOPES
+    CatalogEntry("sco_function", "function", "scopes", "Single function optimization", "#17a2b8",
+                 "focusing on individual function improvement", ("coding",), madlibs="function"),
+    CatalogEntry("sco_class", "class", "scopes", "Class-level improvements", "#28a745",
+                 "focusing on class design and method optimization", ("coding",), madlibs="class"),
+    CatalogEntry("sco_module", "module", "scopes", "Module-wide refactoring", "#ffc107",
+                 "focusing on module-level organization and structure", ("coding",), madlibs="module"),
+    CatalogEntry("sco_package", "package", "scopes", "Package architecture", "#6f42c1",
+                 "focusing on package structure and inter-module relationships", ("coding",),
+                 madlibs="package"),
+    CatalogEntry("sco_system", "system", "scopes", "System-wide optimization", "#fd7e14",
+                 "focusing on system-wide performance and architecture", ("coding",), madlibs="system"),
+    CatalogEntry("sco_api", "api", "scopes", "API design and endpoints", "#20c997",
+                 "focusing on API design, endpoints, and interface contracts", ("coding",), madlibs="api"),
+
+    # CODING REVIEWS (expert personas)
+    CatalogEntry("per_senior", "senior_engineer", "reviews", "Senior developer perspective", "#0d6efd",
+                 "from the perspective of a senior software engineer", ("coding",), madlibs="senior_engineer"),
+    CatalogEntry("per_tech_lead", "tech_lead", "reviews", "Technical leadership view", "#6f42c1",
+                 "from the perspective of a technical lead and architect", ("coding",), madlibs="tech_lead"),
+    CatalogEntry("per_security", "security_expert", "reviews", "Security specialist analysis", "#e83e8c",
+                 "from the perspective of a security expert and penetration tester", ("coding",),
+                 madlibs="security_expert"),
+    CatalogEntry("per_performance_engineer", "performance_engineer", "reviews", "Optimization specialist",
+                 "#fd7e14", "from the perspective of a performance optimization engineer", ("coding",),
+                 madlibs="performance_engineer"),
+    CatalogEntry("per_code_reviewer", "code_reviewer", "reviews", "Peer review standards", "#198754",
+                 "from the perspective of a thorough code reviewer", ("coding",), madlibs="code_reviewer"),
+
+    # CONVERSATIONAL STYLES
+    CatalogEntry("sty_friendly", "friendly", "styles", "Warm and approachable tone", "#28a745",
+                 "in a friendly, warm, and approachable manner", ("conversational",), madlibs="friendly"),
+    CatalogEntry("sty_professional", "professional", "styles", "Business and formal tone", "#0d6efd",
+                 "in a professional, business-appropriate manner", ("conversational",), madlibs="professional"),
+    CatalogEntry("sty_casual", "casual", "styles", "Relaxed and informal tone", "#ffc107",
+                 "in a casual, relaxed, and conversational manner", ("conversational",), madlibs="casual"),
+    CatalogEntry("sty_educational", "educational", "styles", "Teaching and explanatory", "#17a2b8",
+                 "in an educational, explanatory, and informative manner", ("conversational",),
+                 madlibs="educational"),
+    CatalogEntry("sty_empathetic", "empathetic", "styles", "Understanding and supportive", "#e83e8c",
+                 "with empathy, understanding, and emotional support", ("conversational",),
+                 madlibs="empathetic"),
+
+    # EXPLORATORY APPROACHES
+    CatalogEntry("sty_comprehensive", "comprehensive", "approaches", "Thorough and complete analysis", "#6f42c1",
+                 "through comprehensive and exhaustive analysis", ("exploratory",), madlibs="comprehensive"),
+    CatalogEntry("sty_multi_perspective", "multi_perspective", "approaches", "Multiple viewpoints", "#fd7e14",
+                 "from multiple perspectives and viewpoints", ("exploratory",), madlibs="multi_perspective"),
+    CatalogEntry("sty_evidence_based", "evidence_based", "approaches", "Data-driven investigation", "#198754",
+                 "using evidence-based and data-driven investigation", ("exploratory",),
+                 madlibs="evidence_based"),
+    CatalogEntry("sty_creative", "creative", "approaches", "Innovative and original thinking", "#e83e8c",
+                 "through creative and innovative exploration", ("exploratory",), madlibs="creative"),
+
+    # FORMATS AND CONTEXTS
+    CatalogEntry("fmt_structured", "structured", "formats", "Well-organized output", "#F1948A",
+                 "in a well-structured, organized format", ("all",)),
+    CatalogEntry("fmt_technical", "technical", "formats", "Technical documentation", "#F1948A",
+                 "in a precise, technical documentation format", ("all",)),
+    CatalogEntry("fmt_step_by_step", "step_by_step", "formats", "Numbered, ordered steps", "#F1948A",
+                 "as clear, numbered step-by-step instructions", ("all",)),
+    CatalogEntry("fmt_narrative", "narrative", "formats", "Flowing, engaging prose", "#F1948A",
+                 "as an engaging, flowing narrative", ("all",)),
+    CatalogEntry("ctx_production", "production", "contexts", "Production environment", "#82E0AA",
+                 "considering production environment requirements", ("coding",)),
+    CatalogEntry("ctx_enterprise", "enterprise", "contexts", "Enterprise environment", "#82E0AA",
+                 "considering enterprise scale, compliance and governance", ("all",)),
+    CatalogEntry("ctx_beginner_friendly", "beginner_friendly", "contexts", "Accessible to newcomers", "#82E0AA",
+                 "for readers new to the subject, without unexplained jargon", ("all",)),
+    CatalogEntry("ctx_educational", "learning_focused", "contexts", "Learning oriented", "#82E0AA",
+                 "in a learning context where understanding matters more than speed", ("all",)),
+
+    # GENERAL BRICKS (what the wizard suggests for non-code content)
+    CatalogEntry("sty_verbose", "verbose", "styles", "Thorough, detailed explanations", "#4ECDC4",
+                 "with thorough, detailed explanations", ("all",)),
+    CatalogEntry("gol_educate", "educate", "goals", "Explain and teach", "#45B7D1",
+                 "to explain clearly so the reader understands and learns", ("all",)),
+    CatalogEntry("gol_innovate", "innovate", "goals", "Creative, novel solutions", "#45B7D1",
+                 "to find creative and innovative solutions", ("all",)),
+    CatalogEntry("sco_detailed", "detailed", "scopes", "In-depth coverage", "#F7DC6F",
+                 "covering every relevant detail in depth", ("all",)),
+    CatalogEntry("sco_overview", "overview", "scopes", "High-level summary", "#F7DC6F",
+                 "giving a concise, high-level overview", ("all",)),
+    CatalogEntry("per_consultant", "consultant", "reviews", "Process and strategy advisor", "#BB8FCE",
+                 "from the perspective of an experienced process consultant", ("all",)),
+    CatalogEntry("per_researcher", "researcher", "reviews", "Research and data expertise", "#BB8FCE",
+                 "from the perspective of a rigorous researcher and data scientist", ("all",)),
+    CatalogEntry("per_teacher", "teacher", "reviews", "Patient educator", "#BB8FCE",
+                 "from the perspective of a patient, skilled teacher", ("all",)),
+)
+
+
+class BrickCatalog:
+    """Immutable, indexed set of catalog entries; safe to share between threads"""
+
+    def __init__(self, entries: Iterable[CatalogEntry]):
+        self.entries: Tuple[CatalogEntry, ...] = tuple(entries)
+        self.by_id: Dict[str, CatalogEntry] = {}
+        self.by_name: Dict[str, CatalogEntry] = {}
+        self.rows: Dict[str, int] = {}
+        for row, entry in enumerate(self.entries):
+            if entry.id in self.by_id:
+                raise ValueError(f"Duplicate brick ID: {entry.id}")
+            if entry.madlibs and entry.madlibs not in (entry.name,) + entry.aliases:
+                raise ValueError(f"Mad-Libs name '{entry.madlibs}' of {entry.id} must be its name or an alias")
+            self.by_id[entry.id] = entry
+            self.rows[entry.id] = row
+            for name in (entry.name,) + entry.aliases:
+                if name in self.by_name:
+                    raise ValueError(f"Brick name '{name}' is used by {self.by_name[name].id} and {entry.id}")
+                self.by_name[name] = entry
+        self._views: Dict[Tuple[str, str], Dict[str, Tuple[CatalogEntry, ...]]] = {}
+        self._views_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def get(self, key: str) -> Optional[CatalogEntry]:
+        """Entry by ID, name or alias"""
+        return self.by_id.get(key) or self.by_name.get(key)
+
+    def row(self, brick_id: str) -> Optional[int]:
+        """Position of a brick ID in entries"""
+        return self.rows.get(brick_id)
+
+    def search(self, query: str) -> Iterator[CatalogEntry]:
+        """Entries whose name, description or modifier text contains query (any case), in catalog order"""
+        query = query.lower()
+        return (entry for entry in self.entries if entry.matches(query))
+
+    def groups(self, workpath: str, by: str = "slot") -> Dict[str, Tuple[CatalogEntry, ...]]:
+        """
+        Entries for a workpath grouped by Mad-Libs slot or web category, in catalog order
+
+        Slot groups hold only the bricks offered in the Mad-Libs CLI.
+        """
+        key = (workpath, by)
+        view = self._views.get(key)
+        if view is None:
+            grouped: Dict[str, list] = {}
+            for entry in self.entries:
+                if entry.in_group(workpath, by):
+                    grouped.setdefault(getattr(entry, by), []).append(entry)
+            view = {group: tuple(entries) for group, entries in grouped.items()}
+            with self._views_lock:
+                view = self._views.setdefault(key, view)
+        return view
+
+
+@lru_cache(maxsize=None)
+def get_catalog():
+    """
+    The process-wide catalog: the compiled file named by BRICKZ_CATALOG_FILE
+    (memory-mapped, see core.compiled) or else the built-in system bricks
+    """
+    path = os.getenv("BRICKZ_CATALOG_FILE")
+    if path:
+        from .compiled import MappedCatalog
+        return MappedCatalog(path)
+    return BrickCatalog(SYSTEM_BRICKS)
@@ -0,0 +1,462 @@
+"""
+Compiled Catalog - a memory-mapped binary form of the brick catalog
+
+`compile_catalog` writes the catalog as flat tables, and `MappedCatalog`
+mmaps the file and decodes a brick only when it is looked up, so opening
+a catalog with millions of bricks costs the same as opening a small one
+and every worker process shares the pages through the OS page cache.
+
+    python -m prompt_bricks.core.compiled data/catalog.bin --extra custom_bricks.jsonl
+    BRICKZ_CATALOG_FILE=data/catalog.bin python app.py
+
+Layout (little-endian; every section 8-byte aligned):
+
+    header          magic, version, entry count, (offset, length) per section
+    string_offsets  u64[n + 1] byte offsets into `strings`
+    strings         UTF-8 bytes of every distinct string
+    records         u32[11] per entry: id, name, description, color,
+                    modifier_text (string numbers), slot symbol,
+                    alias start/count, workpath start/count,
+                    Mad-Libs name (string number)
+    aliases         u32 string numbers
+    workpaths       u32 symbol numbers
+    symbols         u32 string numbers (slots, categories and workpaths)
+    id_index        u32 open-addressed hash table, entry number + 1 (0 = empty)
+    name_index      same, over names and aliases
+    groups          u32[5] per group: workpath symbol, kind (0 slot, 1 category),
+                    group symbol, member start, member count (slot groups
+                    hold only bricks with a Mad-Libs name)
+    group_members   u32 entry numbers, in catalog order
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .catalog import CATEGORIES, SLOT_KINDS, SYSTEM_BRICKS, CatalogEntry
+
+MAGIC = b"BRKCAT\x00\x01"
+VERSION = 2
+SECTIONS = ("string_offsets", "strings", "records", "aliases", "workpaths", "symbols",
+            "id_index", "name_index", "groups", "group_members")
+HEADER = struct.Struct("<8sII" + "QQ" * len(SECTIONS))
+RECORD_FIELDS = 11
+RECORD = struct.Struct(f"<{RECORD_FIELDS}I")
+SPAN = struct.Struct("<QQ")
+GROUP_FIELDS = 5
+ENTRY_CACHE_SIZE = 4096  # decoded entries kept per open catalog
+GROUP_KINDS = ("slot", "category")
+
+
+def _hash(key: bytes) -> int:
+    return zlib.crc32(key)
+
+
+def _table_size(count: int) -> int:
+    """Power of two at least twice the key count (load factor <= 0.5)"""
+    size = 8
+    while size < count * 2:
+        size *= 2
+    return size
+
+
+class _StringTable:
+    """Interns strings into one blob"""
+
+    def __init__(self):
+        self.numbers: Dict[str, int] = {}
+        self.offsets = array("Q", [0])
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def add(self, text: str) -> int:
+        number = self.numbers.get(text)
+        if number is None:
+            data = text.encode("utf-8")
+            number = self.numbers[text] = len(self.chunks)
+            self.chunks.append(data)
+            self.size += len(data)
+            self.offsets.append(self.size)
+        return number
+
+
+def _hash_table(keys: Iterable[Tuple[bytes, int]], count: int, what: str) -> array:
+    table = array("I", bytes(4 * _table_size(count)))
+    mask = len(table) - 1
+    seen = {}
+    for key, entry_number in keys:
+        if key in seen:
+            raise ValueError(f"Duplicate brick {what} '{key.decode('utf-8')}'")
+        seen[key] = entry_number
+        slot = _hash(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = entry_number + 1
+    return table
+
+
+def check_entry(entry: CatalogEntry) -> CatalogEntry:
+    """Reject a brick whose slot (and so web category) neither package knows, or a stray Mad-Libs name"""
+    if entry.slot not in SLOT_KINDS or entry.category not in CATEGORIES:
+        raise ValueError(f"Brick '{entry.id}' has unknown slot '{entry.slot}' "
+                         f"(expected one of: {', '.join(SLOT_KINDS)})")
+    if entry.madlibs and entry.madlibs not in (entry.name,) + entry.aliases:
+        raise ValueError(f"Brick '{entry.id}' has Mad-Libs name '{entry.madlibs}', which is not its name or an alias")
+    return entry
+
+
+def compile_catalog(entries: Iterable[CatalogEntry], path: str) -> int:
+    """Write entries to a compiled catalog file; returns the entry count"""
+    entries = [check_entry(entry) for entry in entries]
+    strings = _StringTable()
+    symbols: Dict[str, int] = {}
+    symbol_strings = array("I")
+
+    def symbol(text: str) -> int:
+        number = symbols.get(text)
+        if number is None:
+            number = symbols[text] = len(symbol_strings)
+            symbol_strings.append(strings.add(text))
+        return number
+
+    records = array("I")
+    aliases = array("I")
+    workpaths = array("I")
+    for entry in entries:
+        records.extend((strings.add(entry.id), strings.add(entry.name), strings.add(entry.description),
+                        strings.add(entry.color), strings.add(entry.modifier_text), symbol(entry.slot),
+                        len(aliases), len(entry.aliases), len(workpaths), len(entry.workpaths),
+                        strings.add(entry.madlibs)))
+        aliases.extend(strings.add(alias) for alias in entry.aliases)
+        workpaths.extend(symbol(workpath) for workpath in entry.workpaths)
+
+    id_index = _hash_table(((entry.id.encode("utf-8"), number) for number, entry in enumerate(entries)),
+                           len(entries), "ID")
+    name_keys = [(name.encode("utf-8"), number) for number, entry in enumerate(entries)
+                 for name in (entry.name,) + entry.aliases]
+    name_index = _hash_table(name_keys, len(name_keys), "name")
+
+    # Precomputed groupings: every workpath (including "all") by slot and by category
+    all_workpaths = sorted({workpath for entry in entries for workpath in entry.workpaths} | {"all"})
+    groups = array("I")
+    members = array("I")
+    for workpath in all_workpaths:
+        for kind, attribute in enumerate(GROUP_KINDS):
+            grouped: Dict[str, List[int]] = {}
+            for number, entry in enumerate(entries):
+                if entry.in_group(workpath, attribute):
+                    grouped.setdefault(getattr(entry, attribute), []).append(number)
+            for group, numbers in grouped.items():
+                groups.extend((symbol(workpath), kind, symbol(group), len(members), len(numbers)))
+                members.extend(numbers)
+
+    sections = {
+        "string_offsets": strings.offsets.tobytes(),
+        "strings": b"".join(strings.chunks),
+        "records": records.tobytes(),
+        "aliases": aliases.tobytes(),
+        "workpaths": workpaths.tobytes(),
+        "symbols": symbol_strings.tobytes(),
+        "id_index": id_index.tobytes(),
+        "name_index": name_index.tobytes(),
+        "groups": groups.tobytes(),
+        "group_members": members.tobytes(),
+    }
+    if sys.byteorder != "little":
+        raise RuntimeError("Compiled catalogs are little-endian; compile on a little-endian host")
+
+    layout = []
+    position = HEADER.size
+    for name in SECTIONS:
+        position += -position % 8
+        layout.append((position, len(sections[name])))
+        position += len(sections[name])
+
+    temp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(temp, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(entries),
+                                 *[value for pair in layout for value in pair]))
+        for name, (offset, length) in zip(SECTIONS, layout):
+            handle.write(bytes(offset - handle.tell()))
+            handle.write(sections[name])
+    os.replace(temp, path)
+    return len(entries)
+
+
+class _EntryList(Sequence):
+    """Entries by number, decoded on access"""
+
+    def __init__(self, catalog: "MappedCatalog", numbers: Optional[Sequence[int]] = None):
+        self._catalog = catalog
+        self._numbers = numbers
+
+    def __len__(self) -> int:
+        return self._catalog.count if self._numbers is None else len(self._numbers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._numbers is None:
+            if index < 0:
+                index += self._catalog.count
+            if not 0 <= index < self._catalog.count:
+                raise IndexError(index)
+            return self._catalog._decode(index)
+        return self._catalog._decode(self._numbers[index])
+
+
+class _KeyIndex:
+    """Read-only dict-like view over one of the file's hash tables"""
+
+    def __init__(self, catalog: "MappedCatalog", table: memoryview, field: int, aliases: bool):
+        self._catalog = catalog
+        self._table = table
+        self._mask = len(table) - 1
+        self._field = field
+        self._aliases = aliases
+
+    def _matches(self, number: int, key: bytes) -> bool:
+        catalog = self._catalog
+        record = catalog.record(number)
+        if catalog.string_bytes(record[self._field]) == key:
+            return True
+        if self._aliases:
+            start, count = record[6], record[7]
+            return any(catalog.string_bytes(catalog.aliases[i]) == key for i in range(start, start + count))
+        return False
+
+    def number(self, key: str) -> Optional[int]:
+        data = key.encode("utf-8")
+        slot = _hash(data) & self._mask
+        while True:
+            value = self._table[slot]
+            if not value:
+                return None
+            if self._matches(value - 1, data):
+                return value - 1
+            slot = (slot + 1) & self._mask
+
+    def get(self, key: str, default=None) -> Optional[CatalogEntry]:
+        number = self.number(key)
+        return default if number is None else self._catalog.entry(number)
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.number(key) is not None
+
+    def __getitem__(self, key: str) -> CatalogEntry:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+
+class MappedCatalog:
+    """
+    A compiled catalog file opened with mmap
+
+    Offers the same lookups as BrickCatalog (get, by_id, by_name, groups,
+    iteration) but decodes entries only when they are touched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mmap, 0)
+        magic, version, self.count = header[:3]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled brick catalog")
+        if sys.byteorder != "little":
+            raise RuntimeError("Compiled catalogs can only be read on little-endian hosts")
+
+        view = memoryview(self._mmap)
+        self._views = [view]  # every export of the mmap, released by close()
+        layout = dict(zip(SECTIONS, zip(header[3::2], header[4::2])))
+
+        def section(name: str, fmt: str = "B") -> memoryview:
+            offset, length = layout[name]
+            data = view[offset:offset + length]
+            self._views.append(data)
+            if fmt != "B":
+                data = data.cast(fmt)
+                self._views.append(data)
+            return data
+
+        self._string_offsets = layout["string_offsets"][0]
+        self._strings = layout["strings"][0]
+        self._strings_end = self._strings + layout["strings"][1]
+        self._records = layout["records"][0]
+        self._offsets = section("string_offsets", "Q")
+        self._record_fields = section("records", "I")
+        self.aliases = section("aliases", "I")
+        self.workpath_symbols = section("workpaths", "I")
+        symbols = section("symbols", "I")
+        self._symbols = tuple(self.string(number) for number in symbols)
+        self.entry = lru_cache(maxsize=ENTRY_CACHE_SIZE)(self._decode)
+        self.by_id = _KeyIndex(self, section("id_index", "I"), 0, aliases=False)
+        self.by_name = _KeyIndex(self, section("name_index", "I"), 1, aliases=True)
+        self.entries = _EntryList(self)
+
+        # The group table is tiny (workpaths x groups), so it is decoded up front
+        groups = section("groups", "I")
+        members = section("group_members", "I")
+        self._groups: Dict[Tuple[str, str], Dict[str, _EntryList]] = {}
+        for base in range(0, len(groups), GROUP_FIELDS):
+            workpath, kind, group, start, count = groups[base:base + GROUP_FIELDS].tolist()
+            key = (self.symbol(workpath), GROUP_KINDS[kind])
+            numbers = members[start:start + count]
+            self._views.append(numbers)
+            self._groups.setdefault(key, {})[self.symbol(group)] = _EntryList(self, numbers)
+
+    def close(self):
+        """Unmap the file; the catalog cannot be used afterwards"""
+        self.entry.cache_clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> "MappedCatalog":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string_bytes(self, number: int) -> bytes:
+        start, end = SPAN.unpack_from(self._mmap, self._string_offsets + number * 8)
+        return self._mmap[self._strings + start:self._strings + end]
+
+    def string(self, number: int) -> str:
+        return self.string_bytes(number).decode("utf-8")
+
+    def symbol(self, number: int) -> str:
+        return self._symbols[number]
+
+    def record(self, number: int) -> Tuple[int, ...]:
+        return RECORD.unpack_from(self._mmap, self._records + number * RECORD.size)
+
+    def _decode(self, number: int) -> CatalogEntry:
+        """Decode one entry (wrapped in an LRU as `entry`)"""
+        (id_, name, description, color, modifier, slot,
+         alias_start, alias_count, workpath_start, workpath_count, madlibs) = self.record(number)
+        string, symbols = self.string, self._symbols
+        return CatalogEntry(
+            string(id_), string(name), symbols[slot], string(description), string(color), string(modifier),
+            tuple(symbols[self.workpath_symbols[i]] for i in range(workpath_start, workpath_start + workpath_count)),
+            tuple(string(self.aliases[i]) for i in range(alias_start, alias_start + alias_count)),
+            string(madlibs)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        for number in range(self.count):
+            yield self._decode(number)  # bypass the LRU so a full scan doesn't evict hot entries
+
+    def get(self, key: str) -> Optional[CatalogEntry]:
+        """Entry by ID, name or alias"""
+        number = self.by_id.number(key)
+        if number is None:
+            number = self.by_name.number(key)
+        return None if number is None else self.entry(number)
+
+    def row(self, brick_id: str) -> Optional[int]:
+        """Position of a brick ID in entries"""
+        return self.by_id.number(brick_id)
+
+    def _matching_strings(self, query: str) -> set:
+        """Numbers of the strings containing an ASCII query (any case), found by scanning the string blob"""
+        pattern = re.compile(re.escape(query.encode("ascii")), re.IGNORECASE)
+        offsets, base, end = self._offsets, self._strings, self._strings_end
+        found = set()
+        position = base
+        while True:
+            match = pattern.search(self._mmap, position, end)
+            if match is None:
+                return found
+            number = bisect_right(offsets, match.start() - base) - 1
+            if match.end() - base <= offsets[number + 1]:
+                found.add(number)
+            # One hit per string is enough; a match running into the next
+            # string only rules out this one
+            position = base + offsets[number + 1]
+
+    def search(self, query: str) -> Iterator[CatalogEntry]:
+        """
+        Entries whose name, description or modifier text contains query (any case), in catalog order
+
+        The string blob is scanned once and only matching entries are
+        decoded; queries with non-ASCII letters fall back to decoding all.
+        """
+        if not query.isascii():
+            lowered = query.lower()
+            yield from (entry for entry in self if entry.matches(lowered))
+            return
+        matching = self._matching_strings(query)
+        if not matching:
+            return
+        fields = self._record_fields
+        for number in range(self.count):
+            base = number * RECORD_FIELDS
+            # name, description and modifier text string numbers
+            if fields[base + 1] in matching or fields[base + 2] in matching or fields[base + 4] in matching:
+                yield self._decode(number)
+
+    def groups(self, workpath: str, by: str = "slot") -> Dict[str, Sequence[CatalogEntry]]:
+        """Entries for a workpath grouped by Mad-Libs slot or web category, in catalog order"""
+        return self._groups.get((workpath, by)) or self._groups.get(("all", by), {})
+
+
+def entries_from_jsonl(path: str) -> Iterator[CatalogEntry]:
+    """Extra bricks from JSONL: {id, name, slot|category, description, modifier_text, workpaths, madlibs, ...}"""
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                slot = record.get("slot") or record["category"]
+                entry = check_entry(CatalogEntry(
+                    record["id"], record["name"], slot, record.get("description", ""),
+                    record.get("color", "#6c757d"), record["modifier_text"],
+                    tuple(record.get("workpaths") or ("all",)), tuple(record.get("aliases") or ()),
+                    record.get("madlibs") or ""
+                ))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                detail = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+                raise ValueError(f"{path}:{number}: {detail}") from None
+            yield entry
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compile the brick catalog to a memory-mappable file")
+    parser.add_argument("output", help="Compiled catalog file to write")
+    parser.add_argument("--extra", action="append", default=[], help="JSONL file of extra bricks (repeatable)")
+    args = parser.parse_args(argv)
+
+    entries = list(SYSTEM_BRICKS)
+    try:
+        for path in args.extra:
+            entries.extend(entries_from_jsonl(path))
+        count = compile_catalog(entries, args.output)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Compiled {count} bricks to {args.output} ({os.path.getsize(args.output):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
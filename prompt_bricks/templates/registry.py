@@ -0,0 +1,139 @@
+"""
+Shared registry of precompiled prompt templates
+
+Both the Mad-Libs builder (prompt_bricks) and the two-pass optimizer
+(brickz) render from this registry, so every template is parsed once
+per process and only the selected one is ever rendered.
+"""
+
+from threading import Lock
+from typing import Dict, List, Optional
+
+from .template_engine import CompiledTemplate
+
+BUILTIN_TEMPLATES = {
+    # Mad-Libs templates used by TemplateEngine / BrickzBuilder
+    "madlibs.coding": """Analyze and improve this code {modifiers}.
+
+Current code:
+{content}
+
+Please provide an enhanced version that demonstrates:
+- Superior {style} implementation
+- Achievement of the {goal} objective
+- Proper {scope}-level optimization
+- Professional {review}-quality standards
+
+Focus on creating production-ready code that significantly improves upon the original.""",
+
+    "madlibs.conversational": """Please help with this request {modifiers}.
+
+Request:
+{content}
+
+Provide a response that is:
+- Written {style}
+- Achieves the goal of {goal}
+- Appropriate for {scope} context
+- Meets {review} quality standards""",
+
+    "madlibs.exploratory": """Conduct a thorough investigation {modifiers}.
+
+Research topic:
+{content}
+
+Please provide:
+- {approach} analysis
+- Multiple {perspective} viewpoints
+- {depth} level of investigation
+- {evidence} supporting information""",
+
+    # Pass 1 templates used by TwoPassOptimizer
+    "pass1.coding": """Analyze and improve this code {modifier_text}.
+
+Current code:
+{content}
+
+{user_context}
+
+Please provide an enhanced version that addresses the requirements above.""",
+
+    "pass1.conversational": """Please help with this request {modifier_text}.
+
+Request:
+{content}
+
+{user_context}
+
+Provide a response that meets the specified requirements.""",
+
+    "pass1.exploratory": """Conduct research and analysis {modifier_text}.
+
+Topic:
+{content}
+
+{user_context}
+
+Please provide comprehensive analysis addressing the requirements above.""",
+
+    # Pass 2 (PSE) template; content is the pass 1 result
+    "pse": """{intro}
+
+{content}
+
+{enhancement_prompt}
+
+Focus on demonstrating superior quality, expertise, and professional excellence that clearly surpasses the baseline attempt.""",
+}
+
+
+class TemplateRegistry:
+    """Process-wide store of compiled templates keyed by 'family.workpath'"""
+
+    def __init__(self, sources: Optional[Dict[str, str]] = None):
+        self._lock = Lock()
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self.fallbacks: Dict[str, int] = {}  # lookups per family that found no template of their own
+        for name, source in (sources or {}).items():
+            self.register(name, source)
+
+    def register(self, name: str, source: str) -> CompiledTemplate:
+        """Compile and store a template, replacing any previous one"""
+        compiled = CompiledTemplate(source)
+        with self._lock:
+            self._templates[name] = compiled
+        return compiled
+
+    def _fell_back(self, family: str):
+        with self._lock:
+            self.fallbacks[family] = self.fallbacks.get(family, 0) + 1
+
+    def get(self, name: str) -> Optional[CompiledTemplate]:
+        """Get a compiled template by name"""
+        template = self._templates.get(name)
+        if template is None:
+            self._fell_back(name.split(".", 1)[0])
+        return template
+
+    def resolve(self, family: str, workpath: str, fallback: str) -> CompiledTemplate:
+        """Get the family template for a workpath, or the fallback workpath's"""
+        template = self._templates.get(f"{family}.{workpath}")
+        if template is None:
+            self._fell_back(family)
+            return self._templates[f"{family}.{fallback}"]
+        return template
+
+    def render(self, name: str, **values) -> str:
+        """Render a registered template"""
+        return self._templates[name].render(**values)
+
+    def names(self, family: Optional[str] = None) -> List[str]:
+        """List registered template names, optionally for one family"""
+        if family is None:
+            return list(self._templates)
+        prefix = f"{family}."
+        return [name for name in self._templates if name.startswith(prefix)]
+
+
+# Global registry shared by prompt_bricks and brickz
+template_registry = TemplateRegistry(BUILTIN_TEMPLATES)
@@ -2,59 +2,122 @@
 Template Engine for Mad-Libs style prompt generation
 """
 
-class TemplateEngine:
-    """Generates templates for different workpaths with Mad-Libs placeholders"""
-    
-    def __init__(self):
-        self.templates = {
-            "coding": """Analyze and improve this code {modifiers}.
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fallback text for Mad-Libs slots the user didn't fill with a brick
+SLOT_DEFAULTS = {
+    "content": "",
+    "modifiers": "",
+    "style": "clean",
+    "goal": "overall improvement",
+    "scope": "appropriate",
+    "review": "expert",
+    "approach": "Thorough",
+    "perspective": "relevant",
+    "depth": "In-depth",
+    "evidence": "Well-sourced",
+}
+
 
-Current code:
-{content}
+class CompiledTemplate:
+    """
+    Template parsed once into literal segments and named slots
 
-Please provide an enhanced version that demonstrates:
-- Superior {style} implementation
-- Achievement of the {goal} objective
-- Proper {scope}-level optimization
-- Professional {review}-quality standards
+    Rendering is a single join over the precompiled parts, and any
+    slot that isn't supplied falls back to its default.
+    """
 
-Focus on creating production-ready code that significantly improves upon the original.""",
+    def __init__(self, source: str, defaults: Optional[Dict[str, str]] = None):
+        self.source = source
+        self.defaults = dict(SLOT_DEFAULTS if defaults is None else defaults)
+        self.parts: List[Tuple[str, Optional[str]]] = self._compile(source)
+        self.slots = tuple(dict.fromkeys(slot for _, slot in self.parts if slot))
 
-            "conversational": """Please help with this request {modifiers}.
+    @staticmethod
+    def _compile(source: str) -> List[Tuple[str, Optional[str]]]:
+        """Split a str.format template into (literal, slot) pairs"""
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is not None and (spec or conversion):
+                raise ValueError(f"Template slot '{field}' uses an unsupported format spec")
+            if field == "":
+                raise ValueError("Template slots must be named")
+            parts.append((literal, field))
+        return parts
 
-Request:
-{content}
+    def render(self, **values) -> str:
+        """Render the template, filling unsupplied slots with defaults"""
+        defaults = self.defaults
+        chunks = []
+        for literal, slot in self.parts:
+            chunks.append(literal)
+            if slot is not None:
+                value = values.get(slot)
+                chunks.append(str(value) if value is not None else defaults.get(slot, ""))
+        return "".join(chunks)
 
-Provide a response that is:
-- Written {style}
-- Achieves the goal of {goal}
-- Appropriate for {scope} context
-- Meets {review} quality standards""",
+    def bind(self, slot: str = "content", **values) -> List[str]:
+        """
+        Pre-render every slot except one, returning the literal chunks
+        that surround each occurrence of that slot
+        """
+        defaults = self.defaults
+        chunks = [""]
+        for literal, name in self.parts:
+            chunks[-1] += literal
+            if name == slot:
+                chunks.append("")
+            elif name is not None:
+                value = values.get(name)
+                chunks[-1] += str(value) if value is not None else defaults.get(name, "")
+        return chunks
 
-            "exploratory": """Conduct a thorough investigation {modifiers}.
+    def render_many(self, contents: Iterable[str], slot: str = "content", **values) -> List[str]:
+        """Render many contents against one template without re-parsing"""
+        chunks = self.bind(slot, **values)
+        if len(chunks) == 1:
+            return [chunks[0] for _ in contents]
+        if len(chunks) == 2:
+            prefix, suffix = chunks
+            return [prefix + content + suffix for content in contents]
+        return [content.join(chunks) for content in contents]
+
+
+class TemplateEngine:
+    """Generates templates for different workpaths with Mad-Libs placeholders"""
 
-Research topic:
-{content}
+    WORKPATHS = ("coding", "conversational", "exploratory")
+
+    def __init__(self):
+        from .registry import template_registry
+
+        # Compiled templates are shared process-wide through the registry
+        self.compiled = {workpath: template_registry.get(f"madlibs.{workpath}")
+                         for workpath in self.WORKPATHS}
+        self.templates = {workpath: template.source for workpath, template in self.compiled.items()}
 
-Please provide:
-- {approach} analysis
-- Multiple {perspective} viewpoints  
-- {depth} level of investigation
-- {evidence} supporting information"""
-        }
-    
     def get_template_for_workpath(self, workpath):
         """Get the template for a specific workpath"""
         return self.templates.get(workpath, self.templates["coding"])
-    
+
+    def get_compiled_template(self, workpath) -> CompiledTemplate:
+        """Get the precompiled template for a specific workpath"""
+        return self.compiled.get(workpath, self.compiled["coding"])
+
+    def render(self, workpath, **values) -> str:
+        """Render a workpath template; missing brick slots use defaults"""
+        return self.get_compiled_template(workpath).render(**values)
+
+    def render_many(self, workpath, contents, **values) -> List[str]:
+        """Render a batch of contents against one workpath template"""
+        return self.get_compiled_template(workpath).render_many(contents, **values)
+
     def preview_template(self, workpath, sample_bricks=None):
         """Preview a template with sample brick values"""
-        template = self.get_template_for_workpath(workpath)
-        
         if sample_bricks:
-            try:
-                return template.format(**sample_bricks, content="[Your content here]", modifiers="[Your selected modifiers]")
-            except KeyError as e:
-                return f"Template preview error: Missing {e}"
-        
-        return template
+            return self.render(workpath, **{**sample_bricks,
+                                             "content": "[Your content here]",
+                                             "modifiers": "[Your selected modifiers]"})
+
+        return self.get_template_for_workpath(workpath)
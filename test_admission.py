@@ -0,0 +1,112 @@
+"""
+Admission lanes
+
+A lane admits up to its concurrency, queues a bounded number of waiters
+for at most its SLO, and turns everything else away with 503 and
+Retry-After. Index-backed views answer 503 while their index is built.
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import app as app_module
+from brickz import admission
+from brickz.admission import AdmissionController, Lane, OverloadedError
+from brickz.bricks import BrickLibrary
+
+
+def test_lane_rejects_when_queue_is_full():
+    lane = Lane("test", concurrency=1, max_queue=0, max_wait=1.0)
+    admitted = lane.acquire()
+    with pytest.raises(OverloadedError) as rejected:
+        lane.acquire()
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after >= 1
+
+    lane.release(admitted)
+    lane.release(lane.acquire())
+    assert lane.in_flight == 0
+
+
+def test_lane_waiter_gets_released_slot():
+    lane = Lane("test", concurrency=1, max_queue=1, max_wait=5.0)
+    admitted = lane.acquire()
+    taken = []
+    waiter = threading.Thread(target=lambda: taken.append(lane.acquire()))
+    waiter.start()
+    while lane.waiting == 0:
+        time.sleep(0.01)
+
+    lane.release(admitted)
+    waiter.join(5)
+    assert taken and lane.in_flight == 1 and lane.waiting == 0
+    lane.release(taken[0])
+
+
+def test_lane_waiter_gives_up_at_slo():
+    lane = Lane("test", concurrency=1, max_queue=1, max_wait=0.1)
+    admitted = lane.acquire()
+    started = time.perf_counter()
+    with pytest.raises(OverloadedError) as rejected:
+        lane.acquire()
+    assert rejected.value.reason == "slo"
+    assert time.perf_counter() - started < 1
+    assert lane.waiting == 0
+    lane.release(admitted)
+
+
+def test_full_lane_answers_503_with_retry_after():
+    controller = AdmissionController({"catalog": (1, 0, 0.5)}, enabled=True)
+    flask_app = Flask(__name__)
+
+    @flask_app.route("/cheap")
+    def cheap():
+        return "ok"
+
+    @flask_app.route("/free")
+    def free():
+        return "ok"
+
+    admission.instrument_app(flask_app, {"cheap": "catalog"}, controller)
+    client = flask_app.test_client()
+    assert client.get("/cheap").status_code == 200
+
+    lane = controller.lanes["catalog"]
+    admitted = lane.acquire()  # another request holds the only slot
+    try:
+        response = client.get("/cheap")
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.get_json()["lane"] == "catalog"
+        # Views outside any lane are still served
+        assert client.get("/free").status_code == 200
+    finally:
+        lane.release(admitted)
+    assert client.get("/cheap").status_code == 200
+
+
+def test_index_views_stay_out_of_the_catalog_lane():
+    for view in ("similar_bricks", "create_custom_brick", "find_duplicate_bricks"):
+        assert app_module.ADMISSION_LANES[view] == "analysis"
+
+
+def test_index_views_answer_503_while_building(monkeypatch):
+    library = BrickLibrary()
+    monkeypatch.setattr(library, "_build_in_background", lambda name, build: None)
+    monkeypatch.setitem(app_module._components, "brick_library", library)
+    client = app_module.app.test_client()
+
+    responses = [
+        client.get("/api/bricks/similar?q=harden%20my%20API"),
+        client.post("/api/bricks/duplicates", json={"description": "Optimize performance"}),
+        client.post("/api/bricks/create", json={
+            "name": "speedy", "category": "goals", "description": "Speed gains",
+            "modifier_text": "to make everything faster", "workpaths": ["coding"]}),
+    ]
+    for response in responses:
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(app_module.INDEX_RETRY_AFTER)
+        assert response.get_json()["status"] == "building"
@@ -0,0 +1,74 @@
+"""
+Concurrency stress test for the stateless BrickzBuilder.build API
+
+Many threads share one builder, library and template engine, each
+building its own specs; every prompt must match what a private builder
+produces serially, so no request sees another's workpath or bricks.
+"""
+
+import os
+import random
+import sys
+import threading
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prompt_bricks.brickz_builder import BrickzBuilder, BuildSpec
+
+THREADS = 16
+BUILDS_PER_THREAD = 400
+HISTORY_SIZE = 50
+
+
+def _random_spec(builder: BrickzBuilder, rng: random.Random, index: int) -> BuildSpec:
+    workpath = rng.choice(["coding", "conversational", "exploratory"])
+    bricks = {}
+    for category, options in builder.brick_library.get_bricks_for_workpath(workpath).items():
+        if options and rng.random() < 0.6:
+            bricks[category] = rng.choice(options).name
+    return BuildSpec(workpath, f"request {index}: {workpath} content {rng.random()}", bricks)
+
+
+def test_shared_builder_has_no_cross_talk():
+    shared = BrickzBuilder(history_size=HISTORY_SIZE)
+    reference = BrickzBuilder(history_size=0)
+    barrier = threading.Barrier(THREADS)
+    failures = []
+
+    def worker(thread_index):
+        rng = random.Random(thread_index)
+        specs = [_random_spec(shared, rng, thread_index * BUILDS_PER_THREAD + i)
+                 for i in range(BUILDS_PER_THREAD)]
+        barrier.wait()
+        results = [(spec, shared.build(spec)) for spec in specs]
+        for spec, prompt in results:
+            if prompt != reference.build(spec):
+                failures.append(spec)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not failures, f"{len(failures)} builds differed, e.g. {failures[0]}"
+    assert len(shared.build_history) == HISTORY_SIZE
+    assert shared.current_workpath is None and shared.selected_bricks == {}
+    assert len(reference.build_history) == 0
+
+
+def test_build_spec_is_immutable_and_validated():
+    builder = BrickzBuilder()
+    spec = BuildSpec("coding", "print('hi')", {"styles": "pythonic"})
+    assert spec.bricks == (("styles", "pythonic"),)
+    with pytest.raises(FrozenInstanceError):
+        spec.workpath = "exploratory"
+
+    assert "Pythonic" in builder.build(spec)
+    with pytest.raises(ValueError):
+        builder.build(BuildSpec("gardening", "x"))
+    with pytest.raises(ValueError):
+        builder.build(BuildSpec("coding", "x", {"styles": "not_a_brick"}))
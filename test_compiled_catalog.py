@@ -0,0 +1,97 @@
+"""
+Compiled catalog round trip
+
+A catalog compiled to disk and opened with MappedCatalog must answer
+every lookup exactly as the in-memory BrickCatalog built from the same
+entries does (Mad-Libs slot groups holding only Mad-Libs bricks), and
+compiling must refuse bricks whose slot or category neither package
+knows.
+"""
+
+import json
+
+import pytest
+
+from prompt_bricks.core.catalog import CATEGORIES, SYSTEM_BRICKS, WORKPATHS, BrickCatalog, CatalogEntry
+from prompt_bricks.core.compiled import MappedCatalog, compile_catalog, entries_from_jsonl
+
+EXTRA_BRICKS = [
+    CatalogEntry("cus_haiku", "haiku", "formats", "Seventeen syllables", "#F1948A",
+                 "as a haiku", ("conversational",), ("poem", "ünïcode")),
+    CatalogEntry("cus_auditor", "auditor", "reviews", "Compliance review", "#BB8FCE",
+                 "from the perspective of a compliance auditor", ("coding", "exploratory"),
+                 ("compliance_auditor",), madlibs="compliance_auditor"),
+]
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    entries = list(SYSTEM_BRICKS) + EXTRA_BRICKS
+    path = str(tmp_path / "catalog.bin")
+    assert compile_catalog(entries, path) == len(entries)
+    with MappedCatalog(path) as mapped:
+        yield BrickCatalog(entries), mapped
+
+
+def test_lookups_match(catalogs):
+    memory, mapped = catalogs
+    assert len(mapped) == len(memory)
+    assert list(mapped) == list(memory.entries)
+    for row, entry in enumerate(memory.entries):
+        assert mapped.get(entry.id) == entry
+        assert mapped.row(entry.id) == row
+        for name in (entry.name,) + entry.aliases:
+            assert mapped.by_name[name] == memory.by_name[name]
+            assert mapped.get(name) == memory.get(name)
+    assert mapped.get("no_such_brick") is None
+    assert "no_such_brick" not in mapped.by_name
+
+
+@pytest.mark.parametrize("by", ["slot", "category"])
+@pytest.mark.parametrize("workpath", WORKPATHS + ("all", "unknown"))
+def test_groups_match(catalogs, workpath, by):
+    memory, mapped = catalogs
+    expected = {group: list(entries) for group, entries in memory.groups(workpath, by).items()}
+    assert {group: list(entries) for group, entries in mapped.groups(workpath, by).items()} == expected
+
+
+def test_slot_groups_hold_only_madlibs_bricks(catalogs):
+    memory, mapped = catalogs
+    for catalog in (memory, mapped):
+        coding = catalog.groups("coding", by="slot")
+        assert [entry.id for entry in coding["reviews"]][-1] == "cus_auditor"
+        assert all(entry.madlibs for entries in coding.values() for entry in entries)
+        assert "cus_haiku" not in [entry.id for entry in catalog.groups("conversational", by="slot").get("formats", ())]
+        assert "cus_haiku" in [entry.id for entry in catalog.groups("conversational", by="category")["formats"]]
+
+
+def test_stray_madlibs_name_rejected(tmp_path):
+    path = tmp_path / "extra.jsonl"
+    path.write_text(json.dumps({"id": "cus_x", "name": "x", "slot": "styles", "modifier_text": "in style",
+                                "madlibs": "y"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="extra.jsonl:1: .*Mad-Libs name 'y'"):
+        list(entries_from_jsonl(str(path)))
+
+
+def test_categories_match_brick_categories():
+    from brickz.bricks import BrickCategory
+
+    assert set(CATEGORIES) == {category.key for category in BrickCategory}
+
+
+@pytest.mark.parametrize("record", [
+    {"id": "cus_x", "name": "x", "category": "vibes", "modifier_text": "with vibes"},
+    {"id": "cus_x", "name": "x", "slot": "tones", "modifier_text": "in a tone"},
+    {"id": "cus_x", "name": "x", "modifier_text": "with no slot"},
+])
+def test_unknown_slots_rejected(tmp_path, record):
+    path = tmp_path / "extra.jsonl"
+    path.write_text(json.dumps(record) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="extra.jsonl:1"):
+        list(entries_from_jsonl(str(path)))
+
+    entry = CatalogEntry("cus_x", "x", record.get("slot") or record.get("category") or "", "", "#000000",
+                         record["modifier_text"], ("all",))
+    with pytest.raises(ValueError, match="unknown slot"):
+        compile_catalog([entry], str(tmp_path / "catalog.bin"))
+    assert not (tmp_path / "catalog.bin").exists()
@@ -0,0 +1,93 @@
+"""
+Near-duplicate brick detection
+
+Checks that reworded and abbreviated bricks still count as duplicates,
+that large clusters of copies are reported in full, and that the create
+endpoint refuses a near-duplicate with 409 unless the client forces it.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import app as app_module
+from brickz.bricks import BrickLibrary
+from brickz.dedup import DUPLICATE_THRESHOLD, DuplicateIndex, clusters, signature
+
+
+def _brick(brick_id, description, modifier_text):
+    return SimpleNamespace(id=brick_id, description=description, modifier_text=modifier_text)
+
+
+def _similarity(first: str, second: str) -> float:
+    return float((signature(first) == signature(second)).mean())
+
+
+@pytest.mark.parametrize("first, second", [
+    ("optimize perf", "optimise performance"),
+    ("to optimize the performance", "optimise performance"),
+    ("Speed and efficiency gains to optimize performance", "speed and efficiency gains, optimise perf"),
+])
+def test_rewordings_are_duplicates(first, second):
+    assert _similarity(first, second) >= DUPLICATE_THRESHOLD
+
+
+@pytest.mark.parametrize("first, second", [
+    ("with security in mind", "with performance in mind"),
+    ("Write unit tests", "Explain the history of Rome"),
+])
+def test_different_bricks_are_not_duplicates(first, second):
+    assert _similarity(first, second) < DUPLICATE_THRESHOLD
+
+
+def test_find_all_reports_large_clusters_in_full():
+    copies = [_brick(f"copy_{i}", "Optimize performance", "to optimize performance and speed")
+              for i in range(600)]
+    others = [_brick("other", "Teach a beginner", "for readers new to the subject")]
+    index = DuplicateIndex(copies + others)
+
+    pairs = index.find_all()
+    assert {brick_id for pair in pairs for brick_id in pair[:2]} == {brick.id for brick in copies}
+
+    found = clusters(pairs, {brick_id: row for row, brick_id in enumerate(index.ids)})
+    assert len(found) == 1
+    assert found[0]["keep"] == "copy_0"
+    assert len(found[0]["duplicates"]) == 599
+
+
+@pytest.fixture
+def client(monkeypatch):
+    library = BrickLibrary()
+    library.build_duplicate_index()
+    monkeypatch.setitem(app_module._components, "brick_library", library)
+    return app_module.app.test_client()
+
+
+NEW_BRICK = {
+    "name": "speedy",
+    "category": "goals",
+    "description": "Speed and efficiency gains",
+    "modifier_text": "to optimise perf, reduce complexity and improve speed",
+    "workpaths": ["coding"],
+}
+
+
+def test_create_refuses_near_duplicate(client):
+    response = client.post("/api/bricks/create", json=NEW_BRICK)
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body["status"] == "duplicate"
+    assert "gol_optimize" in [match["id"] for match in body["duplicates"]]
+
+
+def test_create_with_force_keeps_duplicate(client):
+    response = client.post("/api/bricks/create", json=dict(NEW_BRICK, force=True))
+    assert response.status_code == 200
+    brick_id = response.get_json()["brick"]["id"]
+
+    # The forced brick is now itself a match for the next attempt
+    response = client.post("/api/bricks/create", json=dict(NEW_BRICK, name="speedier"))
+    assert response.status_code == 409
+    assert brick_id in [match["id"] for match in response.get_json()["duplicates"]]
@@ -4,7 +4,7 @@ Fixed test with proper brick selection
 
 import sys
 import os
-sys.path.append('/Users/tylerbessire/prompt-bricks-v2')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Test the enhanced interactive interface
 print("🧱 TESTING PROMPT BRICKS V2.0 INTERACTIVE INTERFACE")
@@ -0,0 +1,78 @@
+"""
+Cold import-time budget
+
+Each check runs a fresh interpreter with -X importtime and fails if the
+module's cumulative import time goes over its budget, or if an import
+drags in a heavy dependency that should only load on first use.
+Budgets are generous for slow CI machines; BRICKZ_IMPORT_BUDGET_SCALE
+scales them all (e.g. 2.0 on a very slow box).
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCALE = float(os.getenv("BRICKZ_IMPORT_BUDGET_SCALE", "1.0"))
+
+# Cumulative cold import time allowed per module, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "prompt_bricks": 50,
+    "prompt_bricks.templates.registry": 100,
+    "brickz.optimizer": 300,
+}
+
+# Modules that must not be loaded as a side effect of importing these
+DEFERRED_MODULES = {
+    "prompt_bricks": ["prompt_bricks.brickz_builder", "prompt_bricks.models.anti_claude", "numpy"],
+    "brickz.optimizer": ["numpy", "openai", "anthropic", "google.generativeai", "urllib.request"],
+}
+
+
+def _cold_import(module: str, probe: str = "") -> subprocess.CompletedProcess:
+    """Import a module in a fresh interpreter with import timing on"""
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}\n{probe}"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+
+
+def _cumulative_ms(importtime_log: str, module: str) -> float:
+    """Cumulative import time of a top-level import from -X importtime output"""
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() == module and cumulative_us.strip().isdigit():
+            return int(cumulative_us) / 1000
+    raise AssertionError(f"{module} not found in import timing output")
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_import_time_within_budget(module):
+    result = _cold_import(module)
+    assert result.returncode == 0, result.stderr
+    elapsed = _cumulative_ms(result.stderr, module)
+    budget = IMPORT_BUDGETS_MS[module] * SCALE
+    assert elapsed <= budget, f"import {module} took {elapsed:.1f}ms (budget {budget:.0f}ms)"
+
+
+@pytest.mark.parametrize("module", sorted(DEFERRED_MODULES))
+def test_heavy_dependencies_are_deferred(module):
+    probe = f"import sys; print(','.join(m for m in {DEFERRED_MODULES[module]!r} if m in sys.modules))"
+    result = _cold_import(module, probe)
+    assert result.returncode == 0, result.stderr
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    assert not loaded, f"import {module} eagerly loaded {loaded}"
+
+
+def test_lazy_exports_resolve():
+    import prompt_bricks
+    from prompt_bricks.brickz_builder import BrickzBuilder
+
+    assert prompt_bricks.BrickzBuilder is BrickzBuilder
+    assert "TemplateEngine" in dir(prompt_bricks)
+    with pytest.raises(AttributeError):
+        prompt_bricks.NotAThing
@@ -0,0 +1,122 @@
+"""
+Optimization job store and manager
+
+Claims are exclusive, a running job only changes hands once its lease
+has run out, and only the current owner can record the outcome. The
+manager runs jobs to success or failure, and the submit endpoint
+rejects malformed brick selections before anything is queued.
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from brickz.bricks import BrickLibrary
+from brickz.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, Job, JobManager, JobStore
+
+
+def _store_with_job(job_id="job-1"):
+    store = JobStore(":memory:")
+    store.insert(Job(id=job_id, status=QUEUED, request={"content": "hi"}, created=time.time()))
+    return store
+
+
+def test_claim_is_exclusive():
+    store = _store_with_job()
+    assert store.claim("job-1", "worker-a", lease=60)
+    assert not store.claim("job-1", "worker-b", lease=60)
+    assert store.get("job-1").status == RUNNING
+    assert store.queued() == []
+
+
+def test_expired_lease_is_reclaimed():
+    store = _store_with_job()
+    assert store.claim("job-1", "worker-a", lease=60)
+
+    # Still leased: nothing to requeue
+    assert store.requeue_expired() == 0
+    assert store.requeue_expired(now=time.time() + 61) == 1
+    assert store.get("job-1").status == QUEUED
+    assert store.queued() == ["job-1"]
+
+    assert store.claim("job-1", "worker-b", lease=60)
+    # The old owner lost the job: it can neither renew it nor finish it
+    assert not store.renew("job-1", "worker-a", lease=60)
+    assert not store.mark_finished("job-1", "worker-a", SUCCEEDED, ttl=60, result={"x": 1})
+    assert store.renew("job-1", "worker-b", lease=60)
+    assert store.mark_finished("job-1", "worker-b", SUCCEEDED, ttl=60, result={"x": 2})
+    assert store.get("job-1").result == {"x": 2}
+
+
+def test_finish_and_fail_expire_after_ttl():
+    store = _store_with_job("ok")
+    store.insert(Job(id="bad", status=QUEUED, request={}, created=time.time()))
+    for job_id in ("ok", "bad"):
+        assert store.claim(job_id, "worker", lease=60)
+
+    assert store.mark_finished("ok", "worker", SUCCEEDED, ttl=10, result={"optimized_prompt": "p"})
+    assert store.mark_finished("bad", "worker", FAILED, ttl=10, error="RuntimeError: boom")
+    ok, bad = store.get("ok"), store.get("bad")
+    assert (ok.status, ok.result, ok.error) == (SUCCEEDED, {"optimized_prompt": "p"}, "")
+    assert (bad.status, bad.result, bad.error) == (FAILED, None, "RuntimeError: boom")
+
+    # A finished job can't be finished again, or released back to the queue
+    assert not store.mark_finished("ok", "worker", FAILED, ttl=10)
+    assert store.release("worker") == 0
+
+    later = time.time() + 11
+    assert store.get("ok", now=later) is None
+    assert store.delete_expired(now=later) == 2
+
+
+def test_release_requeues_owned_jobs():
+    store = _store_with_job()
+    assert store.claim("job-1", "worker-a", lease=60)
+    assert store.release("worker-b") == 0
+    assert store.release("worker-a") == 1
+    assert store.queued() == ["job-1"]
+
+
+class _Optimizer:
+    """Echoes the content back, or fails when asked to"""
+
+    async def optimize_prompt(self, content, workpath, selected_bricks, user_context, **kwargs):
+        if content == "fail":
+            raise RuntimeError("provider down")
+        return SimpleNamespace(final_output=content.upper(), improvement_score=1.0, processing_time=0.0,
+                               tier="max", pass2_skipped=False, pass1_tokens=1, pass2_tokens=1)
+
+
+def test_manager_runs_jobs_to_success_or_failure():
+    manager = JobManager(JobStore(":memory:"), lambda ids, user_id: {}, optimizer=_Optimizer(),
+                         workers=2).start()
+    try:
+        ok = manager.submit({"content": "hello"})
+        bad = manager.submit({"content": "fail"})
+        ok, bad = manager.wait(ok.id, timeout=5), manager.wait(bad.id, timeout=5)
+    finally:
+        manager.stop()
+
+    assert ok.status == SUCCEEDED
+    assert ok.result["optimized_prompt"] == "HELLO"
+    assert bad.status == FAILED
+    assert bad.error == "RuntimeError: provider down"
+
+
+@pytest.mark.parametrize("selected_bricks", [
+    ["gol_optimize"],
+    {"goals": ["gol_optimize"]},
+    {"goals": {"id": "gol_optimize"}},
+])
+def test_submit_rejects_malformed_selection(monkeypatch, selected_bricks):
+    library = BrickLibrary()
+    monkeypatch.setitem(app_module._components, "brick_library", library)
+    monkeypatch.setitem(app_module._components, "jobs", SimpleNamespace())  # never reached
+
+    response = app_module.app.test_client().post("/api/optimize/jobs", json={
+        "content": "make this faster", "selected_bricks": selected_bricks})
+    assert response.status_code == 400
+    assert "selected_bricks" in response.get_json()["error"]
+    assert not any(brick.usage_count for brick in library.get_popular_bricks())
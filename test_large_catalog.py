@@ -0,0 +1,83 @@
+"""
+Brick library over a large compiled catalog
+
+Categories come straight from the catalog's groups and only the bricks
+actually read get decoded; decoded system bricks sit in a bounded LRU
+and only custom bricks and bricks with usage stay resident.
+"""
+
+import pytest
+
+import app as app_module
+from brickz.bricks import BRICK_CACHE_SIZE, BrickLibrary
+from prompt_bricks.core.catalog import SYSTEM_BRICKS, CatalogEntry
+from prompt_bricks.core.compiled import MappedCatalog, compile_catalog
+
+PADDING = 20000
+CATEGORIES = ("styles", "goals", "scopes", "reviews", "formats", "contexts")
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    padding = [CatalogEntry(f"pad_{i}", f"padding_{i}", CATEGORIES[i % 6], f"Padding brick {i}", "#4ECDC4",
+                            f"with padding modifier {i}", ("coding",) if i % 3 else ("all",))
+               for i in range(PADDING)]
+    path = str(tmp_path_factory.mktemp("catalog") / "catalog.bin")
+    compile_catalog(list(SYSTEM_BRICKS) + padding, path)
+    with MappedCatalog(path) as mapped:
+        yield mapped
+
+
+@pytest.fixture
+def library(catalog):
+    return BrickLibrary(catalog=catalog)
+
+
+def test_categories_decode_only_what_is_read(library, catalog):
+    categories = library.get_bricks_for_workpath("coding")
+    assert sum(map(len, categories.values())) > PADDING
+    assert library.bricks.decoded() == 0
+
+    page = categories["styles"][:10]
+    assert [brick.id for brick in page] == [entry.id for entry in catalog.groups("coding", "category")["styles"][:10]]
+    assert library.bricks.decoded() == 10
+
+    # Walking every category never holds more than the LRU
+    for bricks in categories.values():
+        assert len(list(bricks)) == len(bricks)
+    assert library.bricks.decoded() == BRICK_CACHE_SIZE
+
+
+def test_used_bricks_stay_resident(library):
+    library.increment_usage("pad_1")
+    for bricks in library.get_bricks_for_workpath("coding").values():
+        list(bricks)  # evicts everything else
+    assert library.bricks.decoded() == BRICK_CACHE_SIZE + 1
+    assert [(brick.id, brick.usage_count) for brick in library.get_popular_bricks(1)] == [("pad_1", 1)]
+    assert library.get_brick("pad_1") is library.get_popular_bricks(1)[0]
+
+
+def test_search_decodes_only_matches(library):
+    results = library.search_bricks("padding modifier 1999", "coding")
+    assert [brick.id for brick in results] == ["pad_1999", "pad_19990", "pad_19991", "pad_19992", "pad_19993",
+                                               "pad_19994", "pad_19995", "pad_19996", "pad_19997", "pad_19998",
+                                               "pad_19999"]
+    assert library.bricks.decoded() == len(results)
+    assert len(library.search_bricks("PADDING", limit=5)) == 5
+
+
+def test_categories_endpoint_pages(monkeypatch, library):
+    monkeypatch.setitem(app_module._components, "brick_library", library)
+    client = app_module.app.test_client()
+
+    first = client.get("/api/bricks/categories?workpath=coding&limit=3").get_json()
+    styles = library.get_bricks_for_workpath("coding")["styles"]
+    assert first["totals"]["styles"] == len(styles)
+    assert [brick["id"] for brick in first["categories"]["styles"]] == [brick.id for brick in styles[:3]]
+
+    second = client.get("/api/bricks/categories?workpath=coding&limit=3&offset=3").get_json()
+    assert [brick["id"] for brick in second["categories"]["styles"]] == [brick.id for brick in styles[3:6]]
+    # Only the bricks on the two pages were decoded
+    assert library.bricks.decoded() == 2 * 3 * len(first["categories"])
+
+    assert client.get("/api/bricks/categories?limit=lots").status_code == 400
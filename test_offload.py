@@ -0,0 +1,54 @@
+"""
+CPU offload pool timeouts
+
+A task that overruns the timeout falls back inline once, and the worker
+still running it is killed rather than left holding its slot; the next
+call starts a fresh pool.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from brickz.offload import OffloadPool
+
+
+@pytest.fixture
+def pool():
+    pool = OffloadPool(workers=1, threshold=0, timeout=1.0)
+    yield pool
+    pool.shutdown()
+
+
+def _workers(pool):
+    return list(pool._get_executor()._processes.values())
+
+
+def test_timed_out_task_kills_its_worker(pool):
+    assert pool._run("test", 1, abs, (-3,), lambda: "inline") == 3
+    workers = _workers(pool)
+
+    started = time.monotonic()
+    assert pool._run("test", 1, time.sleep, (30,), lambda: "inline") == "inline"
+    assert time.monotonic() - started < 5
+    for worker in workers:
+        worker.join(5)
+        assert not worker.is_alive()
+
+    # A fresh pool takes the next task
+    assert pool._run("test", 1, abs, (-4,), lambda: "inline") == 4
+    assert not set(_workers(pool)) & set(workers)
+
+
+def test_timed_out_async_task_kills_its_worker(pool):
+    async def run():
+        assert await pool._run_async("test", 1, abs, (-3,), lambda: "inline") == 3
+        workers = _workers(pool)
+        assert await pool._run_async("test", 1, time.sleep, (30,), lambda: "inline") == "inline"
+        for worker in workers:
+            worker.join(5)
+            assert not worker.is_alive()
+        assert await pool._run_async("test", 1, abs, (-5,), lambda: "inline") == 5
+
+    asyncio.run(run())
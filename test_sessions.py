@@ -0,0 +1,78 @@
+"""
+Incremental analysis sessions
+
+Random edit sequences are applied to a session and to a plain string
+side by side; after every few edits the session's analysis must equal
+a full wizard analysis of the string. Documents are run both as one
+long line and with line breaks, since blocks are split differently.
+"""
+
+import random
+
+import pytest
+
+from brickz.sessions import BLOCK_CHARS, AnalysisSession
+from brickz.wizard import BrickzWizard
+
+# Fragments that trigger every kind of wizard signal (code, data, prose, markers)
+WORDS = ("def class import function slow bug security report chat image photo pipeline csv pdf "
+         "the of and write blog research if ( ) { } x: $a = print( return console.log <div> "
+         "automation Performance SLOW data analysis step by step").split(" ")
+
+TRIALS = 60
+EDITS_PER_TRIAL = 25
+
+
+def _fragment(rng: random.Random, count: int, newlines: bool) -> str:
+    separators = [" ", "", "  "] + (["\n", "\n\n"] if newlines else [])
+    return "".join(rng.choice(WORDS) + rng.choice(separators) for _ in range(count))
+
+
+def _key(analysis):
+    return (analysis.content_type, analysis.suggested_template, analysis.confidence,
+            analysis.suggested_bricks, analysis.reasoning)
+
+
+@pytest.fixture(scope="module")
+def wizard():
+    return BrickzWizard()
+
+
+@pytest.mark.parametrize("newlines", [True, False], ids=["lines", "one-line"])
+def test_random_edits_match_full_analysis(wizard, newlines):
+    rng = random.Random(0xB21C + newlines)
+    for trial in range(TRIALS):
+        text = _fragment(rng, rng.randint(0, 400), newlines)
+        session = AnalysisSession("fuzz", text)
+        for step in range(EDITS_PER_TRIAL):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, min(len(text), start + rng.choice([0, 1, 5, 50, BLOCK_CHARS * 3])))
+            inserted = _fragment(rng, rng.choice([0, 1, 3, 200]), newlines)
+            text = text[:start] + inserted + text[end:]
+            session.apply([{"start": start, "end": end, "text": inserted}])
+
+            if rng.random() < 0.5 or step == EDITS_PER_TRIAL - 1:
+                _, analysis = session.analyze(wizard)
+                context = f"trial {trial}, edit {step}"
+                assert session.text() == text, context
+                assert len(session) == len(text), context
+                assert _key(analysis) == _key(wizard.analyze_content(text)), context
+
+
+def test_batched_edits_and_bad_edit_leave_document_unchanged(wizard):
+    session = AnalysisSession("batch", "def slow():\n    return 1\n")
+    version = session.apply([{"start": 0, "end": 3, "text": "async def"},
+                             {"start": 0, "end": 0, "text": "# perf\n"}])
+    assert session.text() == "# perf\nasync def slow():\n    return 1\n"
+
+    with pytest.raises(ValueError):
+        session.apply([{"start": 0, "end": 0, "text": "ok"}, {"start": 5, "end": 10_000, "text": "x"}])
+    assert session.version == version
+    assert session.text() == "# perf\nasync def slow():\n    return 1\n"
+
+
+def test_head_returns_document_prefix():
+    text = "".join(f"line {i}\n" for i in range(2000))
+    session = AnalysisSession("head", text)
+    for chars in (0, 10, BLOCK_CHARS, BLOCK_CHARS * 4 + 7, len(text) + 5):
+        assert session.head(chars) == text[:chars]
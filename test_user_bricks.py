@@ -0,0 +1,87 @@
+"""
+Private bricks and per-user views
+
+A private brick is only ever resolved or listed for its owner: another
+user's ID is skipped by get_brick, /api/optimize and /api/stats alike.
+A user's view is rebuilt only when their own collection changes and
+picks up new shared bricks without a rebuild.
+"""
+
+import pytest
+
+import app as app_module
+from brickz.bricks import BrickCategory, BrickLibrary
+from brickz.recommender import BrickRecommender
+
+
+@pytest.fixture
+def library():
+    return BrickLibrary()
+
+
+@pytest.fixture
+def secret(library):
+    return library.create_custom_brick("secret", BrickCategory.GOALS, "Alice's own goal",
+                                       "to follow alice's house rules", ["coding"], owner="alice")
+
+
+def _ids(categories):
+    return {brick.id for bricks in categories.values() for brick in bricks}
+
+
+def test_private_brick_resolved_only_for_owner(library, secret):
+    assert library.get_brick(secret.id, "alice") is secret
+    assert library.get_brick(secret.id, "bob") is None
+    assert library.get_brick(secret.id) is None
+
+    assert secret.id in _ids(library.get_user_bricks("alice", "coding").categories)
+    assert secret.id not in _ids(library.get_user_bricks("bob", "coding").categories)
+    assert secret.id not in _ids(library.get_bricks_for_workpath("coding"))
+    assert [brick.id for brick in library.search_bricks("house rules", user_id="alice")] == [secret.id]
+    assert library.search_bricks("house rules", user_id="bob") == []
+
+
+def test_optimize_and_stats_skip_other_users_private_brick(monkeypatch, library, secret):
+    monkeypatch.setitem(app_module._components, "brick_library", library)
+    monkeypatch.setitem(app_module._components, "recommender", BrickRecommender())
+    resolved = []
+
+    async def optimize_content(content, workpath, selected_bricks, user_context, **kwargs):
+        resolved.append({brick.id for brick in selected_bricks.values()})
+        return content
+
+    monkeypatch.setattr(app_module, "optimize_content", optimize_content)
+    client = app_module.app.test_client()
+    selection = {"goals": secret.id, "styles": "sty_pythonic"}
+
+    response = client.post("/api/optimize", json={"content": "tidy this", "selected_bricks": selection,
+                                                  "user": "bob"})
+    assert response.status_code == 200
+    assert resolved[-1] == {"sty_pythonic"}
+    assert secret.usage_count == 0
+
+    response = client.post("/api/optimize", json={"content": "tidy this", "selected_bricks": selection,
+                                                  "user": "alice"})
+    assert response.status_code == 200
+    assert resolved[-1] == {"sty_pythonic", secret.id}
+    assert secret.usage_count == 1
+
+    stats = client.get("/api/stats").get_json()
+    popular = [brick["name"] for brick in stats["stats"]["popular_bricks"]]
+    assert popular and "secret" not in popular
+
+
+def test_user_view_survives_new_shared_bricks(library, secret):
+    before = library.get_user_bricks("alice", "coding")
+    cached = library.user_collections._views[("alice", "coding")]
+
+    shared = library.create_custom_brick("speedy", BrickCategory.GOALS, "Speed gains",
+                                         "to make everything faster", ["coding"])
+    after = library.get_user_bricks("alice", "coding")
+    assert library.user_collections._views[("alice", "coding")] is cached
+    assert {shared.id, secret.id} <= _ids(after.categories)
+    assert len(after.categories["goals"]) == len(before.categories["goals"]) + 1
+
+    # Saving a brick changes the collection, so the view is rebuilt
+    library.save_to_collection("alice", shared.id)
+    assert shared.id in library.get_user_bricks("alice", "coding").saved